@@ -3,10 +3,12 @@
 Unified metric extraction/plotting for CPU, memory, net I/O, and tick times.
 
 Features:
-- get_dataframe_* functions per metric (CPU, memory, netio, tick) that collect metadata
+- get_dataframe_* functions per metric (CPU, memory, netio, tick, per-process, JVM GC/memory, JFR, client latency) that collect metadata
   (version, farm_count, trial, node) from path components.
 - apply_offsets() to drop/shift timestamps per (version, farm_count) so pre-setup data
   is discarded.
+- detect_lag_spikes() and attribute_lag_spikes() to cluster ticks over 50 ms into episodes and
+  attribute them to GC, heap pressure or CPU saturation, per version.
 - plot_* functions that emit per–farm-count time series and boxplots across versions/farm counts.
 
 Usage:
@@ -17,15 +19,22 @@ Edit OFFSETS to set per-(version, farm_count) offsets in seconds.
 
 from __future__ import annotations
 
+import fnmatch
 import glob
+import json
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Tuple
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import seaborn as sns
 
+from yardstick_benchmark.catalog import CAMPAIGN_CATALOG, CampaignCatalog
+from yardstick_benchmark.manifest import MANIFEST
+
 import math
 from typing import Iterable, List, Optional
 
@@ -60,15 +69,69 @@ def parse_metadata(path: Path) -> Dict[str, str]:
     return meta
 
 
+@lru_cache(maxsize=4)
+def _load_catalog(dest: Path, mtime: float) -> Optional[CampaignCatalog]:
+    return CampaignCatalog.load(dest)
+
+
+def find_files(dest: Path, name: str) -> List[Tuple[Path, Dict[str, str]]]:
+    """Files named like `name` (e.g. "cpu.csv" or "client-*.csv") under the
+    campaign directory `dest`, with the metadata `parse_metadata` returns.
+
+    Campaigns run by `benchmark.py` list their files in `catalog.jsonl`, so
+    only the catalog is read; for other directories the whole tree is searched
+    and the metadata is taken from the path. `trial.json` finds the manifest of
+    every trial.
+    """
+    catalog_file = dest / CAMPAIGN_CATALOG
+    catalog = None
+    if catalog_file.is_file():
+        catalog = _load_catalog(dest, catalog_file.stat().st_mtime)
+    if catalog is None:
+        found = glob.glob(str(dest / "**" / name), recursive=True)
+        return [(Path(f), parse_metadata(Path(f))) for f in found]
+
+    def metadata(entry: dict) -> Dict[str, str]:
+        return {
+            "version": entry["version"],
+            "farm_count": f"farms_{entry['farm_count']}",
+            "trial": str(entry["trial"]),
+            "node": entry.get("node"),
+        }
+
+    if name == MANIFEST:
+        trials = {e["trial_dir"]: e for es in catalog.by_kind.values() for e in es}
+        return [
+            (dest / trial_dir / MANIFEST, {**metadata(e), "node": None})
+            for trial_dir, e in sorted(trials.items())
+            if (dest / trial_dir / MANIFEST).is_file()
+        ]
+    kind = name.split(".", 1)[0].split("-*", 1)[0]
+    return [
+        (catalog.path(e), metadata(e))
+        for e in catalog.files(kind)
+        if fnmatch.fnmatch(Path(e["path"]).name, name)
+    ]
+
+
+def server_files(dest: Path, name: str) -> List[Tuple[Path, Dict[str, str]]]:
+    """Like `find_files`, but only the Telegraf output of the node that ran
+    the vanilla server, whose working directory is next to Telegraf's."""
+    return [(f, meta) for f, meta in find_files(dest, name) if any(f.parent.parent.glob("vanillamc-*"))]
+
+
 def apply_offsets(
     df: pd.DataFrame,
     version: str,
     farm_count: str,
     offset_map: Dict[Tuple[str, str], float],
     ts_col: str = "timestamp",
+    trial: Optional[str] = None,
 ) -> pd.DataFrame:
-    """Shift timestamps so that data before the configured offset is dropped."""
-    offset = offset_map.get((version, farm_count), 0)
+    """Shift timestamps so that data before the configured offset is dropped.
+    An offset for `(version, farm_count, trial)` takes precedence over the
+    one for `(version, farm_count)`."""
+    offset = offset_map.get((version, farm_count, trial), offset_map.get((version, farm_count), 0))
     if offset == 0:
         return df
     df = df[df[ts_col] >= offset].copy()
@@ -106,10 +169,8 @@ def set_shared_legend(fig: plt.Figure, axes: Iterable[plt.Axes], loc: str = "upp
 # ---------------------------------------------------------------------------
 
 def get_dataframe_cpu(dest: Path, offset_map: Dict[Tuple[str, str], float] | None = None) -> pd.DataFrame:
-    pattern = str(dest / "**" / "cpu.csv")
     dfs = []
-    for cpu_file in glob.glob(pattern, recursive=True):
-        meta = parse_metadata(Path(cpu_file))
+    for cpu_file, meta in find_files(dest, "cpu.csv"):
         cols = [
             "timestamp",
             "measurement",
@@ -133,9 +194,10 @@ def get_dataframe_cpu(dest: Path, offset_map: Dict[Tuple[str, str], float] | Non
         df = df[df.cpu == "cpu-total"].copy()
         df["time_total"] = df.time_active + df.time_idle
         df["util"] = 100 * df.time_active / df.time_total
+        df["timestamp_abs"] = df["timestamp"]
         df["timestamp"] = df["timestamp"] - df["timestamp"].min()
         if offset_map is not None:
-            df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map)
+            df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
         df["timestamp_m"] = df["timestamp"] / 60
         df["version"] = meta["version"]
         df["farm_count"] = meta["farm_count"]
@@ -146,10 +208,8 @@ def get_dataframe_cpu(dest: Path, offset_map: Dict[Tuple[str, str], float] | Non
 
 
 def get_dataframe_memory(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
-    pattern = str(dest / "**" / "mem.csv")
     dfs = []
-    for mem_file in glob.glob(pattern, recursive=True):
-        meta = parse_metadata(Path(mem_file))
+    for mem_file, meta in find_files(dest, "mem.csv"):
         cols = [
             "timestamp",
             "label",
@@ -191,8 +251,9 @@ def get_dataframe_memory(dest: Path, offset_map: Dict[Tuple[str, str], float]) -
             "write_back_tmp",
         ]
         df = pd.read_csv(mem_file, names=cols)
+        df["timestamp_abs"] = df["timestamp"]
         df["timestamp"] = df["timestamp"] - df["timestamp"].min()
-        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map)
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
         df["timestamp_m"] = df["timestamp"] / 60
         df["version"] = meta["version"]
         df["farm_count"] = meta["farm_count"]
@@ -203,10 +264,8 @@ def get_dataframe_memory(dest: Path, offset_map: Dict[Tuple[str, str], float]) -
 
 
 def get_dataframe_netio(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
-    pattern = str(dest / "**" / "net.csv")
     dfs = []
-    for net_file in glob.glob(pattern, recursive=True):
-        meta = parse_metadata(Path(net_file))
+    for net_file, meta in find_files(dest, "net.csv"):
         cols = [
             "timestamp",
             "label",
@@ -218,8 +277,9 @@ def get_dataframe_netio(dest: Path, offset_map: Dict[Tuple[str, str], float]) ->
         ]
         df = pd.read_csv(net_file, names=cols)
         df = df[df["interface"] == "eth0"].copy()
+        df["timestamp_abs"] = df["timestamp"]
         df["timestamp"] = df["timestamp"] - df["timestamp"].min()
-        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map)
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
         df = df.sort_values("timestamp")
         df["send_rate_kbps"] = df["bytes_sent"].diff().fillna(0) / df["timestamp"].diff().fillna(1) / 1024
         df["recv_rate_kbps"] = df["bytes_recv"].diff().fillna(0) / df["timestamp"].diff().fillna(1) / 1024
@@ -233,14 +293,134 @@ def get_dataframe_netio(dest: Path, offset_map: Dict[Tuple[str, str], float]) ->
 
 
 def get_dataframe_tick(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
-    pattern = str(dest / "**" / "minecraft_tick_times.csv")
     dfs = []
-    for tick_file in glob.glob(pattern, recursive=True):
-        meta = parse_metadata(Path(tick_file))
+    for tick_file, meta in find_files(dest, "minecraft_tick_times.csv"):
         cols = ["timestamp", "label", "node", "jolokia_endpoint", "tick_duration_ms"]
         df = pd.read_csv(tick_file, names=cols)
+        df["timestamp_abs"] = df["timestamp"]
+        df["timestamp"] = df["timestamp"] - df["timestamp"].min()
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
+        df["timestamp_m"] = df["timestamp"] / 60
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def get_dataframe_procstat(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Per-process metrics from `Telegraf.add_input_procstat`, one row per
+    sample of each monitored process (`process` is the PID file's name, `role`
+    is "server" or "bots"). Adds `cpu_util` in percent of one core, and the
+    context switch and I/O counters as per-second rates."""
+    counters = ["voluntary_context_switches", "involuntary_context_switches", "read_bytes", "write_bytes"]
+    dfs = []
+    for procstat_file, meta in find_files(dest, "procstat.csv"):
+        cols = [
+            "timestamp",
+            "label",
+            "host",
+            "process",
+            "role",
+            "cpu_time_system",
+            "cpu_time_user",
+            "involuntary_context_switches",
+            "memory_rss",
+            "num_threads",
+            "read_bytes",
+            "voluntary_context_switches",
+            "write_bytes",
+        ]
+        df = pd.read_csv(procstat_file, names=cols)
+        df = df.sort_values(["process", "timestamp"])
+        diff = df.groupby("process")[["timestamp", "cpu_time_user", "cpu_time_system", *counters]].diff()
+        # Counters that went backwards belong to a restarted process.
+        diff = diff.where(diff >= 0)
+        df["cpu_util"] = 100 * (diff.cpu_time_user + diff.cpu_time_system) / diff.timestamp
+        for counter in counters:
+            df[f"{counter}_rate"] = diff[counter] / diff.timestamp
+        df["memory_rss_mb"] = df["memory_rss"] / 2**20
+        df = df.dropna(subset=["cpu_util"])
+        df["timestamp_abs"] = df["timestamp"]
+        df["timestamp"] = df["timestamp"] - df["timestamp"].min()
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
+        df["timestamp_m"] = df["timestamp"] / 60
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def server_cpu_per_player(procstat_df: pd.DataFrame) -> pd.DataFrame:
+    """Mean CPU utilization of the server process per trial, in percent of one
+    core, and the same divided by the number of players. Each farm has one
+    player; with a schedule, pass rows labelled by `label_load_phases` to
+    divide by the players online at each sample instead."""
+    df = procstat_df[procstat_df["role"] == "server"].copy()
+    if "players" in df:
+        df = df[df["players"] > 0]
+        df["cpu_per_player"] = df["cpu_util"] / df["players"]
+    else:
+        players = df["farm_count"].str.removeprefix("farms_").astype(int)
+        df["cpu_per_player"] = df["cpu_util"] / players
+    keys = ["version", "farm_count", "trial"]
+    return df.groupby(keys, dropna=False)[["cpu_util", "cpu_per_player"]].mean().reset_index()
+
+
+def get_dataframe_tick_durations(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Per-tick durations from `Telegraf.add_input_execd_minecraft_ticks`, one
+    row per tick. The collector reads the last 100 ticks every 2.5 s, so all
+    ticks of a read share Telegraf's timestamp; `timestamp_abs` estimates when
+    each tick ended by counting back from the read."""
+    dfs = []
+    for tick_file, meta in find_files(dest, "minecraft_tick_duration.csv"):
+        cols = [
+            "timestamp",
+            "label",
+            "host",
+            "computed_timestamp_ms",
+            "loop_iteration",
+            "tick_duration_ms",
+            "tick_number",
+            "timestamp_ms",
+        ]
+        df = pd.read_csv(tick_file, names=cols).sort_values("tick_number")
+        # A tick takes at least 50 ms; the last tick of a read ends at the read.
+        elapsed = np.maximum(df["tick_duration_ms"], 50) / 1000
+        after = elapsed[::-1].groupby(df["loop_iteration"][::-1]).cumsum()[::-1] - elapsed
+        df["timestamp_abs"] = df["timestamp"] - after
+        df["timestamp"] = df["timestamp_abs"] - df["timestamp_abs"].min()
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
+        df["timestamp_m"] = df["timestamp"] / 60
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def get_dataframe_gc(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Garbage collector activity from the Jolokia input (full monitoring
+    profile), one row per sample and collector. `gc_count` and `gc_time_ms`
+    are the collections and the time spent collecting between the previous
+    sample (`interval_start`) and this one."""
+    dfs = []
+    for gc_file, meta in find_files(dest, "jvm_garbage_collector.csv"):
+        cols = ["timestamp", "label", "host", "jolokia_endpoint", "collector", "collection_count", "collection_time_ms"]
+        df = pd.read_csv(gc_file, names=cols).sort_values(["collector", "timestamp"])
+        diff = df.groupby("collector")[["timestamp", "collection_count", "collection_time_ms"]].diff()
+        df["interval_start"] = df["timestamp"] - diff["timestamp"]
+        df["gc_count"] = diff["collection_count"]
+        df["gc_time_ms"] = diff["collection_time_ms"]
+        # Counters restart with the JVM.
+        df = df[df["gc_count"] >= 0].copy()
+        df["timestamp_abs"] = df["timestamp"]
         df["timestamp"] = df["timestamp"] - df["timestamp"].min()
-        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map)
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
         df["timestamp_m"] = df["timestamp"] / 60
         df["version"] = meta["version"]
         df["farm_count"] = meta["farm_count"]
@@ -250,6 +430,228 @@ def get_dataframe_tick(dest: Path, offset_map: Dict[Tuple[str, str], float]) ->
     return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
 
 
+def get_dataframe_jvm_memory(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Heap and non-heap usage of the server JVM from the Jolokia input (full
+    monitoring profile), with `heap_used_pct` relative to the maximum heap."""
+    dfs = []
+    for mem_file, meta in find_files(dest, "jvm_memory.csv"):
+        cols = [
+            "timestamp",
+            "label",
+            "host",
+            "jolokia_endpoint",
+            "heap_committed",
+            "heap_init",
+            "heap_max",
+            "heap_used",
+            "nonheap_committed",
+            "nonheap_init",
+            "nonheap_max",
+            "nonheap_used",
+            "pending_finalization",
+        ]
+        df = pd.read_csv(mem_file, names=cols)
+        df["heap_used_mb"] = df["heap_used"] / 2**20
+        df["heap_used_pct"] = 100 * df["heap_used"] / df["heap_max"].where(df["heap_max"] > 0)
+        df["timestamp_abs"] = df["timestamp"]
+        df["timestamp"] = df["timestamp"] - df["timestamp"].min()
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
+        df["timestamp_m"] = df["timestamp"] / 60
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def get_dataframe_memory_pool(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Usage of each JVM memory pool (e.g. `G1 Old Gen`) from the Jolokia input
+    (full monitoring profile). Pools that are not garbage collected have no
+    `CollectionUsage` fields, so rows differ in length; the current usage is
+    always in the last four columns."""
+    dfs = []
+    for pool_file, meta in find_files(dest, "jvm_memory_pool.csv"):
+        with open(pool_file) as f:
+            rows = [line.rstrip("\n").split(",") for line in f if line.strip()]
+        df = pd.DataFrame({
+            "timestamp": [float(r[0]) for r in rows],
+            "host": [r[2] for r in rows],
+            "pool": [r[4] for r in rows],
+            "usage_committed": [float(r[-4]) for r in rows],
+            "usage_max": [float(r[-2]) for r in rows],
+            "usage_used": [float(r[-1]) for r in rows],
+        })
+        df["usage_used_mb"] = df["usage_used"] / 2**20
+        df["usage_used_pct"] = 100 * df["usage_used"] / df["usage_max"].where(df["usage_max"] > 0)
+        df["timestamp_abs"] = df["timestamp"]
+        df["timestamp"] = df["timestamp"] - df["timestamp"].min()
+        df = apply_offsets(df, meta["version"], meta["farm_count"], offset_map, trial=meta["trial"])
+        df["timestamp_m"] = df["timestamp"] / 60
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def get_dataframe_jfr(dest: Path) -> pd.DataFrame:
+    """Hot methods (`kind` "cpu") and allocation sites (`kind` "alloc") of the
+    server from Java Flight Recorder summaries (`jfr-summary-*.csv`, see
+    `MinecraftServer.stop_profiling`), one row per method and trial."""
+    dfs = []
+    for jfr_file, meta in find_files(dest, "jfr-summary-*.csv"):
+        df = pd.read_csv(jfr_file, keep_default_na=False)
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def jfr_top(jfr_df: pd.DataFrame, kind: str = "cpu", top: int = 10) -> pd.DataFrame:
+    """The `top` methods per (version, farm_count) by their share of the
+    samples of `kind`, over all trials. For allocation sites, the share is of
+    the estimated allocated bytes and the allocated class is kept."""
+    df = jfr_df[jfr_df["kind"] == kind]
+    keys = ["version", "farm_count"]
+    by = ["method", "object_class"] if kind == "alloc" else ["method"]
+    weight = "weight_bytes" if kind == "alloc" else "samples"
+    df = df.groupby(keys + by)[["samples", "weight_bytes"]].sum().reset_index()
+    df["share"] = df[weight] / df.groupby(keys)[weight].transform("sum")
+    df = df.sort_values(keys + ["share"], ascending=[True, True, False])
+    return df.groupby(keys).head(top).reset_index(drop=True)
+
+
+def get_dataframe_client(dest: Path, offset_map: Dict[Tuple[str, str], float]) -> pd.DataFrame:
+    """Client-observed latencies recorded by the bots (`keepalive_rtt`,
+    `action_ack`, `action_timeout`, `chunk_load`), one row per sample with the
+    value in `value_ms`. Timestamps are relative to the first sample of any bot
+    in the same trial."""
+    dfs = []
+    for client_file, meta in find_files(dest, "client-*.csv"):
+        df = pd.read_csv(client_file)
+        df["timestamp_abs"] = df["timestamp_ms"] / 1000
+        df["bot"] = Path(client_file).stem.rsplit("-", 1)[1]
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    if not dfs:
+        return pd.DataFrame()
+    df = pd.concat(dfs, ignore_index=True)
+    keys = ["version", "farm_count", "trial"]
+    start = df.groupby(keys, dropna=False)["timestamp_abs"].transform("min")
+    df["timestamp"] = df["timestamp_abs"] - start
+    trials = []
+    for (version, farm_count, trial_id), trial in df.groupby(keys, dropna=False):
+        trial = apply_offsets(trial, version, farm_count, offset_map, trial=trial_id)
+        trial["timestamp_m"] = trial["timestamp"] / 60
+        trials.append(trial)
+    return pd.concat(trials, ignore_index=True)
+
+
+def get_dataframe_player_events(dest: Path) -> pd.DataFrame:
+    """Bot join/leave/disconnect events logged by the workloads, one row per
+    event with its absolute `timestamp` in seconds and the change in the number
+    of online players (`delta`)."""
+    dfs = []
+    for events_file, meta in find_files(dest, "player-events-*.csv"):
+        df = pd.read_csv(events_file)
+        df["timestamp"] = df["timestamp_ms"] / 1000
+        df["delta"] = np.where(df["event"] == "join", 1, -1)
+        df["version"] = meta["version"]
+        df["farm_count"] = meta["farm_count"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    if not dfs:
+        return pd.DataFrame()
+    return pd.concat(dfs, ignore_index=True).sort_values("timestamp", ignore_index=True)
+
+
+def get_dataframe_world_setup(dest: Path) -> pd.DataFrame:
+    """Duration and number of commands of each world setup step (prepare,
+    flatten, build, clone, chickens, total) logged by the chicken farm
+    builder, one row per step and trial."""
+    dfs = []
+    for setup_file, meta in find_files(dest, "world-setup-*.csv"):
+        df = pd.read_csv(setup_file)
+        df["version"] = meta["version"]
+        df["trial"] = meta["trial"]
+        df["node"] = meta["node"]
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+
+def get_dataframe_schedule_phases(dest: Path) -> pd.DataFrame:
+    """Phases of the arrival schedule of every trial, with absolute `start`
+    and `end` timestamps in seconds."""
+    rows = []
+    seen = set()
+    for schedule_file, meta in find_files(dest, "schedule.json"):
+        # Every workload node has a copy of the same schedule.
+        key = (meta["version"], meta["farm_count"], meta["trial"])
+        if key in seen:
+            continue
+        seen.add(key)
+        schedule = json.loads(Path(schedule_file).read_text())
+        for phase in schedule["phases"]:
+            rows.append(
+                {
+                    "version": meta["version"],
+                    "farm_count": meta["farm_count"],
+                    "trial": meta["trial"],
+                    "phase": phase["phase"],
+                    "start": schedule["start"] + phase["start_s"],
+                    "end": schedule["start"] + phase["end_s"],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def players_at(events: pd.DataFrame, timestamps: pd.Series) -> np.ndarray:
+    """Number of online players at each absolute timestamp, from the events of
+    a single trial."""
+    events = events.sort_values("timestamp")
+    online = np.concatenate([[0], events["delta"].cumsum().to_numpy()])
+    return online[np.searchsorted(events["timestamp"].to_numpy(), timestamps.to_numpy(), side="right")]
+
+
+def _select_trial(df: pd.DataFrame, keys: List[str], values: Tuple) -> pd.DataFrame:
+    if df.empty:
+        return df
+    mask = np.logical_and.reduce(
+        [df[k].isna() if pd.isna(v) else df[k] == v for k, v in zip(keys, values)]
+    )
+    return df[mask]
+
+
+def label_load_phases(
+    df: pd.DataFrame, events: pd.DataFrame, phases: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """Add the number of online players (`players`) and, if `phases` is given,
+    the schedule phase (`phase`) at each row's `timestamp_abs`."""
+    df = df.copy()
+    df["players"] = 0
+    if phases is not None:
+        df["phase"] = None
+    keys = ["version", "farm_count", "trial"]
+    for key, idx in df.groupby(keys, dropna=False).groups.items():
+        ts = df.loc[idx, "timestamp_abs"]
+        trial_events = _select_trial(events, keys, key)
+        if not trial_events.empty:
+            df.loc[idx, "players"] = players_at(trial_events, ts)
+        if phases is None:
+            continue
+        for phase in _select_trial(phases, keys, key).itertuples():
+            df.loc[ts.index[ts.between(phase.start, phase.end, inclusive="left")], "phase"] = phase.phase
+    return df
+
+
 # ---------------------------------------------------------------------------
 # Plotting helpers
 # ---------------------------------------------------------------------------
@@ -434,6 +836,113 @@ def plot_box_all(
     plt.close(fig)
 
 
+# ---------------------------------------------------------------------------
+# Lag spike attribution
+# ---------------------------------------------------------------------------
+
+# Priority of the causes when several overlap an episode.
+LAG_CAUSES = ["gc", "heap_pressure", "cpu_saturation"]
+
+
+def detect_lag_spikes(tick_df: pd.DataFrame, threshold_ms: float = 50, gap_s: float = 1.0) -> pd.DataFrame:
+    """Cluster ticks longer than `threshold_ms` into lag spike episodes. Slow
+    ticks less than `gap_s` apart belong to the same episode. Returns one row
+    per episode with its absolute `start` and `end`, the number of slow
+    ticks, and their maximum and total duration."""
+    keys = ["version", "farm_count", "trial", "host"]
+    slow = tick_df[tick_df["tick_duration_ms"] > threshold_ms]
+    if slow.empty:
+        return pd.DataFrame()
+    slow = slow.sort_values(keys + ["timestamp_abs"])
+    # A tick started `tick_duration_ms` before it ended.
+    slow = slow.assign(start=slow["timestamp_abs"] - slow["tick_duration_ms"] / 1000)
+    new_episode = (
+        slow.groupby(keys, dropna=False)["timestamp_abs"].diff().isna()
+        | (slow["start"] - slow.groupby(keys, dropna=False)["timestamp_abs"].shift() > gap_s)
+    )
+    slow = slow.assign(episode=new_episode.cumsum() - 1)
+    episodes = slow.groupby("episode").agg(
+        **{k: (k, "first") for k in keys},
+        start=("start", "min"),
+        end=("timestamp_abs", "max"),
+        slow_ticks=("tick_duration_ms", "size"),
+        max_tick_ms=("tick_duration_ms", "max"),
+        total_tick_ms=("tick_duration_ms", "sum"),
+    )
+    return episodes.reset_index()
+
+
+def _overlapping(episodes: pd.DataFrame, intervals: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Join every episode to the intervals of the same trial and host that
+    overlap it. `intervals` has `interval_start` and `interval_end` columns."""
+    pairs = episodes[["episode", *keys, "start", "end"]].merge(intervals, on=keys)
+    return pairs[(pairs["interval_start"] <= pairs["end"]) & (pairs["start"] <= pairs["interval_end"])]
+
+
+def _sample_intervals(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Each sample covers the time since the previous sample of the same
+    series."""
+    df = df.sort_values(keys + ["timestamp_abs"])
+    return df.assign(
+        interval_start=df.groupby(keys, dropna=False)["timestamp_abs"].shift(),
+        interval_end=df["timestamp_abs"],
+    ).dropna(subset=["interval_start"])
+
+
+def attribute_lag_spikes(
+    episodes: pd.DataFrame,
+    gc_df: pd.DataFrame,
+    jvm_mem_df: pd.DataFrame,
+    cpu_df: pd.DataFrame,
+    heap_threshold_pct: float = 90,
+    cpu_threshold_pct: float = 90,
+) -> pd.DataFrame:
+    """Attribute each lag spike episode to what overlapped it on the server
+    node: garbage collection (`gc_time_ms` spent collecting in overlapping GC
+    samples), heap pressure (heap use at or above `heap_threshold_pct`) or
+    CPU saturation (node CPU utilization at or above `cpu_threshold_pct`).
+    Adds a column per cause and `cause`, the first one of `LAG_CAUSES` that
+    applies, or "unknown"."""
+    keys = ["version", "farm_count", "trial", "host"]
+    episodes = episodes.copy()
+    episodes["gc_time_ms"] = 0.0
+    for cause in LAG_CAUSES:
+        episodes[cause] = False
+    if not gc_df.empty:
+        gc = gc_df[gc_df["gc_count"] > 0].rename(columns={"timestamp_abs": "interval_end"})
+        pairs = _overlapping(episodes, gc[keys + ["interval_start", "interval_end", "gc_time_ms"]], keys)
+        gc_time = pairs.groupby("episode")["gc_time_ms"].sum()
+        episodes["gc_time_ms"] = episodes["episode"].map(gc_time).fillna(0)
+        episodes["gc"] = episodes["gc_time_ms"] > 0
+    if not jvm_mem_df.empty:
+        mem = _sample_intervals(jvm_mem_df, keys)
+        mem = mem[mem["heap_used_pct"] >= heap_threshold_pct]
+        pairs = _overlapping(episodes, mem[keys + ["interval_start", "interval_end"]], keys)
+        episodes["heap_pressure"] = episodes["episode"].isin(pairs["episode"])
+    if not cpu_df.empty:
+        # `util` is the average since boot; use the utilization between samples.
+        cpu = _sample_intervals(cpu_df, keys)
+        prev = cpu_df.sort_values(keys + ["timestamp_abs"]).groupby(keys, dropna=False)[["time_active", "time_total"]].shift()
+        cpu["interval_util"] = 100 * (cpu["time_active"] - prev["time_active"]) / (cpu["time_total"] - prev["time_total"])
+        cpu = cpu[cpu["interval_util"] >= cpu_threshold_pct]
+        pairs = _overlapping(episodes, cpu[keys + ["interval_start", "interval_end"]], keys)
+        episodes["cpu_saturation"] = episodes["episode"].isin(pairs["episode"])
+    episodes["cause"] = np.select([episodes[c] for c in LAG_CAUSES], LAG_CAUSES, default="unknown")
+    return episodes
+
+
+def lag_spike_breakdown(attributed: pd.DataFrame) -> pd.DataFrame:
+    """Per version and cause: the number of episodes, their share of all
+    episodes of the version, and the time spent in slow ticks."""
+    breakdown = attributed.groupby(["version", "cause"]).agg(
+        episodes=("episode", "size"),
+        slow_ticks=("slow_ticks", "sum"),
+        total_tick_ms=("total_tick_ms", "sum"),
+    ).reset_index()
+    breakdown["share"] = breakdown["episodes"] / breakdown.groupby("version")["episodes"].transform("sum")
+    return breakdown
+
+
 # ---------------------------------------------------------------------------
 # Offset computation from CPU peaks
 # ---------------------------------------------------------------------------
@@ -463,6 +972,44 @@ def compute_offsets_from_cpu(cpu_df: pd.DataFrame) -> Dict[Tuple[str, str], floa
     return offsets
 
 
+def get_measurement_windows(dest: Path) -> pd.DataFrame:
+    """Measurement windows chosen by the controller at steady state, one row
+    per trial with absolute `start` and `end` timestamps in seconds, read from
+    the trials' `trial.json` manifests."""
+    rows = []
+    for manifest_file, meta in find_files(dest, "trial.json"):
+        with open(manifest_file) as f:
+            window = json.load(f).get("window")
+        if not window:
+            continue
+        rows.append({
+            "version": meta["version"],
+            "farm_count": meta["farm_count"],
+            "trial": meta["trial"],
+            **window,
+        })
+    return pd.DataFrame(rows)
+
+
+def apply_windows(df: pd.DataFrame, windows: pd.DataFrame) -> pd.DataFrame:
+    """Keep only the rows inside their trial's measurement window and make
+    `timestamp` relative to the window start. Trials without a window are
+    left as they are."""
+    if df.empty or windows.empty:
+        return df
+    keys = ["version", "farm_count", "trial"]
+    trials = []
+    for key, trial in df.groupby(keys, dropna=False):
+        window = _select_trial(windows, keys, key)
+        if not window.empty:
+            start, end = window.iloc[0]["start"], window.iloc[0]["end"]
+            trial = trial[(trial["timestamp_abs"] >= start) & (trial["timestamp_abs"] < end)].copy()
+            trial["timestamp"] = trial["timestamp_abs"] - start
+            trial["timestamp_m"] = trial["timestamp"] / 60
+        trials.append(trial)
+    return pd.concat(trials, ignore_index=True)
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -476,18 +1023,34 @@ def main():
     outdir = Path("./plots_altogether")
     ensure_outdir(outdir)
 
-    # Load CPU once to derive offsets, then reload with offsets applied.
-    cpu_df_raw = get_dataframe_cpu(dest, offset_map=None)
+    # Trials that recorded a steady-state measurement window are cut to it.
+    # For the others, load CPU once to derive offsets, then reload with
+    # offsets applied.
+    windows = get_measurement_windows(dest)
+    windowed = set(windows[["version", "farm_count", "trial"]].itertuples(index=False, name=None)) if not windows.empty else set()
     offset_map = {**OFFSETS}
-    auto_offsets = compute_offsets_from_cpu(cpu_df_raw)
-    # Do not overwrite explicit OFFSETS; only add missing entries.
-    for key, val in auto_offsets.items():
-        offset_map.setdefault(key, val)
+    cpu_df_raw = get_dataframe_cpu(dest, offset_map=None)
+    if not cpu_df_raw.empty:
+        unwindowed = [
+            key not in windowed
+            for key in cpu_df_raw[["version", "farm_count", "trial"]].itertuples(index=False, name=None)
+        ]
+        auto_offsets = compute_offsets_from_cpu(cpu_df_raw[unwindowed])
+        # Do not overwrite explicit OFFSETS; only add missing entries.
+        for key, val in auto_offsets.items():
+            offset_map.setdefault(key, val)
+    # Windowed trials are cut by absolute time, so nothing is dropped before.
+    for key in windowed:
+        offset_map[key] = 0
 
-    cpu_df = get_dataframe_cpu(dest, offset_map=offset_map)
-    mem_df = get_dataframe_memory(dest, offset_map=offset_map)
-    net_df = get_dataframe_netio(dest, offset_map=offset_map)
-    tick_df = get_dataframe_tick(dest, offset_map=offset_map)
+    cpu_df = apply_windows(get_dataframe_cpu(dest, offset_map=offset_map), windows)
+    mem_df = apply_windows(get_dataframe_memory(dest, offset_map=offset_map), windows)
+    net_df = apply_windows(get_dataframe_netio(dest, offset_map=offset_map), windows)
+    tick_df = apply_windows(get_dataframe_tick(dest, offset_map=offset_map), windows)
+    procstat_df = apply_windows(get_dataframe_procstat(dest, offset_map=offset_map), windows)
+    tick_durations_df = apply_windows(get_dataframe_tick_durations(dest, offset_map=offset_map), windows)
+    gc_df = apply_windows(get_dataframe_gc(dest, offset_map=offset_map), windows)
+    jvm_mem_df = apply_windows(get_dataframe_jvm_memory(dest, offset_map=offset_map), windows)
 
     if cpu_df.empty and mem_df.empty and net_df.empty and tick_df.empty:
         print("No data found under", dest)
@@ -503,6 +1066,29 @@ def main():
         plot_tick(tick_df, outdir / "tick")
     plot_box_all(cpu_df, mem_df, net_df, tick_df, outdir / "boxplots")
 
+    # The server's own CPU time, without Telegraf, the tick collector and the
+    # rest of the node that `util` includes.
+    if not procstat_df.empty:
+        per_player = server_cpu_per_player(procstat_df)
+        per_player.to_csv(outdir / "server_cpu_per_player.csv", index=False)
+        print(per_player.groupby(["version", "farm_count"])[["cpu_util", "cpu_per_player"]].median())
+
+    # Where the server spends its time and allocates, from JFR recordings.
+    jfr_df = get_dataframe_jfr(dest)
+    if not jfr_df.empty:
+        jfr_top(jfr_df, "cpu").to_csv(outdir / "jfr_hot_methods.csv", index=False)
+        jfr_top(jfr_df, "alloc").to_csv(outdir / "jfr_allocation_sites.csv", index=False)
+
+    # What the slow ticks overlap with: GC, a nearly full heap or a busy CPU.
+    if not tick_durations_df.empty:
+        episodes = detect_lag_spikes(tick_durations_df)
+        if not episodes.empty:
+            attributed = attribute_lag_spikes(episodes, gc_df, jvm_mem_df, cpu_df)
+            attributed.to_csv(outdir / "lag_spikes.csv", index=False)
+            breakdown = lag_spike_breakdown(attributed)
+            breakdown.to_csv(outdir / "lag_spike_causes.csv", index=False)
+            print(breakdown)
+
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,36 @@
 from yardstick_benchmark.provisioning import Das
 from yardstick_benchmark.monitoring import Telegraf
+from yardstick_benchmark.monitoring.stream import MetricsStreamer
+from yardstick_benchmark.monitoring.receiver import LineProtocolReceiver
 from yardstick_benchmark.games.minecraft.server.J1164 import Java1164
 from yardstick_benchmark.games.minecraft.workload import ChickenFarm
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.metrics import tick_percentile
+from yardstick_benchmark.search import SaturationSearch
+from yardstick_benchmark.scheduler import Campaign
+from yardstick_benchmark.catalog import register_trial
+from yardstick_benchmark.results import ResultsDB
+from yardstick_benchmark.manifest import (
+    finish_trial,
+    is_complete,
+    is_done,
+    read_manifest,
+    start_trial,
+    write_manifest,
+)
 import yardstick_benchmark
-from time import sleep
 from datetime import datetime
+from dataclasses import asdict
 from pathlib import Path
 import os
-from multiprocessing import Pool
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
 import itertools as it
+import argparse
+import json
+import shutil
+import socket
+import traceback
 from datetime import timedelta
 
 
@@ -30,11 +52,24 @@ os.environ["ANSIBLE_CONFIG"] = str(Path.cwd() / ansible_config_path)
 
 # Configurable durations
 warmup = 0  # seconds to let world/workload settle before measuring, actually discard this, telegraf starts at the beginning anyway
-measurement = 300  # seconds to keep workload/monitoring running
+measurement = 300  # seconds to keep workload/monitoring running, at most
+min_measurement = 60  # seconds to measure before a trial may stop at steady state
+
+VERSIONS = ["1.20.1", "1.19.4",  "1.18.2",  "1.17.2"]
+FARM_COUNTS = [1, 5, 10, 15, 20, 25]
 
 
 class Benchmark:
-    def __init__(self, dir=f"/var/scratch/{os.getlogin()}/yardstick"):
+    def __init__(
+        self,
+        dir=f"/var/scratch/{os.getlogin()}/yardstick",
+        world_snapshots=True,
+        nodes=20,
+        resume=None,
+        stream_metrics=False,
+        receiver_port=None,
+        jfr_settings=None,
+    ):
         # The DAS compute cluster is a medium-sized cluster for research and education.
         # We use it in this example to provision bare-metal machines to run our performance
         # evaluation.
@@ -46,72 +81,265 @@ class Benchmark:
             .replace(":", "")
         )
         self.dir = dir + f"/{self.timestamp}"
+        if resume is not None:
+            # Continue an earlier campaign: trials whose manifest says they
+            # completed, and whose fetched data is intact, are skipped.
+            self.dir = str(Path(resume).resolve())
+            self.timestamp = Path(self.dir).name
+        # Server JARs, agents and dependency bundles are fetched or built once and
+        # shared by all campaigns.
+        self.cache = ArtifactCache(Path(dir) / "cache")
+        # Build each farm world once and restore it in every trial, instead of
+        # building the farms during the measurement.
+        self.world_snapshots = world_snapshots
+        # Number of DAS nodes the campaign may hold at once; every trial uses 2.
+        self.nodes = nodes
+        # Copy Telegraf output to the controller while trials run, so failed
+        # trials keep their data.
+        self.stream_metrics = stream_metrics
+        # Port of a LineProtocolReceiver on this machine that Telegraf sends
+        # all metrics to, stored per trial under `<dir>/received`.
+        self.receiver_port = receiver_port
+        # If set, record the server with Java Flight Recorder using these
+        # settings and summarise the measurement window into hot methods and
+        # allocation sites.
+        self.jfr_settings = jfr_settings
+
+    def world_snapshot(self, version, farm_count) -> Path:
+        """Path of the cached world snapshot for (version, farm_count)."""
+        return self.cache.root / ChickenFarm.world_snapshot_key(version, farm_count)
+
+    def build_world_snapshots(self, keys):
+        """Build the missing world snapshots of the (version, farm_count)
+        `keys` as a campaign of their own, before the trials that use them, so
+        the builds stay within the campaign's node budget and do not count
+        towards the duration of a trial."""
+        missing = sorted({k for k in keys if not self.world_snapshot(*k).is_file()})
+        if not missing:
+            return
+        builds = Campaign(
+            lambda key: self.ensure_world_snapshot(*key),
+            self.nodes,
+            status_file=Path(self.dir) / "snapshots.json",
+        )
+        for key in missing:
+            builds.add(key, nodes=2)
+        builds.run()
+
+    def ensure_world_snapshot(self, version, farm_count) -> Path:
+        """Return the world snapshot for (version, farm_count), building it
+        first if it is not cached yet.
+
+        Raises:
+            FileNotFoundError: If building the snapshot produced no file
+        """
+        snapshot = self.world_snapshot(version, farm_count)
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent trials wait for the first one to build the snapshot.
+        with open(snapshot.with_name(snapshot.name + ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if snapshot.is_file():
+                print(f"Using world snapshot {snapshot}")
+            else:
+                print(f"Building world snapshot {snapshot}")
+                self.build_world_snapshot(version, farm_count, snapshot)
+                if not snapshot.is_file():
+                    raise FileNotFoundError(
+                        f"building the world snapshot for version {version} with "
+                        f"{farm_count} farms did not produce {snapshot}"
+                    )
+        return snapshot
+
+    def build_world_snapshot(self, version, farm_count, dest: Path):
+        nodes = self.das.provision(num=2)
+        try:
+            yardstick_benchmark.clean(nodes)
+            vanillamc = Java1164(nodes[:1], version, cache=self.cache)
+            vanillamc.deploy()
+            vanillamc.start()
+            wl = ChickenFarm(
+                nodes[1:],
+                nodes[0].host,
+                duration=timedelta(minutes=30),
+                spawn_x=0,
+                spawn_y=0,
+                player_count=farm_count,
+                cache=self.cache,
+                world_mode="snapshot",
+            )
+            wl.deploy()
+            wl.start()
+            wl.wait_until_built()
+            wl.stop()
+            # Stopping the server saves the world to disk.
+            vanillamc.stop()
+            vanillamc.snapshot_world(dest)
+        finally:
+            yardstick_benchmark.clean(nodes)
+            self.das.release(nodes)
+
+    def trial_dir(self, version, farm_count, trial) -> Path:
+        return Path(f"{self.dir}/version_{version}/farms_{farm_count}/trial_{trial}")
+
+    def set_aside(self, dest: Path) -> Path:
+        """Move a completed trial whose data no longer matches its checksum
+        to `<dir>/stale`, so it is run again without losing its data."""
+        stale = (
+            Path(self.dir)
+            / "stale"
+            / f"{dest.relative_to(self.dir)}-{datetime.now():%Y%m%dT%H%M%S}"
+        )
+        stale.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(dest), str(stale))
+        print(f"Data of {dest} changed since it completed, moved it to {stale}")
+        return stale
+
+    def run_version(self, version, farm_count, trial) -> Path:
+        """Run one trial and return the directory its data was fetched to.
+
+        Progress is recorded in the trial's `trial.json` manifest, and trials
+        that already completed in this campaign directory are not run again.
+        """
+        dest = self.trial_dir(version, farm_count, trial)
+        if is_done(dest):
+            # Its data is verified once, when the campaign is queued (see
+            # `run`); a completed trial is never deleted.
+            print(
+                f"Skipping trial {trial} for version {version} with {farm_count} "
+                "farms/bots, it already completed"
+            )
+            return dest
+        if dest.exists():
+            # Data of an earlier, failed or interrupted attempt.
+            shutil.rmtree(dest)
+        start_trial(
+            dest, {"version": version, "farm_count": farm_count, "trial": trial}
+        )
+        try:
+            self._measure(version, farm_count, trial, dest)
+        except Exception:
+            finish_trial(dest, error=traceback.format_exc(limit=5))
+            raise
+        finish_trial(dest)
+        # Analysis finds the trial's files through the campaign catalog.
+        register_trial(
+            Path(self.dir), dest, version=version, farm_count=farm_count, trial=trial
+        )
+        return dest
+
+    def _measure(self, version, farm_count, trial, dest: Path):
+        snapshot = None
+        if self.world_snapshots:
+            snapshot = self.ensure_world_snapshot(version, farm_count)
 
-    def run_version(self, version, farm_count, trial):
         # We reserve 2 nodes.
         nodes = self.das.provision(num=2)
+        streamer = None
 
         try:
             # Just in case, we remove data that may have been left from a previous run.
             yardstick_benchmark.clean(nodes)
 
+            # The server and workload are created first, so Telegraf knows
+            # where their PID files will be.
+            # VanillaMC handles deployment of the official Mojang vanilla server JAR.
+            # Pass a version from yardstick_benchmark/games/minecraft/server/J1164/vanilla_version_urls.json
+            # (defaults to the first entry if omitted).
+            vanillamc = Java1164(
+                nodes[:1], version, cache=self.cache, world_snapshot=snapshot
+            )
+            if snapshot is None:
+                # Without a farm snapshot, at least skip world generation.
+                vanillamc.use_pregenerated_world(self.cache)
+            wl = ChickenFarm(
+                nodes[1:],
+                nodes[0].host,
+                duration=timedelta(seconds=warmup + measurement + 30),
+                spawn_x=0,
+                spawn_y=0,
+                player_count=farm_count,
+                cache=self.cache,
+                world_mode="build" if snapshot is None else "prebuilt",
+            )
+
             ### METRICS ###
 
             # # Telegraf[](https://www.influxdata.com/time-series-platform/telegraf/)
             # # is the metric collection tool we use to collect performance metrics from the
             # # nodes and any applications deployed on these nodes.
-            telegraf = Telegraf(nodes)
+            telegraf = Telegraf(nodes, cache=self.cache)
             # # We plan to deploy our Minecraft-like game server on node 0.
             # # To obtain application level metrics from the game server,
             # # the next two lines configure node 0 to run additional metric collection
             # # tools.
             telegraf.add_input_jolokia_agent(nodes[0])
             telegraf.add_input_execd_minecraft_ticks(nodes[0])
+            # # Per-process CPU, memory and I/O of the server and the bot
+            # # workers, separate from Telegraf and the rest of the node.
+            telegraf.add_input_procstat(nodes[0], [vanillamc.pid_file(nodes[0])], "server")
+            for node in nodes[1:]:
+                telegraf.add_input_procstat(node, wl.pid_files(node), "bots")
+            if self.receiver_port is not None:
+                telegraf.add_output_http(
+                    f"http://{socket.getfqdn()}:{self.receiver_port}/write",
+                    tags={"version": version, "farm_count": farm_count, "trial": trial},
+                )
             # # Perform the actual deployment of Telegraf.
-            # # This includes downloading the Telegraf executable and preparing configuration
+            # # This includes installing the Telegraf executable (cached per node) and preparing configuration
             # # files.
             res = telegraf.deploy()
             # # Start Telegraf on all remote nodes.
             telegraf.start()
+            if self.stream_metrics:
+                streamer = MetricsStreamer(nodes, dest)
+                streamer.start()
 
             ### System Under Test (SUT) ###
 
-            # VanillaMC handles deployment of the official Mojang vanilla server JAR.
-            # Pass a version from yardstick_benchmark/games/minecraft/server/J1164/vanilla_version_urls.json
-            # (defaults to the first entry if omitted).
-            vanillamc = Java1164(nodes[:1], version)
-            # Perform the deployment, including downloading the vanilla server JAR and
-            # correctly configuring the server's properties file.
+            # Perform the deployment, including downloading the vanilla server JAR,
+            # restoring the prebuilt farm world, and correctly configuring the
+            # server's properties file.
             vanillamc.deploy()
             # Start the vanilla server.
             vanillamc.start()
 
             ### WORKLOAD ###
 
-            wl = ChickenFarm(
-                nodes[1:],
-                nodes[0].host,
-                duration=timedelta(seconds=warmup + measurement + 30),
-                spawn_x=0,
-                spawn_y=0,
-                player_count=farm_count,
-            )
             wl.deploy()
             wl.start()
+            if self.jfr_settings is not None:
+                # The window is only known once it ends, so the recording
+                # starts with the workload and the summary is cut to the window.
+                vanillamc.start_profiling(self.jfr_settings)
 
-            sleep_time = 60
-            print(f"sleeping for {sleep_time} seconds")
-            sleep(sleep_time)
+            # Measure until the tick durations are steady, within bounds, and
+            # record the window so analysis can cut the warmup.
+            with telegraf.tick_stream(nodes[0]) as ticks:
+                window = ticks.wait_for_steady_state(
+                    min_measurement, warmup + measurement
+                )
+            write_manifest(dest, window=asdict(window) if window is not None else None)
 
+            if self.jfr_settings is not None:
+                if window is not None:
+                    vanillamc.stop_profiling(window.start, window.end)
+                else:
+                    vanillamc.stop_profiling()
             vanillamc.stop()
             vanillamc.cleanup()
 
             telegraf.stop()
             telegraf.cleanup()
 
-            dest = Path(f"{self.dir}/version_{version}/farms_{farm_count}/trial_{trial}")
-            yardstick_benchmark.fetch(dest, nodes)
+            if streamer is not None:
+                streamer.stop()
+            # Metrics and logs only; the JARs, worlds and node_modules on the
+            # nodes are not needed for analysis.
+            report = yardstick_benchmark.fetch(dest, nodes, profile="logs")
+            write_manifest(dest, fetch=asdict(report))
         finally:
+            if streamer is not None:
+                streamer.stop()
             yardstick_benchmark.clean(nodes)
             self.das.release(nodes)
 
@@ -120,22 +348,146 @@ class Benchmark:
         print(
             f"Starting trial {trial} for version {version} with {farm_count} farms/bots",
         )
-        self.run_version(version, farm_count, trial)
+        dest = self.run_version(version, farm_count, trial)
         print(
             f"Finished trial {trial} for version {version} with {farm_count} farms/bots",
         )
+        print(self.cache.report())
+        return dest
+
+    def receiver(self):
+        """The controller-side receiver for this campaign, or None if Telegraf
+        only writes to files."""
+        if self.receiver_port is None:
+            return None
+        return LineProtocolReceiver(Path(self.dir) / "received", self.receiver_port)
 
     def run(self):
-        pairs = it.product(
-            ["1.20.1", "1.19.4",  "1.18.2",  "1.17.2"],
-            [1, 5, 10, 15, 20, 25],
-            range(10),
+        receiver = self.receiver()
+        if receiver is not None:
+            receiver.start()
+        campaign = Campaign(
+            self._run_version,
+            self.nodes,
+            status_file=Path(self.dir) / "campaign.json",
         )
+        pairs = []
+        for pair in it.product(VERSIONS, FARM_COUNTS, range(10)):
+            dest = self.trial_dir(*pair)
+            if is_done(dest):
+                if is_complete(dest):
+                    continue
+                self.set_aside(dest)
+            pairs.append(pair)
+        if self.world_snapshots:
+            self.build_world_snapshots((v, f) for v, f, _ in pairs)
+        for version, farm_count, trial in pairs:
+            # A trial whose snapshot could not be built tries again itself,
+            # on 2 more nodes.
+            missing = self.world_snapshots and not self.world_snapshot(version, farm_count).is_file()
+            campaign.add((version, farm_count, trial), nodes=4 if missing else 2)
+        try:
+            campaign.run()
+        finally:
+            if receiver is not None:
+                receiver.stop()
+        self.ingest()
+
+    def ingest(self):
+        """Keep the trial summaries next to those of earlier campaigns, for
+        trends and regressions across campaigns (see results_db.py)."""
+        with ResultsDB(Path(self.dir).parent / "results.sqlite") as db:
+            db.ingest(self.dir)
 
-        with Pool(10) as p:
-            p.map(self._run_version, pairs)
+    def search_version(
+        self, version, farm_counts=FARM_COUNTS, threshold_ms=50.0, repetitions=3
+    ) -> dict:
+        """Find the largest farm count for which the p95 tick duration of
+        `version` stays under `threshold_ms`, and write the probes to
+        `search-<version>.json`."""
+
+        def run_trial(farm_count, trial):
+            dest = self._run_version((version, farm_count, trial))
+            # Prefer the p95 of the steady-state window found during the trial.
+            window = (read_manifest(dest) or {}).get("window")
+            if window:
+                return window["p95_ms"]
+            return tick_percentile(dest, 95, skip_s=warmup)
+
+        search = SaturationSearch(
+            run_trial, farm_counts, threshold_ms=threshold_ms, repetitions=repetitions
+        )
+        summary = {"version": version, "threshold_ms": threshold_ms}
+        summary.update(search.run().summary())
+        print(
+            f"Version {version}: knee at {summary['knee']} farms/bots "
+            f"after {summary['trials']} trials"
+        )
+        out = Path(self.dir) / f"search-{version}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(summary, indent=2))
+        return summary
+
+    def search(self):
+        """Run `search_version` for all versions in parallel. Each search runs
+        its trials one after the other, since every probe depends on the
+        previous ones."""
+        receiver = self.receiver()
+        if receiver is not None:
+            receiver.start()
+        try:
+            # Threads, like the trials of `run`: they share `self.das`, which
+            # cannot be pickled for a process pool.
+            with ThreadPoolExecutor(len(VERSIONS)) as pool:
+                list(pool.map(self.search_version, VERSIONS))
+        finally:
+            if receiver is not None:
+                receiver.stop()
+        self.ingest()
 
 
 if __name__ == "__main__":
-    benchmark = Benchmark()
-    benchmark.run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=["grid", "search"],
+        default="grid",
+        help="grid runs every (version, farm count) 10 times; search looks for "
+        "the largest farm count with a p95 tick duration under 50 ms",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="DIR",
+        help="campaign directory of an earlier run to continue, rerunning only "
+        "trials that are missing or did not complete",
+    )
+    parser.add_argument(
+        "--stream-metrics",
+        action="store_true",
+        help="copy metrics to the controller during trials instead of only "
+        "fetching them at the end",
+    )
+    parser.add_argument(
+        "--receiver-port",
+        type=int,
+        help="also send Telegraf metrics to a receiver on this port of the "
+        "controller, which stores them under <campaign>/received",
+    )
+    parser.add_argument(
+        "--jfr",
+        metavar="SETTINGS",
+        help="profile the server with Java Flight Recorder during the "
+        "measurement window, with settings 'default', 'profile' or a .jfc file",
+    )
+    args = parser.parse_args()
+    benchmark = Benchmark(
+        resume=args.resume,
+        stream_metrics=args.stream_metrics,
+        receiver_port=args.receiver_port,
+        jfr_settings=args.jfr,
+    )
+    if args.mode == "search":
+        benchmark.search()
+    else:
+        benchmark.run()
@@ -0,0 +1,84 @@
+"""Import-time benchmark.
+
+Imports each module in a fresh interpreter several times and reports the
+median wall time, the slowest imports according to `python -X importtime`,
+and whether heavy dependencies (ansible_runner, plumbum, pandas) were pulled
+in. Configuration checks and analysis tools should not pay for the
+orchestration dependencies they do not use.
+
+Usage:
+    python benchmark_import.py [--repetitions 5] [--top 5] [MODULE ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "yardstick_benchmark",
+    "yardstick_benchmark.games",
+    "yardstick_benchmark.provisioning",
+    "yardstick_benchmark.monitoring",
+    "yardstick_benchmark.games.minecraft.workload",
+    "yardstick_benchmark.metrics",
+]
+
+HEAVY = ["ansible_runner", "plumbum", "pandas", "matplotlib"]
+
+PROBE = """\
+import sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(out[0]), out[1].split(",") if len(out) > 1 else []
+
+
+def slowest(module: str, top: int) -> list[tuple[int, str]]:
+    """The `top` imports with the largest cumulative time in microseconds."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[1 : top + 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times = []
+        for _ in range(args.repetitions):
+            elapsed, heavy = measure(module)
+            times.append(elapsed)
+        print(
+            f"{module}: median={statistics.median(times) * 1000:.1f}ms "
+            f"min={min(times) * 1000:.1f}ms heavy={','.join(heavy) or '-'}"
+        )
+        for cumulative, name in slowest(module, args.top):
+            print(f"  {cumulative / 1000:8.1f}ms {name}")
+
+
+if __name__ == "__main__":
+    main()
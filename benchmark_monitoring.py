@@ -0,0 +1,193 @@
+"""Monitoring observer-effect benchmark.
+
+Runs the same chicken farm trial with monitoring of increasing weight: no
+Telegraf at all, then each of the Telegraf profiles in
+`yardstick_benchmark.monitoring.PROFILES`. In every trial a small probe on the
+server node samples the server's CPU time and tick durations independently of
+Telegraf, so all profiles are measured the same way. The summary reports tick
+duration percentiles, server and node CPU usage, and the difference to the run
+without monitoring. The farms are restored from a world snapshot (see
+`Benchmark.ensure_world_snapshot`), so building them does not overlap the
+measurement.
+
+Usage:
+    python benchmark_monitoring.py [--version 1.20.1] [--farms 10]
+        [--repetitions 3] [--duration 300] [PROFILE ...]
+"""
+
+from benchmark import Benchmark
+from yardstick_benchmark.provisioning import Das
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.monitoring import PROFILES, Telegraf, probe_server
+from yardstick_benchmark.games.minecraft.server.J1164 import Java1164
+from yardstick_benchmark.games.minecraft.workload import ChickenFarm
+from yardstick_benchmark.metrics import percentile
+import yardstick_benchmark
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import csv
+import os
+import statistics
+import time
+
+# "none" runs the trial without deploying Telegraf.
+ALL_PROFILES = ("none",) + PROFILES
+
+# Seconds to let the server settle after the workload starts, before probing.
+WARMUP = 30
+
+
+def run_trial(
+    das: Das,
+    cache: ArtifactCache,
+    profile: str,
+    version: str,
+    farm_count: int,
+    duration: int,
+    dest: Path,
+    snapshot: Path,
+):
+    nodes = das.provision(num=2)
+    try:
+        yardstick_benchmark.clean(nodes)
+
+        telegraf = None
+        if profile != "none":
+            telegraf = Telegraf(nodes, cache=cache, profile=profile)
+            telegraf.add_input_jolokia_agent(nodes[0])
+            telegraf.add_input_execd_minecraft_ticks(nodes[0])
+            telegraf.deploy()
+            telegraf.start()
+
+        vanillamc = Java1164(nodes[:1], version, cache=cache, world_snapshot=snapshot)
+        vanillamc.deploy()
+        vanillamc.start()
+
+        wl = ChickenFarm(
+            nodes[1:],
+            nodes[0].host,
+            duration=timedelta(seconds=WARMUP + duration + 30),
+            spawn_x=0,
+            spawn_y=0,
+            player_count=farm_count,
+            cache=cache,
+            world_mode="prebuilt",
+        )
+        wl.deploy()
+        wl.start()
+
+        time.sleep(WARMUP)
+        probe_server(
+            nodes[0], vanillamc.pid_file(nodes[0]), timedelta(seconds=duration)
+        )
+
+        vanillamc.stop()
+        vanillamc.cleanup()
+        if telegraf is not None:
+            telegraf.stop()
+            telegraf.cleanup()
+
+        yardstick_benchmark.fetch(dest, nodes, profile="metrics")
+    finally:
+        yardstick_benchmark.clean(nodes)
+        das.release(nodes)
+
+
+def read_probe(path: Path) -> tuple[list[float], float, float]:
+    """Tick durations, server CPU % of one core and node CPU % of one probe
+    file."""
+    ticks = []
+    series = defaultdict(list)
+    with path.open() as f:
+        for row in csv.DictReader(f):
+            if row["metric"] == "tick_ms":
+                ticks.append(float(row["value"]))
+            else:
+                series[row["metric"]].append(
+                    (float(row["timestamp"]), float(row["value"]))
+                )
+    cpu = series["cpu_s"]
+    server_cpu = 100 * (cpu[-1][1] - cpu[0][1]) / (cpu[-1][0] - cpu[0][0])
+    busy, total = series["node_busy_s"], series["node_total_s"]
+    node_cpu = 100 * (busy[-1][1] - busy[0][1]) / (total[-1][1] - total[0][1])
+    return ticks, server_cpu, node_cpu
+
+
+def summarize(root: Path, profiles: list[str]) -> None:
+    results = {}
+    for profile in profiles:
+        ticks, server_cpu, node_cpu = [], [], []
+        for f in sorted((root / profile).glob("**/server-probe-*.csv")):
+            t, s, n = read_probe(f)
+            ticks += t
+            server_cpu.append(s)
+            node_cpu.append(n)
+        if not ticks:
+            print(f"{profile}: no probe data")
+            continue
+        results[profile] = {
+            "tick p50": percentile(ticks, 50),
+            "tick p95": percentile(ticks, 95),
+            "tick mean": statistics.mean(ticks),
+            "server cpu": statistics.mean(server_cpu),
+            "node cpu": statistics.mean(node_cpu),
+        }
+
+    if not results:
+        return
+    baseline = results.get("none")
+    columns = next(iter(results.values()))
+    print(f"{'profile':<8} " + " ".join(f"{k:>18}" for k in columns))
+    for profile, values in results.items():
+        cells = []
+        for key, value in values.items():
+            unit = "%" if "cpu" in key else "ms"
+            cell = f"{value:.2f}{unit}"
+            if baseline is not None and profile != "none":
+                cell += f" ({value - baseline[key]:+.2f})"
+            cells.append(f"{cell:>18}")
+        print(f"{profile:<8} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("profiles", nargs="*", default=list(ALL_PROFILES))
+    parser.add_argument("--version", default="1.20.1")
+    parser.add_argument("--farms", type=int, default=10)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--duration", type=int, default=300)
+    parser.add_argument("--dir", default=f"/var/scratch/{os.getlogin()}/yardstick")
+    args = parser.parse_args()
+    for profile in args.profiles:
+        if profile not in ALL_PROFILES:
+            raise ValueError(f"unknown monitoring profile '{profile}'")
+
+    cache = ArtifactCache(Path(args.dir) / "cache")
+    timestamp = (
+        datetime.now().isoformat(timespec="minutes").replace("-", "").replace(":", "")
+    )
+    root = Path(f"{args.dir}/monitoring-{timestamp}")
+    das = Das()
+    # Build the farms once, outside of the measured trials.
+    snapshot = Benchmark(dir=args.dir).ensure_world_snapshot(args.version, args.farms)
+    # Interleave the profiles so drift over the session affects all of them.
+    for trial in range(args.repetitions):
+        for profile in args.profiles:
+            print(f"Trial {trial} with monitoring profile '{profile}'")
+            run_trial(
+                das,
+                cache,
+                profile,
+                args.version,
+                args.farms,
+                args.duration,
+                root / profile / f"trial_{trial}",
+                snapshot,
+            )
+    summarize(root, args.profiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Throughput benchmark for the provisioning layer.
+
+Drives many concurrent `Das.provision`/`Das.release` calls against the simulated
+reservation system in `yardstick_benchmark.fake_preserve`, and reports
+provisioning throughput and the distribution of time spent waiting for nodes.
+No DAS access is required.
+
+Usage:
+    python benchmark_provisioning.py --clients 20 --requests 10 --nodes 16
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from yardstick_benchmark.provisioning import Das
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def client(das: Das, requests: int, num: int, time_s: int, hold_s: float):
+    waits = []
+    failures = 0
+    for _ in range(requests):
+        t = time.monotonic()
+        try:
+            nodes = das.provision(num=num, time_s=time_s)
+        except KeyError:
+            # The reservation was terminated by a simulated node failure.
+            failures += 1
+            continue
+        waits.append(time.monotonic() - t)
+        time.sleep(hold_s)
+        das.release(nodes)
+    return waits, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=10, help="per client")
+    parser.add_argument("--num", type=int, default=2, help="nodes per request")
+    parser.add_argument("--time-s", type=int, default=900)
+    parser.add_argument("--hold-s", type=float, default=0.5)
+    parser.add_argument("--nodes", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="fake-preserve-")
+    os.environ["FAKE_PRESERVE_STATE"] = str(Path(state_dir) / "state.json")
+    os.environ["FAKE_PRESERVE_NODES"] = str(args.nodes)
+    os.environ["FAKE_PRESERVE_DELAY"] = str(args.delay)
+    os.environ["FAKE_PRESERVE_FAILURE_RATE"] = str(args.failure_rate)
+
+    # Each client gets its own Das, like each worker process in benchmark.py.
+    start = time.monotonic()
+    with ThreadPoolExecutor(args.clients) as pool:
+        futures = [
+            pool.submit(
+                client,
+                Das.simulated(poll_interval_s=args.poll_interval),
+                args.requests,
+                args.num,
+                args.time_s,
+                args.hold_s,
+            )
+            for _ in range(args.clients)
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.monotonic() - start
+
+    waits = [w for ws, _ in results for w in ws]
+    failures = sum(f for _, f in results)
+    print(f"clients={args.clients} nodes={args.nodes} num={args.num}")
+    print(f"provisioned {len(waits)} reservations in {elapsed:.1f}s, {failures} failed")
+    print(f"throughput: {len(waits) / elapsed:.2f} provisions/s")
+    if waits:
+        print(
+            "wait [s]: "
+            f"mean={statistics.mean(waits):.3f} "
+            f"p50={percentile(waits, 50):.3f} "
+            f"p95={percentile(waits, 95):.3f} "
+            f"p99={percentile(waits, 99):.3f} "
+            f"max={max(waits):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
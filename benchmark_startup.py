@@ -0,0 +1,85 @@
+"""Server startup benchmark.
+
+Starts each server version repeatedly on one node and records the time-to-ready
+phases of every start (JVM start, world load, spawn preparation, ready, first
+tick). The generated world for each (version, seed) is stored in the artifact
+cache; later runs, and regular trials that call `use_pregenerated_world`,
+restore it instead of generating the world again.
+
+Usage:
+    python benchmark_startup.py [--server vanilla|papermc] [--repetitions 5]
+        [--seed SEED] [--fresh-world] VERSION [VERSION ...]
+"""
+
+from yardstick_benchmark.provisioning import Das
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.games.minecraft.server import PaperMC
+from yardstick_benchmark.games.minecraft.server.J1164 import Java1164
+import yardstick_benchmark
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+import argparse
+import csv
+import os
+import statistics
+
+
+def summarize(dest: Path) -> None:
+    elapsed = defaultdict(list)
+    for f in dest.glob("**/startup-times.csv"):
+        with f.open() as fin:
+            for row in csv.DictReader(fin):
+                elapsed[row["phase"]].append(float(row["elapsed_s"]))
+    for phase, values in sorted(elapsed.items(), key=lambda kv: min(kv[1])):
+        print(
+            f"  {phase:<14} median={statistics.median(values):7.2f}s "
+            f"min={min(values):7.2f}s max={max(values):7.2f}s n={len(values)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("versions", nargs="+")
+    parser.add_argument("--server", choices=["vanilla", "papermc"], default="vanilla")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--seed", default=None)
+    parser.add_argument(
+        "--fresh-world",
+        action="store_true",
+        help="generate a new world on every start instead of reusing one",
+    )
+    parser.add_argument("--dir", default=f"/var/scratch/{os.getlogin()}/yardstick")
+    args = parser.parse_args()
+
+    cache = ArtifactCache(Path(args.dir) / "cache")
+    timestamp = (
+        datetime.now().isoformat(timespec="minutes").replace("-", "").replace(":", "")
+    )
+    das = Das()
+    nodes = das.provision(num=1)
+    try:
+        for version in args.versions:
+            yardstick_benchmark.clean(nodes)
+            if args.server == "vanilla":
+                server = Java1164(nodes, version, cache=cache, seed=args.seed)
+            else:
+                server = PaperMC(nodes, version, cache=cache, seed=args.seed)
+            pregenerated = not args.fresh_world and server.use_pregenerated_world(cache)
+            server.deploy()
+            server.measure_startup(args.repetitions, fresh_world=args.fresh_world)
+            if not args.fresh_world and not pregenerated:
+                server.snapshot_world(cache.root / server.pregenerated_world_key())
+            server.cleanup()
+
+            dest = Path(f"{args.dir}/startup-{timestamp}/{args.server}_{version}")
+            yardstick_benchmark.fetch(dest, nodes)
+            print(f"{args.server} {version} (pregenerated world: {pregenerated}):")
+            summarize(dest)
+    finally:
+        yardstick_benchmark.clean(nodes)
+        das.release(nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,24 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from yardstick_benchmark.catalog import CampaignCatalog, add_files, file_entry
+
 debug = False
 
 
 dest = "/var/scratch/dsys2590/yardstick/20251209T1500/"
-raw_data_files = glob.glob(f"{dest}/**/metrics-*.csv", recursive=True)
+# Campaigns run by benchmark.py list their files in a catalog; the split files
+# are added to it, next to the metrics file they came from.
+catalog = CampaignCatalog.load(Path(dest))
+if catalog is not None:
+    sources = catalog.files("metrics")
+    raw_data_files = [catalog.path(e) for e in sources]
+else:
+    sources = None
+    raw_data_files = glob.glob(f"{dest}/**/metrics-*.csv", recursive=True)
 
-for raw_data_file in raw_data_files:
+derived = []
+for i, raw_data_file in enumerate(raw_data_files):
     metrics_file = Path(raw_data_file)
     keys = {}
     with open(metrics_file) as fin:
@@ -24,4 +35,12 @@ for raw_data_file in raw_data_files:
             keys[key].write(line)
     for key, fd in keys.items():
         fd.close()
+    if sources is not None:
+        source = sources[i]
+        trial_dir = metrics_file.parents[len(Path(source["path"]).parts) - 1]
+        for key in keys:
+            entry = file_entry(trial_dir, metrics_file.parent / f"{key}.csv", source["node"])
+            derived.append({**source, **entry})
+if derived:
+    add_files(Path(dest), derived)
 
@@ -6,6 +6,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+from analyze_metrics import players_at
+
 debug = False
 
 if len(sys.argv) < 2:
@@ -40,6 +42,29 @@ def offset_times(df):
     df["timestamp"] = df["timestamp"].replace(mapping)
 
 
+def label_players(df, data_file):
+    """Set the number of online players at each sample from the join/leave
+    events the bots logged during the run."""
+    run_dir = Path(data_file).resolve().parent.parent.parent
+    events_files = glob.glob(f"{run_dir}/**/player-events-*.csv", recursive=True)
+    if events_files:
+        events = pd.concat([pd.read_csv(f) for f in events_files], ignore_index=True)
+        events["timestamp"] = events["timestamp_ms"] / 1000
+        events["delta"] = np.where(events["event"] == "join", 1, -1)
+        df["players"] = players_at(events, df["timestamp_abs"])
+    else:
+        # Runs without event logs followed a fixed 5 -> 10 -> 20 timeline.
+        df["players"] = np.select(
+            [
+                df["timestamp_m"].between(0, 1),
+                df["timestamp_m"].between(1, 2),
+                df["timestamp_m"].between(2, 3),
+            ],
+            [5, 10, 20],
+            0,
+        )
+
+
 def get_cpu_df():
     server_cpus = glob.glob(f"{dest}/**/vanillamc-*/../*/cpu.csv", recursive=True)
 
@@ -60,20 +85,7 @@ def get_cpu_df():
             df["timestamp"] > 120)]["timestamp"].min()
         df["timestamp"] = df["timestamp"].transform(lambda x: x - steep_increase)
         df["timestamp_m"] = df["timestamp"] / 60
-        # very fancy
-        df["players"] = np.where(
-            df["timestamp_m"].between(0, 1),
-            5,
-            np.where(
-                df["timestamp_m"].between(1, 2),
-                10,
-                np.where(
-                    df["timestamp_m"].between(2, 3),
-                    20,
-                    0
-                )
-            )
-        )
+        label_players(df, cpu_file)
         df = df.sort_values("util", ascending=False).drop_duplicates(
             subset=["timestamp", "cpu"], keep="first")
         dfs.append(df)
@@ -117,25 +129,13 @@ def get_tick_df():
     dfs = []
     for tick_file in tick_times_file:
         df = pd.read_csv(tick_file, names = ["timestamp", "label", "node", "jolokia_endpoint", "tick_duration_ms"])
+        df["timestamp_abs"] = df["timestamp"]
         offset_times(df)
         # df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
         df["timestamp_m"] = df["timestamp"] / 60
         df["version"] = Path(tick_file).resolve().parent.parent.parent.name
         df["iter"] = Path(tick_file).resolve().parent.parent.parent.parent.name
-        # very fancy
-        df["players"] = np.where(
-            df["timestamp_m"].between(0, 1),
-            5,
-            np.where(
-                df["timestamp_m"].between(1, 2),
-                10,
-                np.where(
-                    df["timestamp_m"].between(2, 3),
-                    20,
-                    0
-                )
-            )
-        )
+        label_players(df, tick_file)
 
         dfs.append(df)
     return pd.concat(dfs, ignore_index=True)
@@ -187,25 +187,13 @@ def get_mem_df():
             "swap_total", "total", "used", "used_percent", "vmalloc_chunk", "vmalloc_total",
             "vmalloc_used", "wired", "write_back", "write_back_tmp"
         ])
+        df["timestamp_abs"] = df["timestamp"]
         offset_times(df)
         # df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
         df["timestamp_m"] = df["timestamp"] / 60
         df["version"] = Path(mem_file).resolve().parent.parent.parent.name
         df["iter"] = Path(mem_file).resolve().parent.parent.parent.parent.name
-        # very fancy
-        df["players"] = np.where(
-            df["timestamp_m"].between(0, 1),
-            5,
-            np.where(
-                df["timestamp_m"].between(1, 2),
-                10,
-                np.where(
-                    df["timestamp_m"].between(2, 3),
-                    20,
-                    0
-                )
-            )
-        )
+        label_players(df, mem_file)
 
         dfs.append(df)
     return pd.concat(dfs, ignore_index=True)
@@ -252,6 +240,7 @@ def get_net_df():
             *(f"misc{i}" for i in range(100))
         ])
         df = df[df["interface"] == "eth0"]
+        df["timestamp_abs"] = df["timestamp"]
         offset_times(df)
         # df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
         df["timestamp_m"] = df["timestamp"] / 60
@@ -263,20 +252,7 @@ def get_net_df():
         df["recv_rate_kbps"] = df["recv_rate"] / 1024
         df["version"] = Path(net_file).resolve().parent.parent.parent.name
         df["iter"] = Path(net_file).resolve().parent.parent.parent.parent.name
-        # very fancy
-        df["players"] = np.where(
-            df["timestamp_m"].between(0, 1),
-            5,
-            np.where(
-                df["timestamp_m"].between(1, 2),
-                10,
-                np.where(
-                    df["timestamp_m"].between(2, 3),
-                    20,
-                    0
-                )
-            )
-        )
+        label_players(df, net_file)
 
         dfs.append(df)
     return pd.concat(dfs, ignore_index=True)
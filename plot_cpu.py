@@ -1,10 +1,11 @@
 import sys
-import glob
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from analyze_metrics import server_files
+
 debug = True
 
 # if len(sys.argv) < 2:
@@ -14,16 +15,16 @@ debug = True
 
 dest = "/var/scratch/dsys2590/yardstick/20251209T1500/"
 
-server_cpus = glob.glob(f"{dest}/**/vanillamc-*/../*/cpu.csv", recursive=True)
+server_cpus = server_files(Path(dest), "cpu.csv")
 
 dfs = []
-for cpu_file in server_cpus:
+for cpu_file, meta in server_cpus:
     df = pd.read_csv(cpu_file, names=["timestamp", "measurement", "core_id", "cpu", "host", "physical_id", "time_active", "time_guest",
                      "time_guest_nice", "time_idle", "time_iowait", "time_irq", "time_nice", "time_softirq", "time_steal", "time_system", "time_user"])
-    df["node"] = Path(cpu_file).resolve().parent.parent.name
-    df["version"] = Path(cpu_file).resolve().parent.parent.parent.parent.parent.name
-    df["iter"] = Path(cpu_file).resolve().parent.parent.parent.name[-1]
-    df["farm_count"] = Path(cpu_file).resolve().parent.parent.parent.parent.name
+    df["node"] = meta["node"]
+    df["version"] = f"version_{meta['version']}"
+    df["iter"] = meta["trial"]
+    df["farm_count"] = meta["farm_count"]
     df = df[df.cpu == "cpu-total"]
     df['time_total'] = df.time_active + df.time_idle
     df['util'] = 100 * df.time_active / df.time_total
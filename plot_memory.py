@@ -1,21 +1,22 @@
 import sys
-import glob
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from analyze_metrics import server_files
+
 debug = True
 
 
 dest = "/var/scratch/dsys2590/yardstick/20251209T1500/"
 
-mem_files = glob.glob(f"{dest}/**/vanillamc-*/../*/mem.csv", recursive=True)
+mem_files = server_files(Path(dest), "mem.csv")
 
 
 # Extract the mem data
 dfs = []
-for mem_file in mem_files:
+for mem_file, meta in mem_files:
     df = pd.read_csv(mem_file, names=[
         "timestamp", "label", "node", "active", "available",
         "available_percent", "buffered", "cached", "commit_limit", "committed_as", "dirty",
@@ -26,10 +27,10 @@ for mem_file in mem_files:
         "vmalloc_used", "wired", "write_back", "write_back_tmp"
     ])
     # df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
-    df["node"] = Path(mem_file).resolve().parent.parent.name
-    df["version"] = Path(mem_file).resolve().parent.parent.parent.parent.parent.name
-    df["iter"] = Path(mem_file).resolve().parent.parent.parent.name[-1]
-    df["farm_count"] = Path(mem_file).resolve().parent.parent.parent.parent.name
+    df["node"] = meta["node"]
+    df["version"] = f"version_{meta['version']}"
+    df["iter"] = meta["trial"]
+    df["farm_count"] = meta["farm_count"]
     df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
     df["timestamp_m"] = df["timestamp"] / 60
 
@@ -1,18 +1,19 @@
 import sys
-import glob
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from analyze_metrics import server_files
+
 debug = True
 
 dest = "/var/scratch/dsys2590/yardstick/20251209T1500/"
 
-net_files = glob.glob(f"{dest}/**/vanillamc-*/../*/net.csv", recursive=True)
+net_files = server_files(Path(dest), "net.csv")
 
 dfs = []
-for net_file in net_files:
+for net_file, meta in net_files:
     df = pd.read_csv(net_file, names=[
         "timestamp", "label", "node", "interface", "bytes_sent", "bytes_recv",
         # There are more columns, but we don't need them and I'm not sure what they are
@@ -28,10 +29,10 @@ for net_file in net_files:
     df["recv_rate"] = df["bytes_recv"] / df["timestamp"]
     df["recv_rate_kbps"] = df["recv_rate"] / 1024
     
-    df["node"] = Path(net_file).resolve().parent.parent.name
-    df["version"] = Path(net_file).resolve().parent.parent.parent.parent.parent.name
-    df["iter"] = Path(net_file).resolve().parent.parent.parent.name[-1]
-    df["farm_count"] = Path(net_file).resolve().parent.parent.parent.parent.name
+    df["node"] = meta["node"]
+    df["version"] = f"version_{meta['version']}"
+    df["iter"] = meta["trial"]
+    df["farm_count"] = meta["farm_count"]
     
     dfs.append(df)
 df = pd.concat(dfs, ignore_index=True)
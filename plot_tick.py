@@ -1,27 +1,28 @@
 import sys
-import glob
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+from analyze_metrics import server_files
+
 debug = True
 
 
 dest = "/var/scratch/dsys2590/yardstick/20251209T1500/"
-tick_times_file = glob.glob(f"{dest}/**/vanillamc-*/../*/minecraft_tick_times.csv", recursive=True)
+tick_times_file = server_files(Path(dest), "minecraft_tick_times.csv")
 
 dfs = []
-for tick_file in tick_times_file:
+for tick_file, meta in tick_times_file:
     df = pd.read_csv(tick_file, names = ["timestamp", "label", "node", "jolokia_endpoint", "tick_duration_ms"])
     df["timestamp"] = df["timestamp"].transform(lambda x: x - x.min())
     df["timestamp_m"] = df["timestamp"] / 60
     
-    df["node"] = Path(tick_file).resolve().parent.parent.name
-    df["version"] = Path(tick_file).resolve().parent.parent.parent.parent.parent.name
-    df["iter"] = Path(tick_file).resolve().parent.parent.parent.name[-1]
-    df["farm_count"] = Path(tick_file).resolve().parent.parent.parent.parent.name
+    df["node"] = meta["node"]
+    df["version"] = f"version_{meta['version']}"
+    df["iter"] = meta["trial"]
+    df["farm_count"] = meta["farm_count"]
 
     dfs.append(df)
 df = pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,69 @@
+"""Cross-campaign results database.
+
+Ingests campaign directories into one SQLite file of per-trial summaries (see
+`yardstick_benchmark.results.ResultsDB`), and answers trend and regression
+queries across campaigns without reading the raw CSV files.
+
+Usage:
+    python results_db.py ingest CAMPAIGN_DIR [CAMPAIGN_DIR ...]
+    python results_db.py campaigns
+    python results_db.py trend [--metric tick_ms] [--q 0.95] VERSION FARM_COUNT
+    python results_db.py compare [--metric tick_ms] [--q 0.95] [--threshold 0.1]
+        BASELINE CANDIDATE
+"""
+
+from yardstick_benchmark.results import ResultsDB
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--db", default=f"/var/scratch/{os.getlogin()}/yardstick/results.sqlite"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest")
+    ingest.add_argument("campaign_dirs", nargs="+")
+    commands.add_parser("campaigns")
+    trend = commands.add_parser("trend")
+    trend.add_argument("version")
+    trend.add_argument("farm_count", type=int)
+    compare = commands.add_parser("compare")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.1)
+    for p in (trend, compare):
+        p.add_argument("--metric", default="tick_ms")
+        p.add_argument("--q", type=float, default=0.95)
+    args = parser.parse_args()
+
+    with ResultsDB(args.db) as db:
+        start = time.perf_counter()
+        if args.command == "ingest":
+            for campaign_dir in args.campaign_dirs:
+                trials = db.ingest(campaign_dir)
+                print(f"Ingested {trials} trials from {campaign_dir}")
+        elif args.command == "campaigns":
+            for campaign in db.campaigns():
+                print(campaign)
+        elif args.command == "trend":
+            for campaign, trials, value in db.trend(
+                args.metric, args.version, args.farm_count, args.q
+            ):
+                print(f"{campaign}: {value:.2f} ({trials} trials)")
+        else:
+            for c in db.compare(
+                args.metric, args.baseline, args.candidate, args.q, args.threshold
+            ):
+                print(
+                    f"{c.version} farms={c.farm_count}: {c.baseline:.2f} -> "
+                    f"{c.candidate:.2f} ({c.change:+.1%})"
+                    + (" REGRESSION" if c.regressed else "")
+                )
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,96 @@
 from yardstick_benchmark.model import Node, RemoteAction
+from yardstick_benchmark.catalog import write_catalog
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+import tarfile
+import time
 
+# File name patterns fetched by each profile of `fetch`. Profiles other than
+# "all" skip dependencies such as `node_modules`, server JARs and worlds.
+FETCH_PROFILES: dict[str, Optional[list[str]]] = {
+    "metrics": ["*.csv", "*.json", "*.jfr"],
+    "logs": ["*.csv", "*.json", "*.jfr", "*.log"],
+    "all": None,
+}
+_FETCH_EXCLUDE = ["*/node_modules/*"]
 
-def fetch(dest: Path, nodes: list[Node]):
+
+@dataclass(frozen=True)
+class FetchReport(object):
+    profile: str
+    nodes: int
+    bytes_transferred: int
+    bytes_stored: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f"fetched {self.nodes} nodes ({self.profile}): "
+            f"{self.bytes_transferred / 1e6:.1f} MB transferred, "
+            f"{self.bytes_stored / 1e6:.1f} MB stored in {self.seconds:.1f}s"
+        )
+
+
+def _size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def fetch(dest: Path, nodes: list[Node], profile: str = "all") -> FetchReport:
+    """Copy the output of all nodes to `dest`, fetching from all nodes at once.
+
+    Args:
+        dest (Path): Directory to copy to; each node's files end up under
+            `dest/<host>/`
+        nodes (list[Node]): The nodes to fetch from
+        profile (str): "metrics" fetches CSV and JSON output and JFR
+            recordings, "logs" also
+            fetches log files, and "all" fetches each node's whole working
+            directory. The first two are packed into one gzip-compressed
+            archive per node before the transfer and unpacked in `dest`.
+
+    The fetched files are listed, with their kind, size and checksum, in
+    `dest/catalog.json` (see `yardstick_benchmark.catalog`).
+    """
+    if profile not in FETCH_PROFILES:
+        raise ValueError(f"unknown fetch profile '{profile}'")
     dest.mkdir(parents=True, exist_ok=True)
-    return RemoteAction(
+    extravars = {"dest": str(dest)}
+    if FETCH_PROFILES[profile] is not None:
+        extravars["fetch_include"] = FETCH_PROFILES[profile]
+        extravars["fetch_exclude"] = _FETCH_EXCLUDE
+    before = _size(dest)
+    start = time.monotonic()
+    RemoteAction(
         "fetch",
         nodes,
         Path(__file__).parent / "fetch.yml",
-        extravars={"dest": str(dest)},
+        envvars={"ANSIBLE_FORKS": str(max(5, len(nodes)))},
+        extravars=extravars,
     ).run()
+    transferred = 0
+    for archive in dest.glob("fetch-*.tar.gz"):
+        transferred += archive.stat().st_size
+        with tarfile.open(archive) as tar:
+            # The archives come from the nodes: refuse absolute paths, links
+            # out of `dest` and special files where Python can check for them.
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(dest, filter="data")
+            else:
+                tar.extractall(dest)
+        archive.unlink()
+    # List what was fetched, so analysis does not have to search for it.
+    write_catalog(dest, [n.host for n in nodes], [n.wd.name for n in nodes])
+    stored = _size(dest) - before
+    report = FetchReport(
+        profile,
+        len(nodes),
+        transferred if FETCH_PROFILES[profile] is not None else stored,
+        stored,
+        time.monotonic() - start,
+    )
+    print(report)
+    return report
 
 
 def clean(nodes: list[Node]):
@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib import request
+import fcntl
+import hashlib
+import os
+import shutil
+
+
+@dataclass(frozen=True)
+class Artifact(object):
+    name: str
+    path: Path
+    key: str
+
+    def extravar(self) -> dict:
+        """Describe the artifact for `push_artifact.yml`."""
+        return {"name": self.name, "src": str(self.path), "key": self.key}
+
+
+def _digest(path: Path, algorithm: str) -> str:
+    h = hashlib.new(algorithm)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactCache(object):
+    """Controller-side, content-addressed cache for downloaded artifacts such
+    as server JARs and agents.
+
+    Artifacts with a known SHA-1 are stored under `sha1/<digest>/<name>` and
+    verified against that digest. Other artifacts are keyed by their URL and
+    verified against the SHA-256 recorded when they were first downloaded.
+    Deployment scripts push cached artifacts to the node-level cache
+    (`node_cache`) using `push_artifact.yml`, so each artifact is downloaded
+    from the internet once per controller instead of once per trial.
+    """
+
+    PUSH_TASKS = Path(__file__).parent / "push_artifact.yml"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, url: str, name: str, sha1: Optional[str]) -> str:
+        if sha1 is not None:
+            return f"sha1/{sha1}/{name}"
+        return f"url/{hashlib.sha256(url.encode()).hexdigest()[:16]}/{name}"
+
+    def _verify(self, path: Path, sha1: Optional[str]) -> bool:
+        if not path.is_file():
+            return False
+        if sha1 is not None:
+            return _digest(path, "sha1") == sha1
+        recorded = path.with_name(path.name + ".sha256")
+        return recorded.is_file() and recorded.read_text() == _digest(path, "sha256")
+
+    def fetch(self, url: str, name: str, sha1: Optional[str] = None) -> Artifact:
+        """Return the cached artifact for `url`, downloading it on a miss.
+
+        Args:
+            url (str): Where to download the artifact from
+            name (str): File name of the artifact
+            sha1 (Optional[str]): Expected SHA-1 digest of the artifact, if known
+
+        Raises:
+            ValueError: If the downloaded file does not match `sha1`
+        """
+        key = self._key(url, name, sha1)
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent trials wait for a single download instead of racing.
+        with open(path.parent / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self._verify(path, sha1):
+                self.hits += 1
+                print(f"artifact cache hit: {name} ({key})")
+                return Artifact(name, path, key)
+
+            self.misses += 1
+            print(f"artifact cache miss: {name}, downloading {url}")
+            tmp = path.with_name(path.name + ".part")
+            with request.urlopen(url) as resp, tmp.open("wb") as f:
+                shutil.copyfileobj(resp, f)
+            if sha1 is not None and _digest(tmp, "sha1") != sha1:
+                tmp.unlink()
+                raise ValueError(f"{url} does not match expected sha1 {sha1}")
+            os.replace(tmp, path)
+            if sha1 is None:
+                path.with_name(path.name + ".sha256").write_text(
+                    _digest(path, "sha256")
+                )
+        return Artifact(name, path, key)
+
+    def lookup(self, key: str) -> Artifact:
+        """Return the entry for an artifact that deployment scripts build
+        themselves, such as dependency bundles. The entry may not exist yet,
+        in which case the deployment script is expected to create it at
+        `Artifact.path`; the lookup is counted as a hit or miss either way."""
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.is_file():
+            self.hits += 1
+            print(f"artifact cache hit: {key}")
+        else:
+            self.misses += 1
+            print(f"artifact cache miss: {key}, it will be built during deployment")
+        return Artifact(path.name, path, key)
+
+    def find(self, key: str) -> Optional[Artifact]:
+        """Return the entry for `key` if it exists, None otherwise. Unlike
+        `lookup`, this is meant for optional artifacts and is not logged or
+        counted as a hit or miss."""
+        path = self.root / key
+        if not path.is_file():
+            return None
+        return Artifact(path.name, path, key)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f"artifact cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+import fcntl
+import hashlib
+import json
+import os
+import time
+
+# Written by `yardstick_benchmark.fetch` in every directory it fetches to.
+CATALOG = "catalog.json"
+# Appended to by the campaign runner for every finished trial.
+CAMPAIGN_CATALOG = "catalog.jsonl"
+
+
+def file_kind(name: str, host: str) -> str:
+    """The kind of an output file, its name without the host and what
+    follows it and without the extension, e.g. `client` for
+    `client-node301-4.csv`, `metrics` for `metrics-node301.csv` and `cpu` for
+    `cpu.csv`."""
+    stem = name.split(".", 1)[0]
+    i = stem.find(f"-{host}")
+    return stem[:i] if i > 0 else stem
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_entry(dest: Path, path: Path, host: str) -> dict:
+    """Catalog entry of `path`, a file fetched from `host` to `dest`."""
+    return {
+        "path": str(path.relative_to(dest)),
+        "node": host,
+        "kind": file_kind(path.name, host),
+        "size": path.stat().st_size,
+        "sha256": _sha256(path),
+    }
+
+
+def write_catalog(dest: Path, hosts: list[str], node_dirs: list[str]) -> dict:
+    """List the files fetched to `dest` from each host, whose output is in
+    `dest/<node_dir>`, in `dest/catalog.json`, replacing an earlier catalog.
+    The catalog is replaced atomically."""
+    dest = Path(dest)
+    files = []
+    for host, node_dir in zip(hosts, node_dirs):
+        for path in sorted((dest / node_dir).rglob("*")):
+            if path.is_file():
+                files.append(file_entry(dest, path, host))
+    catalog = {"fetched": time.time(), "files": files}
+    tmp = dest / (CATALOG + ".tmp")
+    with tmp.open("w") as f:
+        json.dump(catalog, f)
+    os.replace(tmp, dest / CATALOG)
+    return catalog
+
+
+def read_catalog(dest: Path) -> Optional[dict]:
+    """The catalog of the files fetched to `dest`, None if there is none."""
+    try:
+        return json.loads((Path(dest) / CATALOG).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def add_files(root: Path, entries: list[dict]):
+    """Append entries to the campaign catalog of `root`. Several trials may
+    finish at once, so the catalog is locked while writing."""
+    with open(Path(root) / CAMPAIGN_CATALOG, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.writelines(json.dumps(e) + "\n" for e in entries)
+        f.flush()
+
+
+def register_trial(root: Path, dest: Path, **metadata):
+    """Add the files fetched to the trial directory `dest` to the catalog of
+    the campaign in `root`, with the trial's `metadata` (version, farm_count,
+    trial).
+
+    Raises:
+        FileNotFoundError: If nothing was fetched to `dest`
+    """
+    catalog = read_catalog(dest)
+    if catalog is None:
+        raise FileNotFoundError(f"no {CATALOG} in {dest}")
+    trial_dir = str(Path(dest).resolve().relative_to(Path(root).resolve()))
+    add_files(
+        root,
+        [
+            {"trial_dir": trial_dir, "fetched": catalog["fetched"], **metadata, **f}
+            for f in catalog["files"]
+        ],
+    )
+
+
+class CampaignCatalog(object):
+    """The files of a campaign by kind, read from its `catalog.jsonl`.
+
+    A trial that was fetched again replaces all entries of its earlier
+    fetches, and an entry added again for the same file replaces the earlier
+    one.
+
+    Args:
+        root (Path): The campaign directory
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        latest = {}
+        entries = {}
+        with open(self.root / CAMPAIGN_CATALOG) as f:
+            for line in f:
+                e = json.loads(line)
+                latest[e["trial_dir"]] = max(latest.get(e["trial_dir"], 0), e["fetched"])
+                entries[(e["trial_dir"], e["path"])] = e
+        self.by_kind: dict[str, list[dict]] = defaultdict(list)
+        for e in entries.values():
+            if e["fetched"] == latest[e["trial_dir"]]:
+                self.by_kind[e["kind"]].append(e)
+
+    @classmethod
+    def load(cls, root: Path) -> Optional["CampaignCatalog"]:
+        """The catalog of the campaign in `root`, None if it has none."""
+        if not (Path(root) / CAMPAIGN_CATALOG).is_file():
+            return None
+        return cls(root)
+
+    def path(self, entry: dict) -> Path:
+        return self.root / entry["trial_dir"] / entry["path"]
+
+    def files(self, kind: str) -> list[dict]:
+        """The entries of all files of `kind`, e.g. "cpu" or "client"."""
+        return self.by_kind.get(kind, [])
+
+    def trial_dirs(self) -> list[Path]:
+        return sorted({self.root / e["trial_dir"] for es in self.by_kind.values() for e in es})
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""A local stand-in for the DAS `preserve` reservation tool.
+
+Implements the subset of the `preserve` command line used by
+`yardstick_benchmark.provisioning.Das` (`-np N -t T`, `-llist` and `-c N`),
+backed by a JSON state file so that concurrent invocations from many
+processes or threads observe one simulated cluster.
+
+The simulated cluster is configured through environment variables:
+
+- FAKE_PRESERVE_STATE: path of the state file
+  (default: `<tmpdir>/fake-preserve-<uid>.json`)
+- FAKE_PRESERVE_NODES: number of nodes in the cluster (default: 16)
+- FAKE_PRESERVE_DELAY: minimum queueing delay in seconds before a reservation
+  can start (default: 1.0)
+- FAKE_PRESERVE_FAILURE_RATE: failures per node per second; a failed node
+  terminates the reservation that holds it (default: 0)
+- FAKE_PRESERVE_REPAIR: seconds a failed node stays unavailable (default: 30)
+- FAKE_PRESERVE_SEED: seed for the failure model (default: random)
+
+Usage:
+    python -m yardstick_benchmark.fake_preserve -np 2 -t 900
+    python -m yardstick_benchmark.fake_preserve -llist
+    python -m yardstick_benchmark.fake_preserve -c 1
+"""
+
+import fcntl
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+def _state_path() -> Path:
+    default = Path(tempfile.gettempdir()) / f"fake-preserve-{os.getuid()}.json"
+    return Path(os.environ.get("FAKE_PRESERVE_STATE", default))
+
+
+def _config() -> dict:
+    return {
+        "nodes": int(os.environ.get("FAKE_PRESERVE_NODES", 16)),
+        "delay": float(os.environ.get("FAKE_PRESERVE_DELAY", 1.0)),
+        "failure_rate": float(os.environ.get("FAKE_PRESERVE_FAILURE_RATE", 0)),
+        "repair": float(os.environ.get("FAKE_PRESERVE_REPAIR", 30)),
+        "seed": os.environ.get("FAKE_PRESERVE_SEED"),
+    }
+
+
+def _empty_state(config: dict, now: float) -> dict:
+    return {
+        "next_id": 1,
+        "updated": now,
+        "steps": 0,
+        "nodes": {f"node{i:03d}": 0.0 for i in range(1, config["nodes"] + 1)},
+        "reservations": [],
+    }
+
+
+@contextmanager
+def locked_state():
+    """Load the simulated cluster state under an exclusive lock and write it
+    back when the block exits without raising."""
+    path = _state_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        now = time.time()
+        config = _config()
+        if path.is_file() and path.stat().st_size > 0:
+            state = json.loads(path.read_text())
+        else:
+            state = _empty_state(config, now)
+        advance(state, config, now)
+        yield state
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, path)
+
+
+def advance(state: dict, config: dict, now: float) -> None:
+    """Bring the simulated cluster forward to `now`: fail nodes, expire
+    reservations and start pending reservations in FIFO order."""
+    dt = max(0.0, now - state["updated"])
+    state["updated"] = now
+    state["steps"] += 1
+    seed = config["seed"]
+    rng = random.Random(f"{seed}-{state['steps']}" if seed is not None else None)
+
+    remaining = []
+    for r in state["reservations"]:
+        if r["state"] == "R":
+            if now >= r["start"] + r["time_s"]:
+                # Reservation expired, its nodes return to the pool.
+                continue
+            p_fail = 1 - math.exp(-config["failure_rate"] * len(r["hosts"]) * dt)
+            if rng.random() < p_fail:
+                failed = rng.choice(r["hosts"])
+                state["nodes"][failed] = now + config["repair"]
+                continue
+        remaining.append(r)
+    state["reservations"] = remaining
+
+    busy = {h for r in remaining if r["state"] == "R" for h in r["hosts"]}
+    free = sorted(
+        h for h, down_until in state["nodes"].items()
+        if h not in busy and down_until <= now
+    )
+    for r in remaining:
+        if r["state"] != "PD":
+            continue
+        if now < r["submitted"] + config["delay"] or len(free) < r["num"]:
+            # Strict FIFO: a blocked head-of-queue holds back later requests.
+            break
+        r["hosts"], free = free[: r["num"]], free[r["num"] :]
+        r["state"] = "R"
+        r["start"] = now
+
+
+def reserve(num: int, time_s: int) -> int:
+    with locked_state() as state:
+        if num > len(state["nodes"]):
+            raise SystemExit(
+                f"preserve: requested {num} nodes, cluster has {len(state['nodes'])}"
+            )
+        number = state["next_id"]
+        state["next_id"] += 1
+        state["reservations"].append(
+            {
+                "id": number,
+                "num": num,
+                "time_s": time_s,
+                "submitted": time.time(),
+                "start": None,
+                "state": "PD",
+                "hosts": [],
+            }
+        )
+    return number
+
+
+def cancel(number: int) -> None:
+    with locked_state() as state:
+        state["reservations"] = [
+            r for r in state["reservations"] if r["id"] != number
+        ]
+
+
+def llist() -> str:
+    user = os.environ.get("USER", "yardstick")
+    with locked_state() as state:
+        lines = [
+            f"{datetime.now():%a %b %d %H:%M:%S %Y}",
+            "",
+            "id\tuser\tstart\t\tstop\t\tstate\tnhosts\thosts",
+        ]
+        for r in state["reservations"]:
+            start = r["start"] if r["start"] is not None else r["submitted"]
+            stop = start + r["time_s"]
+            hosts = " ".join(r["hosts"]) if r["hosts"] else "-"
+            lines.append(
+                f"{r['id']}\t{user}\t{datetime.fromtimestamp(start):%m/%d %H:%M:%S}\t"
+                f"{datetime.fromtimestamp(stop):%m/%d %H:%M:%S}\t"
+                f"{r['state']}\t{r['num']}\t{hosts}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["-llist"]:
+        print(llist())
+    elif argv[:1] == ["-c"] and len(argv) == 2:
+        cancel(int(argv[1]))
+    elif len(argv) == 4 and argv[0] == "-np" and argv[2] == "-t":
+        print(f"Reservation number {reserve(int(argv[1]), int(argv[3]))}:")
+    else:
+        print(__doc__, file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
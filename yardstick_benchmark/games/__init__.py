@@ -1,37 +1,115 @@
-
-import pkgutil
 import importlib
 from abc import ABC, abstractmethod
+from typing import Optional
+
+# Entry point group through which other packages can add servers and
+# workloads. Entry point names are `<game>.<kind>.<name>`, e.g.
+# `minecraft.server.fabric = my_package.fabric:Fabric`.
+ENTRY_POINT_GROUP = "yardstick_benchmark.games"
+
+# The servers and workloads shipped with Yardstick, as `module:attribute`
+# references so nothing is imported until it is used.
+_REGISTRY: dict[tuple[str, str, str], str] = {
+    ("minecraft", "server", "vanilla"): "yardstick_benchmark.games.minecraft.server.J1164:Java1164",
+    ("minecraft", "server", "papermc"): "yardstick_benchmark.games.minecraft.server:PaperMC",
+    ("minecraft", "workload", "fly"): "yardstick_benchmark.games.minecraft.workload:Fly",
+    ("minecraft", "workload", "chicken_farm"): "yardstick_benchmark.games.minecraft.workload:ChickenFarm",
+}
+_entry_points_loaded = False
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib.metadata import entry_points
+
+    eps = entry_points()
+    # Python < 3.10 returns a dict of groups.
+    if hasattr(eps, "select"):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = eps.get(ENTRY_POINT_GROUP, [])
+    for ep in group:
+        game, kind, name = ep.name.split(".", 2)
+        _REGISTRY.setdefault((game, kind, name), ep.value)
+
+
+def register(game: str, kind: str, name: str, target: str) -> None:
+    """Register a server or workload.
+
+    Args:
+        game (str): The game, e.g. "minecraft"
+        kind (str): "server" or "workload"
+        name (str): The name configurations refer to it by
+        target (str): Where to find the class, as `module:attribute`
+    """
+    if kind not in ("server", "workload"):
+        raise ValueError(f"unknown kind '{kind}'")
+    _REGISTRY[(game, kind, name)] = target
+
+
+def available(
+    game: Optional[str] = None, kind: Optional[str] = None
+) -> list[tuple[str, str, str]]:
+    """The registered `(game, kind, name)` triples, without importing any of
+    them."""
+    _load_entry_points()
+    return sorted(
+        key
+        for key in _REGISTRY
+        if (game is None or key[0] == game) and (kind is None or key[1] == kind)
+    )
+
+
+def resolve(game: str, kind: str, name: str):
+    """Import and return a registered server or workload class."""
+    _load_entry_points()
+    try:
+        target = _REGISTRY[(game, kind, name)]
+    except KeyError:
+        raise ValueError(f"{kind} {name} not found for game {game}") from None
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def validate(config: dict) -> None:
+    """Check that the game, server and workload named in `config` exist,
+    without importing them.
+
+    Raises:
+        ValueError: If one of them is not registered
+    """
+    name = config["name"]
+    if not available(name):
+        raise ValueError(f"game {name} not found")
+    for kind in ("server", "workload"):
+        if (name, kind, config[kind]["name"]) not in _REGISTRY:
+            raise ValueError(f"{kind} {config[kind]['name']} not found")
+
 
 class Game(object):
-    def __init__(self, server: pkgutil.ModuleType, workload: pkgutil.ModuleType):
-        self.workload = workload
-        self.server = server
+    """The server and workload selected by a configuration. Their classes are
+    imported on first access."""
+
+    def __init__(self, name: str, server_name: str, workload_name: str):
+        self.name = name
+        self.server_name = server_name
+        self.workload_name = workload_name
+
+    @property
+    def server(self):
+        return resolve(self.name, "server", self.server_name)
+
+    @property
+    def workload(self):
+        return resolve(self.name, "workload", self.workload_name)
 
 
 def get(config: dict) -> Game:
-    name = config["name"]
-    server_name = config["server"]["name"]
-    workload_name = config["workload"]["name"]
-    servers = pkgutil.iter_modules([f"pamuk/games/{name}/server"])
-    server = None
-    workload = None
-    for s in servers:
-        print(s)
-        if s.name == server_name:
-            server = importlib.import_module(f"pamuk.games.{name}.server.{server_name}")
-            break
-    if server is None:
-        raise ValueError(f"server {server_name} not found")
-    workloads = pkgutil.iter_modules([f"pamuk/games/{name}/workload"])
-    for w in workloads:
-        print(w)
-        if w.name == workload_name:
-            workload = importlib.import_module(f"pamuk.games.{name}.workload.{workload_name}")
-            break
-    if workload is None:
-        raise ValueError(f"workload {workload_name} not found")
-    return Game(server.server(), workload)
+    validate(config)
+    return Game(config["name"], config["server"]["name"], config["workload"]["name"])
 
 
 class Server(ABC):
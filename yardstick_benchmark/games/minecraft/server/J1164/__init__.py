@@ -2,7 +2,9 @@ import json
 from pathlib import Path
 from typing import Dict, List, Union, Optional
 
-from yardstick_benchmark.model import Node, RemoteApplication
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.model import Node
+from yardstick_benchmark.games.minecraft.server import MinecraftServer
 
 
 _VANILLA_VERSION_FILE = Path(__file__).parent / "vanilla_version_urls.json"
@@ -34,12 +36,20 @@ def _select_vanilla_version(version: Union[str , None]) -> Dict[str, str]:
     return chosen
 
 
-class Java1164(RemoteApplication):
-    def __init__(self, nodes: list[Node], version: Optional[str] = None):
+class Java1164(MinecraftServer):
+    def __init__(
+        self,
+        nodes: list[Node],
+        version: Optional[str] = None,
+        cache: Optional[ArtifactCache] = None,
+        world_snapshot: Optional[Path] = None,
+        seed: Optional[str] = None,
+    ):
         version_entry = _select_vanilla_version(version)
 
         super().__init__(
             "vanillamc",
+            "vanilla",
             nodes,
             Path(__file__).parent / "vanilla_deploy.yml",
             Path(__file__).parent / "vanilla_start.yml",
@@ -50,6 +60,10 @@ class Java1164(RemoteApplication):
                 "vanilla_template": str(Path(__file__).parent / "server.properties.j2"),
                 "vanilla_server_url": version_entry["url"],
                 "vanilla_server_jar": version_entry["dest"],
+                "vanilla_server_sha1": version_entry.get("sha1"),
                 "vanilla_version": version_entry["version"],
             },
+            cache=cache,
+            world_snapshot=world_snapshot,
+            seed=seed,
         )
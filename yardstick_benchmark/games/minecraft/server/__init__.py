@@ -1,11 +1,205 @@
-from yardstick_benchmark.model import RemoteApplication, Node
+from yardstick_benchmark.model import RemoteAction, RemoteApplication, Node
+from yardstick_benchmark.cache import ArtifactCache
 import os
 from pathlib import Path
+from typing import Optional
 
+JOLOKIA_AGENT_URL = "https://search.maven.org/remotecontent?filepath=org/jolokia/jolokia-agent-jvm/2.0.3/jolokia-agent-jvm-2.0.3-javaagent.jar"
+JOLOKIA_AGENT_JAR = "jolokia-agent-jvm-2.0.3-javaagent.jar"
 
-class PaperMC(RemoteApplication):
-    def __init__(self, nodes: list[Node]):
+
+class MinecraftServer(RemoteApplication):
+    """Functionality shared by the Minecraft-like servers: deployment from the
+    artifact cache, world snapshots, and startup measurements.
+
+    Subclasses name their playbook variables with `prefix`, e.g.
+    `vanilla_server_url` and `vanilla_server_jar`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prefix: str,
+        nodes: list[Node],
+        deploy_script: Path,
+        start_script: Path,
+        stop_script: Path,
+        cleanup_script: Path,
+        extravars: dict,
+        cache: Optional[ArtifactCache] = None,
+        world_snapshot: Optional[Path] = None,
+        seed: Optional[str] = None,
+    ):
+        extravars = {
+            **extravars,
+            "jolokia_agent_url": JOLOKIA_AGENT_URL,
+            "jolokia_agent_jar": JOLOKIA_AGENT_JAR,
+            "startup_probe_script": str(Path(__file__).parent / "startup_probe.py"),
+            "jfr_summary_script": str(Path(__file__).parent / "jfr_summary.py"),
+            "server_pid_file": f"{{{{ wd }}}}/{name}.pid",
+        }
+        if world_snapshot is not None:
+            extravars["world_snapshot"] = str(world_snapshot)
+        if seed is not None:
+            extravars["level_seed"] = seed
         super().__init__(
+            name,
+            nodes,
+            deploy_script,
+            start_script,
+            stop_script,
+            cleanup_script,
+            extravars=extravars,
+        )
+        self.name = name
+        self.prefix = prefix
+        self.cache = cache
+        self.snapshot_action = RemoteAction(
+            name,
+            nodes,
+            Path(__file__).parent / "world_snapshot.yml",
+            self.envvars,
+            self.extravars,
+            self.inv,
+        )
+        self.jfr_start_action = RemoteAction(
+            name,
+            nodes,
+            Path(__file__).parent / "jfr_start.yml",
+            self.envvars,
+            self.extravars,
+            self.inv,
+        )
+        self.jfr_stop_action = RemoteAction(
+            name,
+            nodes,
+            Path(__file__).parent / "jfr_stop.yml",
+            self.envvars,
+            self.extravars,
+            self.inv,
+        )
+
+    def deploy(self):
+        if self.cache is not None:
+            # Fetch the server JAR and the Jolokia agent through the
+            # controller-side cache and point the deploy script at the copies.
+            p = self.prefix
+            self.extravars[f"{p}_server_artifact"] = self.cache.fetch(
+                self.extravars[f"{p}_server_url"],
+                self.extravars[f"{p}_server_jar"],
+                self.extravars.get(f"{p}_server_sha1"),
+            ).extravar()
+            self.extravars["jolokia_agent_artifact"] = self.cache.fetch(
+                JOLOKIA_AGENT_URL, JOLOKIA_AGENT_JAR
+            ).extravar()
+            self.extravars["push_artifact_tasks"] = str(ArtifactCache.PUSH_TASKS)
+        return super().deploy()
+
+    @property
+    def version(self) -> str:
+        return self.extravars[f"{self.prefix}_version"]
+
+    def pid_file(self, node: Node) -> str:
+        """Path of the file the running server's PID is written to on `node`."""
+        wd = self.inv["all"]["hosts"][node.host]["wd"]
+        return f"{wd}/{self.name}.pid"
+
+    def pregenerated_world_key(self) -> str:
+        """Cache key of the generated world for this server's (version, seed)."""
+        seed = self.extravars.get("level_seed") or "default"
+        return f"worlds/{self.name}/{self.version}/seed-{seed}.tar.gz"
+
+    def use_pregenerated_world(self, cache: ArtifactCache) -> bool:
+        """Deploy the cached generated world for this server's (version, seed),
+        if there is one, so that starting the server skips world generation.
+        Create it with `snapshot_world(cache.root / self.pregenerated_world_key())`.
+        """
+        world = cache.find(self.pregenerated_world_key())
+        if world is None:
+            return False
+        self.extravars["world_snapshot"] = str(world.path)
+        return True
+
+    def measure_startup(self, repetitions: int, fresh_world: bool = False):
+        """Start and stop the (deployed) server `repetitions` times, recording
+        the time-to-ready phases of each start (see `startup_probe.py`) to
+        `startup-times.csv` in the server's working directory.
+
+        Args:
+            repetitions (int): The number of starts to measure
+            fresh_world (bool): Remove the world before every start, so that each
+                start includes world generation. Otherwise only the first start
+                generates the world, unless one was restored from a snapshot.
+        """
+        self.extravars["startup_fresh_world"] = fresh_world
+        try:
+            for run in range(repetitions):
+                self.extravars["startup_run"] = run
+                self.start()
+                self.stop()
+        finally:
+            del self.extravars["startup_run"]
+
+    def start_profiling(self, settings: str = "profile"):
+        """Start a Java Flight Recorder recording in the running server,
+        written to `profile-<host>.jfr` in the server's working directory.
+
+        Args:
+            settings (str): The JFR settings, "default" (about 1% overhead),
+                "profile" (more samples, about 2%) or the path of a `.jfc`
+                file on the controller
+        """
+        self.extravars.pop("jfr_settings_file", None)
+        if settings.endswith(".jfc"):
+            self.extravars["jfr_settings_file"] = str(Path(settings).resolve())
+        else:
+            self.extravars["jfr_settings"] = settings
+        return self.jfr_start_action.run()
+
+    def stop_profiling(self, start: Optional[float] = None, end: Optional[float] = None):
+        """Stop the recording started by `start_profiling`, before stopping the
+        server, and summarise it into hot methods and allocation sites in
+        `jfr-summary-<host>.csv` (see `jfr_summary.py`).
+
+        Args:
+            start (Optional[float]): Only summarise events from this time on,
+                in seconds since the epoch, e.g. the start of the measurement
+                window
+            end (Optional[float]): Only summarise events before this time
+        """
+        for key, value in (("jfr_window_start", start), ("jfr_window_end", end)):
+            self.extravars.pop(key, None)
+            if value is not None:
+                self.extravars[key] = value
+        return self.jfr_stop_action.run()
+
+    def snapshot_world(self, dest: Path):
+        """Archive the world of the (stopped) server on the first node to `dest`
+        on the controller. Deploy a server with `world_snapshot=dest` to start
+        from this world."""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + ".part")
+        self.extravars["world_snapshot_dest"] = str(part)
+        res = self.snapshot_action.run()
+        if part.is_file():
+            os.replace(part, dest)
+        return res
+
+
+class PaperMC(MinecraftServer):
+    def __init__(
+        self,
+        nodes: list[Node],
+        version: str = "1.20.1",
+        build: int = 58,
+        cache: Optional[ArtifactCache] = None,
+        world_snapshot: Optional[Path] = None,
+        seed: Optional[str] = None,
+    ):
+        jar = f"paper-{version}-{build}.jar"
+        super().__init__(
+            "papermc",
             "papermc",
             nodes,
             Path(__file__).parent / "papermc_deploy.yml",
@@ -15,5 +209,11 @@ class PaperMC(RemoteApplication):
             extravars={
                 "hostnames": [n.host for n in nodes],
                 "papermc_template": str(Path(__file__).parent / "server.properties.j2"),
+                "papermc_server_url": f"https://api.papermc.io/v2/projects/paper/versions/{version}/builds/{build}/downloads/{jar}",
+                "papermc_server_jar": jar,
+                "papermc_version": version,
             },
+            cache=cache,
+            world_snapshot=world_snapshot,
+            seed=seed,
         )
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Summarise a Java Flight Recorder recording into hot methods and allocation
+sites.
+
+Run by `jfr_stop.yml` on the server node, which pipes
+
+    jfr print --json --stack-depth 1 --events jdk.ExecutionSample,jdk.ObjectAllocationSample
+
+into this script, and writes one row per method (and allocated class) to the
+output CSV:
+
+    kind,method,object_class,samples,weight_bytes
+
+`kind` is `cpu` for execution samples, where `method` is the method on top of
+the stack, and `alloc` for allocation samples, where `method` allocated
+instances of `object_class` and `weight_bytes` estimates the bytes allocated.
+Only events between `--start` and `--end` (seconds since the epoch) are
+counted, so the warmup can be left out. The recording covers the whole trial
+and the server is still running, so events are parsed one at a time instead
+of loading the whole document.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+import argparse
+import csv
+import json
+import re
+import sys
+
+
+def parse_time(value: str) -> float:
+    """Seconds since the epoch of a JFR timestamp such as
+    `2024-06-09T15:20:25.123456789+02:00`."""
+    value = value.replace("Z", "+00:00")
+    # datetime only handles microseconds.
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+_EVENTS = re.compile(r'"events"\s*:\s*\[')
+_SEPARATOR = re.compile(r"[\s,]*")
+
+
+def iter_events(stream, chunk_size=1 << 16):
+    """Yield the events of `jfr print --json` output read from `stream`, one
+    at a time."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        buf += chunk
+        start = _EVENTS.search(buf)
+        if start is not None:
+            buf = buf[start.end():]
+            break
+        if not chunk:
+            return
+        # The key may be split between chunks.
+        buf = buf[-64:]
+    pos = 0
+    while True:
+        pos = _SEPARATOR.match(buf, pos).end()
+        if buf.startswith("]", pos):
+            return
+        try:
+            event, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # The event is not complete yet.
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield event
+
+
+def top_frame(event: dict) -> Optional[str]:
+    frames = (event["values"].get("stackTrace") or {}).get("frames") or []
+    if not frames:
+        return None
+    method = frames[0]["method"]
+    return f"{method['type']['name'].replace('/', '.')}.{method['name']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--start", type=float, default=None)
+    parser.add_argument("--end", type=float, default=None)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    samples = Counter()
+    weights = Counter()
+    for event in iter_events(sys.stdin):
+        values = event["values"]
+        t = parse_time(values["startTime"])
+        if (args.start is not None and t < args.start) or (args.end is not None and t >= args.end):
+            continue
+        method = top_frame(event)
+        if method is None:
+            continue
+        if event["type"] == "jdk.ExecutionSample":
+            key = ("cpu", method, "")
+        elif event["type"] == "jdk.ObjectAllocationSample":
+            key = ("alloc", method, values["objectClass"]["name"].replace("/", "."))
+            weights[key] += values.get("weight", 0)
+        else:
+            continue
+        samples[key] += 1
+
+    with open(args.out, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["kind", "method", "object_class", "samples", "weight_bytes"])
+        for key, count in samples.most_common():
+            writer.writerow([*key, count, weights[key]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Record the time-to-ready phases of a Minecraft server start.
+
+Started by the server's start script right after launching the JVM. Follows the
+server log and the Jolokia agent, and appends one row per phase to the output
+CSV once the server has ticked for the first time:
+
+    run,phase,timestamp,elapsed_s
+
+Phases:
+    launch         the start script launched the JVM
+    jvm_start      the server wrote its first log line
+    world_load     the server started preparing the level
+    spawn_prepare  the server started preparing the spawn area
+    ready          the server reported `For help, type "help"`
+    first_tick     the Jolokia agent reported the first tick duration
+"""
+
+from urllib import request
+import argparse
+import json
+import os
+import re
+import time
+
+PERIOD_S = 0.02
+
+LOG_PHASES = [
+    ("jvm_start", re.compile(r".")),
+    ("world_load", re.compile(r"Preparing level")),
+    ("spawn_prepare", re.compile(r"Preparing start region|Preparing spawn area")),
+    ("ready", re.compile(r'For help, type "help"')),
+]
+
+
+def ticked(url: str) -> bool:
+    data = {"type": "read", "mbean": "net.minecraft.server:type=Server", "attribute": "tickTimes"}
+    r = request.Request(url, data=json.dumps(data).encode("utf-8"))
+    try:
+        with request.urlopen(r, timeout=1) as resp:
+            value = json.loads(resp.read().decode("utf-8")).get("value")
+    except OSError:
+        # The agent or the MBean is not up yet.
+        return False
+    return isinstance(value, list) and any(value)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--run", required=True)
+    parser.add_argument("--launch", type=float, required=True)
+    parser.add_argument("--log", default="logs/latest.log")
+    parser.add_argument("--out", default="startup-times.csv")
+    parser.add_argument("--jolokia", default="http://localhost:8778/jolokia/")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    phases = {"launch": args.launch}
+    pending = list(LOG_PHASES)
+    deadline = time.time() + args.timeout
+    log = None
+    buf = ""
+
+    while time.time() < deadline and "first_tick" not in phases:
+        now = time.time()
+        if pending:
+            if log is None and os.path.exists(args.log):
+                log = open(args.log)
+            if log is not None:
+                buf += log.read()
+                *lines, buf = buf.split("\n")
+                for line in lines:
+                    while pending and pending[0][1].search(line):
+                        phases[pending.pop(0)[0]] = now
+        elif ticked(args.jolokia):
+            phases["first_tick"] = now
+        time.sleep(PERIOD_S)
+
+    write_header = not os.path.exists(args.out)
+    with open(args.out, "a") as f:
+        if write_header:
+            f.write("run,phase,timestamp,elapsed_s\n")
+        for phase, ts in sorted(phases.items(), key=lambda kv: kv[1]):
+            f.write(f"{args.run},{phase},{ts:.3f},{ts - args.launch:.3f}\n")
+
+
+if __name__ == "__main__":
+    main()
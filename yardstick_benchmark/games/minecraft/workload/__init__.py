@@ -1,9 +1,39 @@
-from yardstick_benchmark.model import RemoteApplication, Node
+from yardstick_benchmark.model import RemoteAction, RemoteApplication, Node
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.games.minecraft.workload.schedule import Schedule
 from pathlib import Path
+import hashlib
 import os
+import time
 from datetime import timedelta
 from typing import Optional
 
+_PACKAGE_LOCK = Path(__file__).parent / "package-lock.json"
+_NODE_VERSION = 22
+
+
+def _lookup_node_modules_bundle(cache: ArtifactCache, extravars: dict) -> None:
+    """Point the deploy script at the node_modules bundle for the current
+    package-lock.json, which the deploy script builds on a cache miss."""
+    digest = hashlib.sha256(_PACKAGE_LOCK.read_bytes()).hexdigest()[:16]
+    key = f"node_modules/node{_NODE_VERSION}-{digest}/node_modules.tar.gz"
+    extravars["node_modules_bundle"] = cache.lookup(key).extravar()
+
+
+def _shard_players(hosts: list[str], player_count: int) -> dict:
+    """Split `player_count` bots over `hosts` as evenly as possible.
+
+    Returns a mapping from host to `[first_bot_index, bot_count]`; bot indices
+    are unique across all hosts and the first host runs bot 0.
+    """
+    shards = {}
+    start = 0
+    for i, host in enumerate(hosts):
+        count = player_count // len(hosts) + (1 if i < player_count % len(hosts) else 0)
+        shards[host] = [start, count]
+        start += count
+    return shards
+
 
 class Fly(RemoteApplication):
     def __init__(
@@ -14,7 +44,22 @@ class Fly(RemoteApplication):
         spawn_x: int = 0,
         spawn_y: int = 0,
         workload_variant: str = "fly",
+        cache: Optional[ArtifactCache] = None,
+        player_count: Optional[int] = None,
+        schedule: Optional[Schedule] = None,
     ):
+        """Run the flying workload.
+
+        Args:
+            player_count (Optional[int]): Total number of bots, spread evenly
+                over `nodes`. Defaults to 20 bots per node, or the number of
+                bots in `schedule`.
+            schedule (Optional[Schedule]): When bots join and leave. Defaults to
+                `Schedule.waves(player_count)`.
+        """
+        if schedule is not None:
+            player_count = player_count or schedule.player_count
+        player_count = player_count or 20 * len(nodes)
         super().__init__(
             "walkaround",
             nodes,
@@ -26,6 +71,8 @@ class Fly(RemoteApplication):
                 "hostnames": [n.host for n in nodes],
                 "scripts": [
                     str(Path(__file__).parent / "set_spawn.js"),
+                    str(Path(__file__).parent / "players.js"),
+                    str(Path(__file__).parent / "client_metrics.js"),
                     str(Path(__file__).parent / "bot.js"),
                     str(Path(__file__).parent / "package.json"),
                     str(Path(__file__).parent / "package-lock.json"),
@@ -35,8 +82,21 @@ class Fly(RemoteApplication):
                 "spawn_x": spawn_x,
                 "spawn_y": spawn_y,
                 "workload_variant": workload_variant,
+                "player_count": player_count,
+                "bot_shards": _shard_players([n.host for n in nodes], player_count),
             },
         )
+        self.cache = cache
+        self.schedule = schedule or Schedule.waves(player_count)
+
+    def deploy(self):
+        if self.cache is not None:
+            _lookup_node_modules_bundle(self.cache, self.extravars)
+        return super().deploy()
+
+    def start(self):
+        self.extravars["arrival_schedule"] = self.schedule.extravar(time.time())
+        return super().start()
 
 
 class ChickenFarm(RemoteApplication):
@@ -48,7 +108,39 @@ class ChickenFarm(RemoteApplication):
         spawn_x: int = 0,
         spawn_y: int = 0,
         player_count: Optional[int] = None,
+        cache: Optional[ArtifactCache] = None,
+        world_mode: str = "build",
+        bots_per_process: int = 10,
+        schedule: Optional[Schedule] = None,
     ):
+        """Run the chicken farm workload.
+
+        Args:
+            player_count (Optional[int]): Total number of bots and farms, spread
+                evenly over `nodes`. Defaults to one bot per node, or the number
+                of bots in `schedule`.
+            bots_per_process (int): Number of bots driven by one Node.js worker
+                process. Each worker appends its CPU and memory usage to
+                `worker-<host>-<first bot index>.csv`; every bot still logs to
+                `bot-<host>-<index>.log`.
+            schedule (Optional[Schedule]): When bots join and leave. Without a
+                schedule all bots join at the start and stay for `duration`
+                after the farms are ready. The farms are built when bot 0 joins,
+                so schedules where bot 0 joins late are best combined with
+                `world_mode="prebuilt"`.
+            world_mode (str): "build" lets bot 0 build the farms at the start of
+                the trial. "snapshot" does the same and flushes the world to disk
+                afterwards, so the server's world can be archived with
+                `snapshot_world`. "prebuilt" skips building, for servers deployed
+                with a world snapshot.
+        """
+        if world_mode not in ("build", "snapshot", "prebuilt"):
+            raise ValueError(f"unknown world mode '{world_mode}'")
+        if bots_per_process < 1:
+            raise ValueError("bots_per_process must be at least 1")
+        if schedule is not None:
+            player_count = player_count or schedule.player_count
+        player_count = player_count or len(nodes)
         super().__init__(
             "chickenfarm",
             nodes,
@@ -60,6 +152,9 @@ class ChickenFarm(RemoteApplication):
                 "hostnames": [n.host for n in nodes],
                 "scripts": [
                     str(Path(__file__).parent / "set_spawn.js"),
+                    str(Path(__file__).parent / "players.js"),
+                    str(Path(__file__).parent / "client_metrics.js"),
+                    str(Path(__file__).parent / "rcon.js"),
                     str(Path(__file__).parent / "chicken_farm.js"),
                     str(Path(__file__).parent / "package.json"),
                     str(Path(__file__).parent / "package-lock.json"),
@@ -68,7 +163,56 @@ class ChickenFarm(RemoteApplication):
                 "mc_host": server_host,
                 "spawn_x": spawn_x,
                 "spawn_y": spawn_y,
-                "player_count": player_count or len(nodes),
+                "player_count": player_count,
+                "bot_shards": _shard_players([n.host for n in nodes], player_count),
                 "workload_variant": "chicken_farm",
+                "world_mode": world_mode,
+                "bots_per_process": bots_per_process,
             },
         )
+        self.cache = cache
+        self.schedule = schedule
+        self.wait_action = RemoteAction(
+            "chickenfarm",
+            nodes,
+            Path(__file__).parent / "chicken_farm_wait.yml",
+            self.envvars,
+            self.extravars,
+            self.inv,
+        )
+
+    @staticmethod
+    def world_snapshot_key(
+        server_version: str, player_count: int, spawn_x: int = 0, spawn_y: int = 0
+    ) -> str:
+        """Cache key of the world snapshot for a farm layout."""
+        return (
+            f"worlds/chicken_farm/{server_version}/"
+            f"players{player_count}-x{spawn_x}-z{spawn_y}.tar.gz"
+        )
+
+    def pid_files(self, node: Node) -> list[str]:
+        """Paths of the files the PIDs of the bot workers on `node` are written
+        to, one per worker of `bots_per_process` bots."""
+        wd = self.inv["all"]["hosts"][node.host]["wd"]
+        start, count = self.extravars["bot_shards"][node.host]
+        step = self.extravars["bots_per_process"]
+        return [
+            f"{wd}/bot-{node.host}-worker{i}.pid"
+            for i in range(start, start + count, step)
+        ]
+
+    def wait_until_built(self, timeout: timedelta = timedelta(minutes=20)):
+        """Block until bot 0 has finished building the farms."""
+        self.extravars["build_timeout"] = int(timeout.total_seconds())
+        return self.wait_action.run()
+
+    def deploy(self):
+        if self.cache is not None:
+            _lookup_node_modules_bundle(self.cache, self.extravars)
+        return super().deploy()
+
+    def start(self):
+        if self.schedule is not None:
+            self.extravars["arrival_schedule"] = self.schedule.extravar(time.time())
+        return super().start()
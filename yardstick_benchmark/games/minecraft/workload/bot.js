@@ -1,18 +1,28 @@
 // @ts-check
 import mineflayer from "mineflayer";
 import v from "vec3";
+import { PlayerEvents, loadSchedule, msUntilJoin, msUntilLeave } from "./players.js";
+import { recordClientMetrics } from "./client_metrics.js";
 
 const host = process.env.MC_HOST ?? "localhost";
 // Time (seconds) after which the script will be terminated
 const timeout = parseInt(process.env.DURATION ?? "200");
 const variant = process.env.WORKLOAD_VARIANT ?? "fly";
+// This node runs bots BOT_INDEX .. BOT_INDEX + BOT_COUNT - 1 out of PLAYER_COUNT.
+const firstBot = parseInt(process.env.BOT_INDEX ?? "0");
+const botCount = parseInt(process.env.BOT_COUNT ?? "20");
+const playerCount = parseInt(process.env.PLAYER_COUNT ?? "20");
+// Without an arrival schedule, all bots of this node join at once.
+const schedule = loadSchedule();
+const playerEvents = new PlayerEvents(process.env.PLAYER_EVENTS);
 
 class Bot {
     /**
      * @param {string} host
      * @param {string} username
+     * @param {number} index
      */
-    constructor(host, username) {
+    constructor(host, username, index) {
         console.log(`New bot: ${username}`);
         this.username = username;
         this.bot = mineflayer.createBot({
@@ -22,6 +32,16 @@ class Bot {
         });
         this.bot.on("error", console.error);
         this.bot.on("kicked", console.log);
+        this.leaving = false;
+        this.bot.once("spawn", () => {
+            playerEvents.log(username, "join");
+            recordClientMetrics(this.bot, index);
+        });
+        this.bot.once("end", () => {
+            if (!this.leaving) {
+                playerEvents.log(username, "disconnect");
+            }
+        });
         setInterval(() => {
             console.log(`${username} at ${this.bot.entity?.position}`);
         }, 5000);
@@ -55,6 +75,15 @@ class Bot {
         this.bot.chat(`/teleport ${from.x} ${from.y} ${from.z}`);
         await this.bot.creative.flyTo(to);
     }
+
+    /**
+     * Leave the game.
+     */
+    quit() {
+        this.leaving = true;
+        playerEvents.log(this.username, "leave");
+        this.bot.quit();
+    }
 }
 
 class Botnet {
@@ -67,21 +96,23 @@ class Botnet {
     }
 
     /**
-     * @param {number} index Bot index between 0 and 19 (inclusive)
+     * @param {number} index Bot index between 0 and PLAYER_COUNT - 1 (inclusive)
      */
     static coordinatesFromAngle(index) {
-        const angle = (index / 20) * 2 * Math.PI;
+        const angle = (index / playerCount) * 2 * Math.PI;
         return v(Math.cos(angle), 90, Math.sin(angle));
     }
 
     async flyWorkload() {
-        for (let i = 0; i < 20; i++) {
-            if (i === 5 || i === 10) {
-                await sleep(60_000);
-            }
-            const bot = new Bot(this.host, `bot-${i}`);
+        for (let i = firstBot; i < firstBot + botCount; i++) {
+            await sleep(msUntilJoin(schedule, i));
+            const bot = new Bot(this.host, `bot-${i}`, i);
             this.bots.push(bot);
             bot.flyWorkload(i);
+            const leaveMs = msUntilLeave(schedule, i);
+            if (leaveMs !== null) {
+                setTimeout(() => bot.quit(), leaveMs);
+            }
         }
     }
 }
@@ -1,14 +1,39 @@
 // @ts-check
+import fs from "node:fs";
+import os from "node:os";
+import { Console } from "node:console";
 import mineflayer from "mineflayer";
 import v from "vec3";
-import rconPkg from "rcon-srcds";
+import { PipelinedRcon } from "./rcon.js";
+import { PlayerEvents, loadSchedule, msUntilJoin, msUntilLeave } from "./players.js";
+import { recordClientMetrics } from "./client_metrics.js";
 
 const host = process.env.MC_HOST ?? "localhost";
 const timeout = numberFromEnv("DURATION", 60);
-const botIndex = numberFromEnv("BOT_INDEX", 0);
+// This process drives bots BOT_INDEX .. BOT_INDEX + BOT_COUNT - 1.
+const firstBot = numberFromEnv("BOT_INDEX", 0);
+const botCount = Math.max(1, numberFromEnv("BOT_COUNT", 1));
 const playerCount = Math.max(1, numberFromEnv("PLAYER_COUNT", 1));
 const spawnX = numberFromEnv("SPAWN_X", 0);
 const spawnZ = numberFromEnv("SPAWN_Y", 0);
+// "build": bot 0 builds the farms, "snapshot": bot 0 builds the farms and
+// flushes the world to disk so it can be archived, "prebuilt": the farms were
+// restored from a world snapshot and nobody builds.
+const worldMode = process.env.WORLD_MODE ?? "build";
+// Each bot logs to `${BOT_LOG_PREFIX}-${index}.log`; without a prefix all bots
+// log to the process output.
+const logPrefix = process.env.BOT_LOG_PREFIX;
+// CPU and memory usage of this process are appended to WORKER_STATS every
+// STATS_INTERVAL_MS.
+const statsPath = process.env.WORKER_STATS;
+const statsIntervalMs = numberFromEnv("STATS_INTERVAL_MS", 1000);
+// The builder appends the duration of each world setup step to SETUP_TIMES.
+const setupTimesPath = process.env.SETUP_TIMES;
+// Without an arrival schedule, the bots of this process join JOIN_INTERVAL_MS
+// apart, so the server does not see a burst of logins.
+const joinIntervalMs = numberFromEnv("JOIN_INTERVAL_MS", 250);
+const schedule = loadSchedule();
+const playerEvents = new PlayerEvents(process.env.PLAYER_EVENTS);
 
 // Blueprint dims (from provided NBT)
 const FARM_WIDTH = 7; // x dimension (0..6)
@@ -19,49 +44,179 @@ const FARM_SPACING_Z = 8;
 const CHICKENS_PER_FARM = 8;
 const VIEW_HEIGHT = 10;
 const COMMAND_DELAY_MS = 750; // chat fallback pacing
-const RCON_DELAY_MS = 50; // small gap between RCON commands
+// Largest region a single /fill or /clone may change.
+const MAX_REGION_BLOCKS = 32768;
 const rconPassword = process.env.RCON_PASSWORD ?? "password";
 const rconPort = numberFromEnv("RCON_PORT", 25575);
-const RCON = rconPkg?.default?.default ?? rconPkg?.default ?? rconPkg;
-/** @type {import("rcon-srcds").default | null} */
-let rconClient = null;
-
-const bot = mineflayer.createBot({
-    host,
-    username: `bot-${botIndex}`,
-    port: 25565,
+// Bots of one process share one RCON connection. The vanilla server drops a
+// connection that sends several packets at once, so wait for each response.
+const rconMaxInFlight = numberFromEnv("RCON_MAX_IN_FLIGHT", 1);
+/** @type {Promise<PipelinedRcon | null> | null} */
+let rconConnecting = null;
+let commandsSent = 0;
+
+/** @type {WeakMap<mineflayer.Bot, Console>} */
+const botLogs = new WeakMap();
+let connectedBots = 0;
+
+if (statsPath) {
+    startWorkerStats(statsPath);
+}
+
+const results = await Promise.allSettled(
+    Array.from({ length: botCount }, (_, i) =>
+        sleep(
+            schedule === null ? i * joinIntervalMs : msUntilJoin(schedule, firstBot + i),
+        ).then(() => runBot(firstBot + i)),
+    ),
+);
+results.forEach((result, i) => {
+    if (result.status === "rejected") {
+        console.error(`bot-${firstBot + i} failed: ${result.reason}`);
+    }
 });
-bot.on("error", console.error);
-bot.on("kicked", console.log);
+process.exit(0);
+
+/**
+ * @param {number} botIndex
+ */
+async function runBot(botIndex) {
+    const log = botConsole(botIndex);
+    const bot = mineflayer.createBot({
+        host,
+        username: `bot-${botIndex}`,
+        port: 25565,
+    });
+    botLogs.set(bot, log);
+    bot.on("error", (err) => log.error(err));
+    bot.on("kicked", (reason) => log.log(reason));
+    let leaving = false;
+    bot.once("end", () => {
+        if (!leaving) {
+            playerEvents.log(bot.username, "disconnect");
+        }
+    });
+
+    await onceSpawn(bot);
+    connectedBots++;
+    playerEvents.log(bot.username, "join");
+
+    const groundY =
+        numberFromEnv("GROUND_Y", Math.max(1, Math.floor(bot.entity.position.y) - 1));
+    const farmOrigin = v(spawnX, groundY, spawnZ);
+    const layout = createFarmLayout(playerCount, farmOrigin, groundY);
+    const assignedFarm = Math.min(botIndex, layout.positions.length - 1);
 
-await onceSpawn(bot);
+    if (botIndex === 0 && worldMode !== "prebuilt") {
+        await builderFlow(bot, layout);
+        if (worldMode === "snapshot") {
+            await sendCommand(bot, "/save-all flush");
+        }
+        log.log(`World setup complete (${worldMode}).`);
+    } else {
+        await waitForFarmReady(bot, layout.positions[assignedFarm]);
+    }
 
-const groundY =
-    numberFromEnv("GROUND_Y", Math.max(1, Math.floor(bot.entity.position.y) - 1));
-const farmOrigin = v(spawnX, groundY, spawnZ);
-const layout = createFarmLayout(playerCount, farmOrigin, groundY);
-const assignedFarm = Math.min(botIndex, layout.positions.length - 1);
+    await teleportSpectator(bot, layout.positions[assignedFarm]);
+    // Start probing only once the bot hovers above the farms, so the probe
+    // blocks never touch a farm.
+    recordClientMetrics(bot, botIndex);
 
-if (botIndex === 0) {
-    await builderFlow(bot, layout);
-} else {
-    await waitForFarmReady(bot, layout.positions[assignedFarm]);
+    const stayMs = msUntilLeave(schedule, botIndex) ?? timeout * 1000;
+    log.log(
+        `hi! bot-${botIndex} started chicken farms. Exiting after ${stayMs / 1000} seconds.`,
+    );
+    await sleep(stayMs);
+    leaving = true;
+    playerEvents.log(bot.username, "leave");
+    bot.quit();
+    connectedBots--;
 }
 
-await teleportSpectator(bot, layout.positions[assignedFarm]);
+/**
+ * @param {number} botIndex
+ */
+function botConsole(botIndex) {
+    if (!logPrefix) {
+        return console;
+    }
+    const out = fs.createWriteStream(`${logPrefix}-${botIndex}.log`, { flags: "a" });
+    return new Console({ stdout: out, stderr: out });
+}
 
-console.log(
-    `hi! bot-${botIndex} started chicken farms. Exiting after ${timeout} seconds.`,
-);
-await sleep(timeout * 1000);
-process.exit(0);
+/**
+ * @param {mineflayer.Bot} bot
+ */
+function logOf(bot) {
+    return botLogs.get(bot) ?? console;
+}
+
+/**
+ * Append process and node resource usage to a CSV file.
+ * @param {string} path
+ */
+function startWorkerStats(path) {
+    const exists = fs.existsSync(path);
+    const out = fs.createWriteStream(path, { flags: "a" });
+    if (!exists) {
+        out.write(
+            "timestamp,bots,cpu_user_s,cpu_system_s,rss_bytes,heap_used_bytes,load1,mem_used_bytes\n",
+        );
+    }
+    const sample = () => {
+        const cpu = process.cpuUsage();
+        const mem = process.memoryUsage();
+        out.write(
+            [
+                Date.now(),
+                connectedBots,
+                (cpu.user / 1e6).toFixed(3),
+                (cpu.system / 1e6).toFixed(3),
+                mem.rss,
+                mem.heapUsed,
+                os.loadavg()[0].toFixed(2),
+                os.totalmem() - os.freemem(),
+            ].join(",") + "\n",
+        );
+    };
+    sample();
+    setInterval(sample, statsIntervalMs).unref();
+}
 
 async function builderFlow(bot, farmLayout) {
-    await prepareWorld(bot);
-    await flattenArea(bot, farmLayout);
-    await buildFarm(bot, farmLayout.positions[0]);
-    await cloneFarms(bot, farmLayout);
-    await spawnChickens(bot, farmLayout);
+    const steps = [
+        ["prepare", () => prepareWorld(bot)],
+        ["flatten", () => flattenArea(bot, farmLayout)],
+        ["build", () => buildFarm(bot, farmLayout.positions[0])],
+        ["clone", () => cloneFarms(bot, farmLayout)],
+        ["chickens", () => spawnChickens(bot, farmLayout)],
+    ];
+    /** @type {[string, number, number][]} */
+    const times = [];
+    const setupStart = performance.now();
+    for (const [step, run] of /** @type {[string, () => Promise<void>][]} */ (steps)) {
+        const start = performance.now();
+        const sentBefore = commandsSent;
+        await run();
+        times.push([step, commandsSent - sentBefore, (performance.now() - start) / 1000]);
+    }
+    times.push(["total", commandsSent, (performance.now() - setupStart) / 1000]);
+    for (const [step, commands, seconds] of times) {
+        logOf(bot).log(`setup ${step}: ${commands} commands in ${seconds.toFixed(2)}s`);
+    }
+    if (setupTimesPath) {
+        const exists = fs.existsSync(setupTimesPath);
+        fs.appendFileSync(
+            setupTimesPath,
+            (exists ? "" : "timestamp,farm_count,step,commands,elapsed_s\n") +
+                times
+                    .map(([step, commands, seconds]) =>
+                        [Date.now(), farmLayout.positions.length, step, commands, seconds.toFixed(3)].join(","),
+                    )
+                    .join("\n") +
+                "\n",
+        );
+    }
 }
 
 /**
@@ -76,9 +231,7 @@ async function prepareWorld(bot) {
         "/weather clear",
         `/gamemode creative ${bot.username}`,
     ];
-    for (const cmd of commands) {
-        await sendCommand(bot, cmd);
-    }
+    await sendCommands(bot, commands);
     bot.creative.startFlying();
 }
 
@@ -90,43 +243,157 @@ async function flattenArea(bot, farmLayout) {
     const box = farmsBoundingBox(farmLayout);
     const clearMinY = box.min.y + 1;
     const clearMaxY = box.min.y + FARM_HEIGHT + 3;
-    await sendCommand(
+    const regions = splitRegion(
+        v(box.min.x, clearMinY, box.min.z),
+        v(box.max.x, clearMaxY, box.max.z),
+    );
+    await sendCommands(
         bot,
-        `/fill ${box.min.x} ${clearMinY} ${box.min.z} ${box.max.x} ${clearMaxY} ${box.max.z} air`,
+        regions.map(
+            ({ min, max }) => `/fill ${min.x} ${min.y} ${min.z} ${max.x} ${max.y} ${max.z} air`,
+        ),
     );
 }
 
+/**
+ * Split a region into as few regions as possible that each fit in one
+ * /fill or /clone, by halving the longest side.
+ * @param {import("vec3").Vec3} min
+ * @param {import("vec3").Vec3} max
+ * @returns {{min: import("vec3").Vec3, max: import("vec3").Vec3}[]}
+ */
+function splitRegion(min, max) {
+    const size = max.minus(min).offset(1, 1, 1);
+    if (size.x * size.y * size.z <= MAX_REGION_BLOCKS) {
+        return [{ min, max }];
+    }
+    const axis = size.x >= size.y && size.x >= size.z ? "x" : size.z >= size.y ? "z" : "y";
+    const mid = min[axis] + Math.floor(size[axis] / 2) - 1;
+    const lowMax = max.clone();
+    lowMax[axis] = mid;
+    const highMin = min.clone();
+    highMin[axis] = mid + 1;
+    return [...splitRegion(min, lowMax), ...splitRegion(highMin, max)];
+}
+
 /**
  * @param {mineflayer.Bot} bot
  * @param {import("vec3").Vec3} base
  */
 async function buildFarm(bot, base) {
-    const blocks = blueprintBlocks();
-    for (const blk of blocks) {
-        const worldX = base.x + blk.pos[0];
-        const worldY = base.y + blk.pos[1];
-        const worldZ = base.z + blk.pos[2];
-        const blockString = paletteBlock(blk.state);
-        await sendCommand(bot, `/setblock ${worldX} ${worldY} ${worldZ} ${blockString}`);
+    const commands = blueprintRuns().map(({ from, to, state }) => {
+        const block = paletteBlock(state);
+        const [x0, y0, z0] = [base.x + from[0], base.y + from[1], base.z + from[2]];
+        if (from.every((c, i) => c === to[i])) {
+            return `/setblock ${x0} ${y0} ${z0} ${block}`;
+        }
+        return `/fill ${x0} ${y0} ${z0} ${base.x + to[0]} ${base.y + to[1]} ${base.z + to[2]} ${block}`;
+    });
+    await sendCommands(bot, commands);
+}
+
+/**
+ * The blueprint as straight runs of identical blocks, in blueprint order.
+ * Consecutive blocks of the same state that continue a line become one run.
+ * Air above the ground layer is skipped, since `flattenArea` already cleared
+ * it.
+ */
+function blueprintRuns() {
+    /** @type {{from: number[], to: number[], state: number}[]} */
+    const runs = [];
+    for (const blk of blueprintBlocks()) {
+        if (paletteBlock(blk.state) === "minecraft:air" && blk.pos[1] > 0) {
+            continue;
+        }
+        const last = runs[runs.length - 1];
+        if (last !== undefined && last.state === blk.state) {
+            const step = blk.pos.map((c, i) => c - last.to[i]);
+            const direction = last.to.map((c, i) => c - last.from[i]);
+            const isUnitStep = step.filter((d) => d !== 0).length === 1 && step.every((d) => d === 0 || d === 1);
+            const sameLine = direction.every((d, i) => d === 0 || step[i] === 1);
+            if (isUnitStep && sameLine) {
+                last.to = blk.pos;
+                continue;
+            }
+        }
+        runs.push({ from: blk.pos, to: blk.pos, state: blk.state });
     }
+    return runs;
 }
 
 /**
+ * Copy the first farm to every other position by doubling: each /clone copies
+ * all farms built so far, first along the first row and then row by row, so
+ * the number of commands grows with the logarithm of the farm count.
  * @param {mineflayer.Bot} bot
  * @param {ReturnType<typeof createFarmLayout>} farmLayout
  */
 async function cloneFarms(bot, farmLayout) {
-    if (farmLayout.positions.length < 2) {
+    const { positions, perRow } = farmLayout;
+    if (positions.length < 2) {
         return;
     }
-    const src = farmBoundingBox(farmLayout.positions[0]);
-    for (let i = 1; i < farmLayout.positions.length; i++) {
-        const dest = farmLayout.positions[i];
-        await sendCommand(
-            bot,
-            `/clone ${src.min.x} ${src.min.y} ${src.min.z} ${src.max.x} ${src.max.y} ${src.max.z} ${dest.x} ${dest.y} ${dest.z}`,
-        );
+    /**
+     * The block of `cols` x `rows` farms whose first farm is `from`.
+     * @param {number} cols
+     * @param {number} rows
+     * @param {import("vec3").Vec3} from
+     */
+    const region = (cols, rows, from = positions[0]) => ({
+        min: from,
+        max: from.offset(
+            (cols - 1) * FARM_SPACING_X + FARM_WIDTH - 1,
+            FARM_HEIGHT - 1,
+            (rows - 1) * FARM_SPACING_Z + FARM_DEPTH - 1,
+        ),
+    });
+    /**
+     * Largest n <= `wanted` for which `regionOf(n)` fits in one /clone.
+     * @param {number} wanted
+     * @param {(n: number) => {min: import("vec3").Vec3, max: import("vec3").Vec3}} regionOf
+     */
+    const fitting = (wanted, regionOf) => {
+        let n = wanted;
+        while (n > 1) {
+            const { min, max } = regionOf(n);
+            const size = max.minus(min).offset(1, 1, 1);
+            if (size.x * size.y * size.z <= MAX_REGION_BLOCKS) {
+                break;
+            }
+            n--;
+        }
+        return n;
+    };
+    /**
+     * @param {{min: import("vec3").Vec3, max: import("vec3").Vec3}} src
+     * @param {import("vec3").Vec3} dest
+     */
+    const clone = ({ min, max }, dest) =>
+        `/clone ${min.x} ${min.y} ${min.z} ${max.x} ${max.y} ${max.z} ${dest.x} ${dest.y} ${dest.z}`;
+
+    const firstRow = Math.min(perRow, positions.length);
+    const fullRows = Math.floor(positions.length / perRow);
+    const lastRow = positions.length % perRow;
+    const commands = [];
+    // Each clone reads only farms that earlier clones wrote, so the commands
+    // can be pipelined as long as the server runs them in order.
+    for (let done = 1; done < firstRow; ) {
+        const n = fitting(Math.min(done, firstRow - done), (k) => region(k, 1));
+        commands.push(clone(region(n, 1), positions[done]));
+        done += n;
     }
+    for (let done = 1; done < fullRows; ) {
+        const n = fitting(Math.min(done, fullRows - done), (k) => region(perRow, k));
+        commands.push(clone(region(perRow, n), positions[done * perRow]));
+        done += n;
+    }
+    // A partial last row copies the start of the first row.
+    for (let done = 0; done < lastRow; ) {
+        const n = fitting(lastRow - done, (k) => region(k, 1, positions[done]));
+        commands.push(clone(region(n, 1, positions[done]), positions[fullRows * perRow + done]));
+        done += n;
+    }
+    await sendCommands(bot, commands);
 }
 
 /**
@@ -134,7 +401,7 @@ async function cloneFarms(bot, farmLayout) {
  * @param {ReturnType<typeof createFarmLayout>} farmLayout
  */
 async function spawnChickens(bot, farmLayout) {
-    await sendCommand(bot, "/kill @e[type=minecraft:chicken,distance=..256]");
+    const commands = ["/kill @e[type=minecraft:chicken,distance=..256]"];
     for (const base of farmLayout.positions) {
         const penCenter = v(base.x + 3.5, base.y + 4, base.z + 1.5);
         for (let i = 0; i < CHICKENS_PER_FARM; i++) {
@@ -142,22 +409,20 @@ async function spawnChickens(bot, farmLayout) {
             const offsetZ = Math.floor(i / 2) * 0.6 - 0.3;
             const x = penCenter.x + offsetX;
             const z = penCenter.z + offsetZ;
-            await sendCommand(
-                bot,
+            commands.push(
                 `/summon minecraft:chicken ${x.toFixed(2)} ${penCenter.y} ${z.toFixed(2)} {Age:0,Health:4.0f,IsChickenJockey:0b}`,
             );
         }
         // Seed dispenser with eggs so the loop can fire
-        await sendCommand(
-            bot,
+        commands.push(
             `/data modify block ${base.x + 1} ${base.y + 2} ${base.z} Items set value [{Slot:0b,id:"minecraft:egg",Count:64b},{Slot:1b,id:"minecraft:egg",Count:64b},{Slot:2b,id:"minecraft:egg",Count:64b}]`,
         );
         // Hopper minecart under rails
-        await sendCommand(
-            bot,
+        commands.push(
             `/summon minecraft:hopper_minecart ${base.x + 2.5} ${base.y + 1.0625} ${base.z + 1.5}`,
         );
     }
+    await sendCommands(bot, commands);
 }
 
 /**
@@ -180,7 +445,7 @@ async function waitForFarmReady(bot, base) {
         }
         await sleep(400);
     }
-    console.warn("Timed out waiting for farm structure; proceeding anyway.");
+    logOf(bot).warn("Timed out waiting for farm structure; proceeding anyway.");
 }
 
 /**
@@ -214,19 +479,27 @@ function sleep(ms) {
  * Ensure an RCON connection; fallback is null.
  */
 async function ensureRcon() {
-    if (rconClient !== null) {
-        return rconClient;
+    if (rconConnecting === null) {
+        rconConnecting = connectRcon();
+    }
+    const client = await rconConnecting;
+    if (client === null || !client.connected) {
+        // Reconnect, or fall back to chat, on the next command.
+        rconConnecting = null;
     }
+    return client?.connected ? client : null;
+}
+
+async function connectRcon() {
     try {
-        const client = new RCON({ host, port: rconPort });
-        await client.authenticate(rconPassword);
-        rconClient = client;
+        const client = new PipelinedRcon({ host, port: rconPort, maxInFlight: rconMaxInFlight });
+        await client.connect(rconPassword);
         console.log("RCON connected.");
+        return client;
     } catch (err) {
         console.warn(`RCON unavailable, falling back to chat: ${err}`);
-        rconClient = null;
+        return null;
     }
-    return rconClient;
 }
 
 /**
@@ -431,13 +704,30 @@ function blueprintBlocks() {
  * @param {string} command
  */
 async function sendCommand(bot, command) {
+    await sendCommands(bot, [command]);
+}
+
+/**
+ * Run commands in order. Over RCON they are queued on the shared connection;
+ * the chat fallback sends them one by one.
+ * @param {mineflayer.Bot} bot
+ * @param {string[]} commands
+ */
+async function sendCommands(bot, commands) {
     const client = await ensureRcon();
+    const log = logOf(bot);
+    commandsSent += commands.length;
     if (client) {
-        console.log(`> [rcon] ${command}`);
-        await client.execute(command);
-        await sleep(RCON_DELAY_MS);
-    } else {
-        console.log(`> ${command}`);
+        await Promise.all(
+            commands.map((command) => {
+                log.log(`> [rcon] ${command}`);
+                return client.execute(command);
+            }),
+        );
+        return;
+    }
+    for (const command of commands) {
+        log.log(`> ${command}`);
         bot.chat(command);
         await sleep(COMMAND_DELAY_MS);
     }
@@ -0,0 +1,142 @@
+// @ts-check
+// Client-observed latency metrics, recorded by every bot.
+//
+// Rows are appended to `${CLIENT_METRICS_PREFIX}-${index}.csv` as
+// `timestamp_ms,metric,value_ms` with the metrics:
+//
+//   keepalive_rtt  keep-alive round trip the server measured for this bot
+//   action_ack     time from a /setblock next to the bot until the server
+//                  sends the block update back
+//   action_timeout an action that was not acknowledged within ACK_TIMEOUT_MS
+//   chunk_load     time from entering a chunk until all chunks within
+//                  CHUNK_RADIUS of it have been received
+import fs from "node:fs";
+
+const prefix = process.env.CLIENT_METRICS_PREFIX;
+const intervalMs = parseInt(process.env.CLIENT_METRICS_INTERVAL_MS ?? "5000");
+const ACK_TIMEOUT_MS = 10_000;
+const CHUNK_RADIUS = 2;
+
+/**
+ * Start recording client metrics for a spawned bot. Does nothing unless
+ * CLIENT_METRICS_PREFIX is set. Recording stops when the bot disconnects.
+ * @param {import("mineflayer").Bot} bot
+ * @param {number} index
+ */
+export function recordClientMetrics(bot, index) {
+    if (!prefix) {
+        return;
+    }
+    const path = `${prefix}-${index}.csv`;
+    const exists = fs.existsSync(path);
+    const out = fs.createWriteStream(path, { flags: "a" });
+    if (!exists) {
+        out.write("timestamp_ms,metric,value_ms\n");
+    }
+    /**
+     * @param {string} metric
+     * @param {number} value
+     */
+    const record = (metric, value) => {
+        out.write(`${Date.now()},${metric},${Math.round(value * 1000) / 1000}\n`);
+    };
+
+    let probing = false;
+    const sample = setInterval(() => {
+        if (bot.player?.ping !== undefined) {
+            record("keepalive_rtt", bot.player.ping);
+        }
+        if (!probing) {
+            probing = true;
+            probeAction(bot, record).finally(() => {
+                probing = false;
+            });
+        }
+    }, intervalMs);
+
+    const onMove = trackChunkLoads(bot, record);
+    bot.once("end", () => {
+        clearInterval(sample);
+        bot.removeListener("move", onMove);
+        out.end();
+    });
+}
+
+/**
+ * Place a block above the bot and remove it again, timing both until the
+ * server's block update arrives. Only probes where there is air, so the world
+ * is left unchanged.
+ * @param {import("mineflayer").Bot} bot
+ * @param {(metric: string, value: number) => void} record
+ */
+async function probeAction(bot, record) {
+    if (!bot.entity) {
+        return;
+    }
+    const pos = bot.entity.position.floored().offset(0, 3, 0);
+    if (bot.blockAt(pos)?.name !== "air") {
+        return;
+    }
+    for (const block of ["minecraft:glass", "minecraft:air"]) {
+        const acked = new Promise((resolve) => {
+            const timer = setTimeout(() => {
+                bot.world.removeListener(`blockUpdate:${pos}`, onUpdate);
+                resolve(false);
+            }, ACK_TIMEOUT_MS);
+            const onUpdate = () => {
+                clearTimeout(timer);
+                resolve(true);
+            };
+            bot.world.once(`blockUpdate:${pos}`, onUpdate);
+        });
+        const start = performance.now();
+        bot.chat(`/setblock ${pos.x} ${pos.y} ${pos.z} ${block}`);
+        if (await acked) {
+            record("action_ack", performance.now() - start);
+        } else {
+            record("action_timeout", ACK_TIMEOUT_MS);
+            return;
+        }
+    }
+}
+
+/**
+ * @param {import("mineflayer").Bot} bot
+ * @param {(metric: string, value: number) => void} record
+ */
+function trackChunkLoads(bot, record) {
+    let current = "";
+    /** @type {Set<string>} */
+    let pending = new Set();
+    let enteredAt = 0;
+
+    const onMove = () => {
+        const cx = Math.floor(bot.entity.position.x / 16);
+        const cz = Math.floor(bot.entity.position.z / 16);
+        const key = `${cx},${cz}`;
+        if (key === current) {
+            return;
+        }
+        current = key;
+        enteredAt = performance.now();
+        pending = new Set();
+        for (let dx = -CHUNK_RADIUS; dx <= CHUNK_RADIUS; dx++) {
+            for (let dz = -CHUNK_RADIUS; dz <= CHUNK_RADIUS; dz++) {
+                if (!bot.world.getColumn(cx + dx, cz + dz)) {
+                    pending.add(`${cx + dx},${cz + dz}`);
+                }
+            }
+        }
+    };
+    bot.on("move", onMove);
+    bot.on("chunkColumnLoad", (/** @type {import("vec3").Vec3} */ point) => {
+        if (pending.size === 0) {
+            return;
+        }
+        pending.delete(`${point.x >> 4},${point.z >> 4}`);
+        if (pending.size === 0) {
+            record("chunk_load", performance.now() - enteredAt);
+        }
+    });
+    return onMove;
+}
@@ -0,0 +1,73 @@
+// @ts-check
+// Arrival schedules and join/leave event logging shared by the workloads.
+import fs from "node:fs";
+
+/**
+ * @typedef {{start: number, bots: (number | null)[][], phases: object[]}} Schedule
+ */
+
+/**
+ * Read the arrival schedule written by the start script, if any.
+ * @returns {Schedule | null}
+ */
+export function loadSchedule() {
+    const path = process.env.SCHEDULE_FILE;
+    if (!path) {
+        return null;
+    }
+    return JSON.parse(fs.readFileSync(path, "utf8"));
+}
+
+/**
+ * Milliseconds to wait before bot `index` joins; 0 without a schedule.
+ * @param {Schedule | null} schedule
+ * @param {number} index
+ */
+export function msUntilJoin(schedule, index) {
+    const join = schedule?.bots[index]?.[0];
+    if (schedule === null || join === null || join === undefined) {
+        return 0;
+    }
+    return Math.max(0, schedule.start * 1000 + join * 1000 - Date.now());
+}
+
+/**
+ * Milliseconds until bot `index` leaves, or null if it stays until the end.
+ * @param {Schedule | null} schedule
+ * @param {number} index
+ */
+export function msUntilLeave(schedule, index) {
+    const leave = schedule?.bots[index]?.[1];
+    if (schedule === null || leave === null || leave === undefined) {
+        return null;
+    }
+    return Math.max(0, schedule.start * 1000 + leave * 1000 - Date.now());
+}
+
+/**
+ * Appends `timestamp_ms,bot,event` rows to a CSV file, or does nothing when
+ * no path is given.
+ */
+export class PlayerEvents {
+    /**
+     * @param {string | undefined} path
+     */
+    constructor(path) {
+        this.out = null;
+        if (path) {
+            const exists = fs.existsSync(path);
+            this.out = fs.createWriteStream(path, { flags: "a" });
+            if (!exists) {
+                this.out.write("timestamp_ms,bot,event\n");
+            }
+        }
+    }
+
+    /**
+     * @param {string} username
+     * @param {"join" | "leave" | "disconnect"} event
+     */
+    log(username, event) {
+        this.out?.write(`${Date.now()},${username},${event}\n`);
+    }
+}
@@ -0,0 +1,148 @@
+// @ts-check
+// Minimal client for the Source RCON protocol used by Minecraft.
+//
+// Commands are queued and written to the socket in the order they are
+// submitted, with at most `maxInFlight` unanswered; responses are matched to
+// commands by the request id the server echoes. Keep `maxInFlight` at 1 for
+// the vanilla server: its RconClient reads at most one packet per read() and
+// drops the connection when several packets arrive together.
+import net from "node:net";
+
+const TYPE_AUTH = 3;
+const TYPE_COMMAND = 2;
+
+/**
+ * @typedef {{resolve: (body: string) => void, reject: (err: Error) => void}} Pending
+ */
+
+export class PipelinedRcon {
+    /**
+     * @param {{host: string, port: number, maxInFlight?: number}} options
+     */
+    constructor({ host, port, maxInFlight = 1 }) {
+        this.host = host;
+        this.port = port;
+        this.maxInFlight = maxInFlight;
+        this.nextId = 1;
+        /** @type {Map<number, Pending>} */
+        this.inFlight = new Map();
+        /** @type {{body: string, pending: Pending}[]} */
+        this.queue = [];
+        this.buffer = Buffer.alloc(0);
+        /** @type {net.Socket | null} */
+        this.socket = null;
+    }
+
+    /**
+     * Connect and authenticate.
+     * @param {string} password
+     */
+    async connect(password) {
+        const socket = net.connect({ host: this.host, port: this.port });
+        socket.setNoDelay(true);
+        await new Promise((resolve, reject) => {
+            socket.once("connect", resolve);
+            socket.once("error", reject);
+        });
+        this.socket = socket;
+        socket.on("data", (data) => this.onData(data));
+        socket.on("error", (err) => this.failAll(err));
+        socket.on("close", () => this.failAll(new Error("RCON connection closed")));
+        // A failed login is answered with request id -1, which never matches.
+        const auth = new Promise((resolve, reject) =>
+            this.send(TYPE_AUTH, password, { resolve, reject }),
+        );
+        const timeout = new Promise((_, reject) =>
+            setTimeout(() => reject(new Error("RCON authentication failed")), 5000),
+        );
+        await Promise.race([auth, timeout]);
+    }
+
+    /**
+     * Queue a command. Resolves with the server's response.
+     * @param {string} command
+     * @returns {Promise<string>}
+     */
+    execute(command) {
+        const body = command.startsWith("/") ? command.slice(1) : command;
+        return new Promise((resolve, reject) => {
+            this.queue.push({ body, pending: { resolve, reject } });
+            this.pump();
+        });
+    }
+
+    /** False once the connection is closed or failed. */
+    get connected() {
+        return this.socket !== null;
+    }
+
+    end() {
+        this.socket?.end();
+    }
+
+    pump() {
+        while (this.queue.length > 0 && this.inFlight.size < this.maxInFlight) {
+            const next = /** @type {{body: string, pending: Pending}} */ (this.queue.shift());
+            this.send(TYPE_COMMAND, next.body, next.pending);
+        }
+    }
+
+    /**
+     * @param {number} type
+     * @param {string} body
+     * @param {Pending} pending
+     */
+    send(type, body, pending) {
+        if (this.socket === null) {
+            pending.reject(new Error("RCON is not connected"));
+            return;
+        }
+        const id = this.nextId++;
+        const payload = Buffer.from(body, "utf8");
+        const packet = Buffer.alloc(14 + payload.length);
+        packet.writeInt32LE(10 + payload.length, 0);
+        packet.writeInt32LE(id, 4);
+        packet.writeInt32LE(type, 8);
+        payload.copy(packet, 12);
+        this.inFlight.set(id, pending);
+        this.socket.write(packet);
+    }
+
+    /**
+     * @param {Buffer} data
+     */
+    onData(data) {
+        this.buffer = Buffer.concat([this.buffer, data]);
+        while (this.buffer.length >= 4) {
+            const length = this.buffer.readInt32LE(0);
+            if (this.buffer.length < 4 + length) {
+                break;
+            }
+            const id = this.buffer.readInt32LE(4);
+            const body = this.buffer.toString("utf8", 12, 4 + length - 2);
+            this.buffer = this.buffer.subarray(4 + length);
+            // Responses longer than one packet are cut short, which is fine
+            // for the world-editing commands sent here.
+            const pending = this.inFlight.get(id);
+            if (pending !== undefined) {
+                this.inFlight.delete(id);
+                pending.resolve(body);
+            }
+        }
+        this.pump();
+    }
+
+    /**
+     * @param {Error} err
+     */
+    failAll(err) {
+        for (const pending of this.inFlight.values()) {
+            pending.reject(err);
+        }
+        this.inFlight.clear();
+        for (const { pending } of this.queue.splice(0)) {
+            pending.reject(err);
+        }
+        this.socket = null;
+    }
+}
@@ -0,0 +1,127 @@
+from collections import deque
+from datetime import timedelta
+from typing import Optional
+import math
+import random
+
+
+class Schedule(object):
+    """When bots join and leave the game during a trial.
+
+    A schedule is a sequence of phases that run one after the other. Bots get
+    consecutive indices in the order they join, and `leave` phases remove the
+    bots that have been online the longest. Phases can be chained:
+
+        Schedule().step(5).hold(timedelta(minutes=1)).ramp(20, timedelta(minutes=5))
+
+    Poisson arrivals are drawn from a generator seeded with `seed`, so every
+    trial with the same schedule sees the same arrival times.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.phases: list[tuple[str, dict]] = []
+
+    def step(self, players: int) -> "Schedule":
+        """`players` bots join at once."""
+        self.phases.append(("step", {"players": players}))
+        return self
+
+    def ramp(self, players: int, duration: timedelta) -> "Schedule":
+        """`players` bots join at a constant rate over `duration`."""
+        self.phases.append(("ramp", {"players": players, "duration": duration}))
+        return self
+
+    def poisson(self, rate_per_s: float, duration: timedelta) -> "Schedule":
+        """Bots join as a Poisson process with `rate_per_s` arrivals per second
+        for `duration`."""
+        self.phases.append(
+            ("poisson", {"rate_per_s": rate_per_s, "duration": duration})
+        )
+        return self
+
+    def hold(self, duration: timedelta) -> "Schedule":
+        """Nobody joins or leaves for `duration`."""
+        self.phases.append(("hold", {"duration": duration}))
+        return self
+
+    def leave(self, players: int, duration: timedelta = timedelta(0)) -> "Schedule":
+        """`players` bots leave at a constant rate over `duration`, longest
+        online first."""
+        self.phases.append(("leave", {"players": players, "duration": duration}))
+        return self
+
+    @classmethod
+    def waves(
+        cls, player_count: int, interval: timedelta = timedelta(minutes=1)
+    ) -> "Schedule":
+        """A quarter of the players, then another quarter, then the remaining
+        half, `interval` apart."""
+        first = math.ceil(player_count / 4)
+        second = math.ceil(player_count / 2) - first
+        return (
+            cls()
+            .step(first)
+            .hold(interval)
+            .step(second)
+            .hold(interval)
+            .step(player_count - first - second)
+        )
+
+    def compile(self) -> tuple[list[list[Optional[float]]], list[dict]]:
+        """Return the `[join_s, leave_s]` offsets of every bot, indexed by bot,
+        and the `{"phase", "start_s", "end_s"}` bounds of every phase. A bot
+        that never leaves has `leave_s` None.
+
+        Raises:
+            ValueError: If a phase makes more bots leave than are online
+        """
+        rng = random.Random(self.seed)
+        bots: list[list[Optional[float]]] = []
+        online: deque = deque()
+        phases = []
+        t = 0.0
+        for kind, args in self.phases:
+            start = t
+            duration = args.get("duration", timedelta(0)).total_seconds()
+            if kind == "step":
+                joins = [t] * args["players"]
+            elif kind == "ramp":
+                joins = [t + duration * i / args["players"] for i in range(args["players"])]
+            elif kind == "poisson":
+                joins = []
+                arrival = t + rng.expovariate(args["rate_per_s"])
+                while arrival < t + duration:
+                    joins.append(arrival)
+                    arrival += rng.expovariate(args["rate_per_s"])
+            else:
+                joins = []
+            for join in joins:
+                online.append(len(bots))
+                bots.append([round(join, 3), None])
+            if kind == "leave":
+                if args["players"] > len(online):
+                    raise ValueError(
+                        f"cannot make {args['players']} bots leave, "
+                        f"only {len(online)} are online"
+                    )
+                for i in range(args["players"]):
+                    bots[online.popleft()][1] = round(t + duration * i / args["players"], 3)
+            t += duration
+            phases.append({"phase": kind, "start_s": start, "end_s": t})
+        return bots, phases
+
+    @property
+    def player_count(self) -> int:
+        """Number of distinct bots that join during the schedule."""
+        return len(self.compile()[0])
+
+    @property
+    def duration(self) -> timedelta:
+        return timedelta(seconds=self.compile()[1][-1]["end_s"] if self.phases else 0)
+
+    def extravar(self, start: float) -> dict:
+        """Describe the schedule for the start scripts, with phase offsets
+        relative to `start` (seconds since the epoch)."""
+        bots, phases = self.compile()
+        return {"start": start, "seed": self.seed, "bots": bots, "phases": phases}
@@ -0,0 +1,115 @@
+from yardstick_benchmark.catalog import read_catalog
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import os
+import time
+
+MANIFEST = "trial.json"
+
+
+def _trial_files(dest: Path) -> list[Path]:
+    catalog = read_catalog(dest)
+    if catalog is not None:
+        return sorted(dest / f["path"] for f in catalog["files"])
+    # Trials from before fetch catalogs.
+    return sorted(
+        p
+        for p in dest.rglob("*")
+        if p.is_file()
+        and p.relative_to(dest) != Path(MANIFEST)
+        and not p.name.endswith(".tmp")
+    )
+
+
+def checksum(dest: Path) -> str:
+    """SHA-256 over the names and contents of the files fetched for a trial,
+    as listed in its `catalog.json`, so files written next to them later
+    (e.g. by `extract_csv.py`) do not change it. Without a catalog, all
+    files of the trial except its manifest are included."""
+    dest = Path(dest)
+    h = hashlib.sha256()
+    for path in _trial_files(dest):
+        h.update(str(path.relative_to(dest)).encode() + b"\0")
+        if not path.is_file():
+            h.update(b"missing\0")
+            continue
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(dest: Path) -> Optional[dict]:
+    """The manifest of the trial in `dest`, None if there is none."""
+    path = Path(dest) / MANIFEST
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(dest: Path, **fields) -> dict:
+    """Update the manifest of the trial in `dest` with `fields`.
+
+    The manifest is replaced atomically, so it is never seen half-written,
+    even if the controller dies while writing it.
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(dest) or {}
+    manifest.update(fields)
+    tmp = dest / (MANIFEST + ".tmp")
+    with tmp.open("w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, dest / MANIFEST)
+    return manifest
+
+
+def start_trial(dest: Path, config: dict) -> dict:
+    return write_manifest(
+        dest,
+        config=config,
+        status="running",
+        started=time.time(),
+        finished=None,
+        duration_s=None,
+        checksum=None,
+        error=None,
+    )
+
+
+def finish_trial(dest: Path, error: Optional[str] = None) -> dict:
+    """Mark the trial in `dest` as done, or failed with `error`, and record
+    the checksum of its data."""
+    finished = time.time()
+    started = (read_manifest(dest) or {}).get("started") or finished
+    return write_manifest(
+        dest,
+        status="done" if error is None else "failed",
+        finished=finished,
+        duration_s=finished - started,
+        checksum=checksum(dest),
+        error=error,
+    )
+
+
+def is_done(dest: Path) -> bool:
+    """Whether the manifest of the trial in `dest` says it finished
+    successfully, without checking its data."""
+    manifest = read_manifest(dest)
+    return manifest is not None and manifest.get("status") == "done"
+
+
+def is_complete(dest: Path) -> bool:
+    """Whether the trial in `dest` finished successfully and its data is
+    unchanged since. This reads all of the trial's data."""
+    manifest = read_manifest(dest)
+    return (
+        manifest is not None
+        and manifest.get("status") == "done"
+        and manifest.get("checksum") == checksum(dest)
+    )
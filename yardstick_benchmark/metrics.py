@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import mean, stdev
+from typing import Optional
+import csv
+import math
+
+
+def percentile(values: list[float], p: float) -> float:
+    """The `p`th percentile of `values`, interpolating between samples."""
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def parse_tick_row(row: list[str]) -> Optional[tuple[str, float, float]]:
+    """Parse a row of a Telegraf CSV file into `(measurement, timestamp_s,
+    tick_ms)`, or None if it holds no tick duration.
+
+    The measurement is `minecraft_tick_duration` for the per-tick durations
+    reported by the execd tick collector and `minecraft_tick_times` for the
+    average tick times sampled by the Jolokia input.
+    """
+    if len(row) < 5 or row[1] not in ("minecraft_tick_duration", "minecraft_tick_times"):
+        return None
+    try:
+        # Telegraf sorts fields by name: computed_timestamp_ms, loop_iteration,
+        # tick_duration_ms, ... for the collector and averageTickTime, ... for
+        # Jolokia.
+        value = float(row[5] if row[1] == "minecraft_tick_duration" else row[4])
+        timestamp = float(row[0])
+    except (ValueError, IndexError):
+        return None
+    if math.isnan(value):
+        return None
+    return row[1], timestamp, value
+
+
+def _read_ticks(
+    path: Path, skip_s: float, window: Optional[tuple[float, float]] = None
+) -> tuple[list[float], list[float]]:
+    """Read tick durations in ms from one Telegraf CSV file.
+
+    Returns the per-tick durations reported by the execd tick collector and the
+    average tick times sampled by the Jolokia input.
+    """
+    ticks = []
+    averages = []
+    start = None
+    with path.open(newline="") as f:
+        for row in csv.reader(f):
+            parsed = parse_tick_row(row)
+            if parsed is None:
+                continue
+            measurement, timestamp, value = parsed
+            if start is None:
+                start = timestamp
+            if timestamp - start < skip_s:
+                continue
+            if window is not None and not window[0] <= timestamp < window[1]:
+                continue
+            (ticks if measurement == "minecraft_tick_duration" else averages).append(value)
+    return ticks, averages
+
+
+def tick_durations(
+    dest: Path, skip_s: float = 0, window: Optional[tuple[float, float]] = None
+) -> list[float]:
+    """Tick durations in ms of the Minecraft server, from the `metrics-*.csv`
+    files fetched to `dest`.
+
+    Uses the per-tick durations of `Telegraf.add_input_execd_minecraft_ticks`
+    when available and otherwise the average tick times of
+    `Telegraf.add_input_jolokia_agent`.
+
+    Args:
+        dest (Path): Directory the trial's data was fetched to.
+        skip_s (float): Ignore the first `skip_s` seconds of every file.
+        window (Optional[tuple[float, float]]): Only use ticks between these
+            times in seconds since the epoch, e.g. the trial's measurement
+            window.
+    """
+    ticks = []
+    averages = []
+    for path in sorted(Path(dest).glob("**/metrics-*.csv")):
+        t, a = _read_ticks(path, skip_s, window)
+        ticks += t
+        averages += a
+    return ticks or averages
+
+
+def tick_percentile(dest: Path, p: float = 95, skip_s: float = 0) -> float:
+    """The `p`th percentile tick duration in ms of a trial; NaN without tick
+    data."""
+    return percentile(tick_durations(dest, skip_s), p)
+
+
+# Two-sided 95% quantiles of Student's t distribution by degrees of freedom.
+_T95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31,
+        9: 2.26, 10: 2.23, 15: 2.13, 20: 2.09, 30: 2.04, 60: 2.00, 120: 1.98}
+
+
+def _t95(df: int) -> float:
+    return _T95[max(k for k in _T95 if k <= df)]
+
+
+@dataclass
+class SteadyState(object):
+    """The measurement window found by `steady_state`. Times are in seconds
+    since the epoch, `warmup_s` is the part of the samples discarded before
+    `start`."""
+
+    start: float
+    end: float
+    warmup_s: float
+    p95_ms: float
+    ci_half_width_ms: float
+    batches: int
+    steady: bool
+
+
+def steady_state(
+    samples: list[tuple[float, float]],
+    batch_s: float = 10,
+    p: float = 95,
+    min_batches: int = 6,
+    rel_precision: float = 0.05,
+    abs_precision_ms: float = 2.0,
+) -> Optional[SteadyState]:
+    """Find the end of the warmup and check whether the tick durations after
+    it have settled.
+
+    The `(timestamp_s, tick_ms)` samples are split into batches of `batch_s`
+    seconds and the `p`th percentile of every batch is computed. The warmup is
+    cut off where the marginal standard error rule (MSER) says the remaining
+    batches are most stable. The rest is steady when it has at least
+    `min_batches` batches and the 95% confidence interval of the mean batch
+    percentile is narrower than `rel_precision` of that mean or
+    `abs_precision_ms`, whichever is larger.
+
+    Returns None while there are too few samples to tell.
+    """
+    if not samples:
+        return None
+    samples = sorted(samples)
+    t0 = samples[0][0]
+    batches: dict[int, list[float]] = {}
+    for t, value in samples:
+        batches.setdefault(int((t - t0) // batch_s), []).append(value)
+    # The last batch is still being filled.
+    indices = sorted(batches)[:-1]
+    if len(indices) < 2:
+        return None
+    values = [percentile(batches[i], p) for i in indices]
+
+    # MSER: choose the truncation point that minimizes the variance of the
+    # mean of the remaining batches, looking at most at the first half.
+    best = None
+    for d in range(len(values) // 2 + 1):
+        tail = values[d:]
+        m = mean(tail)
+        mser = sum((v - m) ** 2 for v in tail) / len(tail) ** 2
+        if best is None or mser < best[0]:
+            best = (mser, d)
+    d = best[1]
+    tail = values[d:]
+    start = t0 + indices[d] * batch_s
+    end = t0 + (indices[-1] + 1) * batch_s
+
+    half_width = math.inf
+    if len(tail) >= 2:
+        half_width = _t95(len(tail) - 1) * stdev(tail) / math.sqrt(len(tail))
+    steady = len(tail) >= min_batches and half_width <= max(
+        rel_precision * mean(tail), abs_precision_ms
+    )
+    window = [v for t, v in samples if start <= t < end]
+    return SteadyState(
+        start=start,
+        end=end,
+        warmup_s=start - t0,
+        p95_ms=percentile(window, p),
+        ci_half_width_ms=half_width,
+        batches=len(tail),
+        steady=steady,
+    )
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-import ansible_runner
 import tempfile
 import shutil
 from pathlib import Path
@@ -14,6 +13,12 @@ class Node(object):
     host: str
     wd: Path
 
+    @property
+    def cache(self) -> Path:
+        """Node-level cache directory. It lives next to `wd` so it survives
+        `yardstick_benchmark.clean`."""
+        return self.wd.parent / "cache"
+
 
 def _gen_wd_name(name, node_wd) -> str:
     alphabet = string.ascii_lowercase + string.digits
@@ -23,7 +28,11 @@ def _gen_wd_name(name, node_wd) -> str:
 
 def _gen_inv(name: str, nodes: list[Node]) -> dict:
     hosts = {
-        node.host: {"node_wd": str(node.wd), "wd": _gen_wd_name(name, node.wd)}
+        node.host: {
+            "node_wd": str(node.wd),
+            "node_cache": str(node.cache),
+            "wd": _gen_wd_name(name, node.wd),
+        }
         for node in nodes
     }
     return {"all": {"hosts": hosts}}
@@ -50,6 +59,10 @@ class RemoteAction(object):
         self.extravars = extravars
 
     def run(self):
+        # Imported here, so that importing the package (e.g. to validate a
+        # configuration or analyze results) does not pay for ansible_runner.
+        import ansible_runner
+
         assert self.script.is_file()
 
         self.private_data_dir = tempfile.mkdtemp(prefix="yardstick-")
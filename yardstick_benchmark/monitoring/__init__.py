@@ -1,8 +1,20 @@
-from yardstick_benchmark.model import RemoteApplication, Node
+from yardstick_benchmark.model import RemoteAction, RemoteApplication, Node
+from yardstick_benchmark.cache import ArtifactCache
+from yardstick_benchmark.monitoring.stream import TickStream
 import os
 from enum import Enum
 import sys
+from datetime import timedelta
 from pathlib import Path
+from typing import Optional
+
+
+# Monitoring profiles from lightest to heaviest. "ticks" only runs the tick
+# inputs added with `add_input_jolokia_agent` and
+# `add_input_execd_minecraft_ticks`, "minimal" adds node CPU, memory and
+# network every 10 s and is meant for latency-critical runs, and "full" adds
+# disk, kernel, process and protocol statistics and JVM metrics every 5 s.
+PROFILES = ("ticks", "minimal", "full")
 
 
 class Telegraf(RemoteApplication):
@@ -10,12 +22,29 @@ class Telegraf(RemoteApplication):
     (https://www.influxdata.com/time-series-platform/telegraf/) on remote nodes.
     """
 
-    def __init__(self, nodes: list[Node]):
+    def __init__(
+        self,
+        nodes: list[Node],
+        version: str = "1.30.3",
+        cache: Optional[ArtifactCache] = None,
+        profile: str = "full",
+    ):
         """Create a new instance to run Telegraf on the given nodes.
 
+        The Telegraf binary is installed into each node's cache directory,
+        which survives `yardstick_benchmark.clean`, so later deployments on the
+        same node reuse it.
+
         Args:
             nodes (list[Node]): The nodes on which to run Telegraf
+            version (str): The Telegraf release to install
+            cache (Optional[ArtifactCache]): If given, the release archive is
+                downloaded once on the controller and pushed to nodes that do
+                not have it yet, instead of each node downloading it
+            profile (str): Which metrics to collect, one of `PROFILES`
         """
+        if profile not in PROFILES:
+            raise ValueError(f"unknown monitoring profile '{profile}'")
         super().__init__(
             "telegraf",
             nodes,
@@ -27,8 +56,21 @@ class Telegraf(RemoteApplication):
                 "config_template": os.path.join(
                     os.path.dirname(__file__), "telegraf.conf.j2"
                 ),
+                "telegraf_version": version,
+                "telegraf_url": f"https://dl.influxdata.com/telegraf/releases/telegraf-{version}_linux_amd64.tar.gz",
+                "telegraf_bin": f"{{{{ node_cache }}}}/telegraf-{version}/usr/bin/telegraf",
+                "monitoring_profile": profile,
             },
         )
+        self.cache = cache
+
+    def deploy(self):
+        if self.cache is not None:
+            self.extravars["telegraf_archive"] = self.cache.fetch(
+                self.extravars["telegraf_url"],
+                f"telegraf-{self.extravars['telegraf_version']}_linux_amd64.tar.gz",
+            ).extravar()
+        return super().deploy()
 
     def add_input_jolokia_agent(self, node: Node):
         """Configure Telegraf to run the Jolokia agent input on the given node.
@@ -56,3 +98,74 @@ class Telegraf(RemoteApplication):
         self.inv.setdefault("minecraft_servers", {}).setdefault("hosts", {})[
             node.host
         ] = this_host
+
+    def add_input_procstat(self, node: Node, pid_files: list[str], role: str):
+        """Configure Telegraf to collect per-process CPU time, RSS, threads,
+        context switches and I/O on the given node for the processes whose
+        PIDs are written to `pid_files`, e.g. `MinecraftServer.pid_file` or
+        `ChickenFarm.pid_files`. The PID files may be created after Telegraf
+        starts. Rows are written to the `procstat` measurement, tagged with
+        the PID file's name as `process` and with `role`.
+
+        Args:
+            node (Node): The node on which the processes run
+            pid_files (list[str]): Paths of the PID files on the node
+            role (str): What the processes are, e.g. "server" or "bots"
+        """
+        assert node in self.nodes
+        self.extravars.setdefault("procstat", {}).setdefault(node.host, []).extend(
+            {"pid_file": f, "process": Path(f).stem, "role": role} for f in pid_files
+        )
+
+    def add_output_http(self, url: str, tags: Optional[dict] = None):
+        """Also send all metrics to a `LineProtocolReceiver` at `url`, e.g.
+        `http://<controller>:8186/write`. Metrics that cannot be delivered are
+        buffered on the node and sent again later.
+
+        Args:
+            url (str): The receiver's write endpoint
+            tags (Optional[dict]): Tags added to every metric sent to the
+                receiver, which stores metrics per trial based on the
+                `version`, `farm_count` and `trial` tags. They are left out of
+                the CSV file, whose columns are read by position.
+        """
+        self.extravars["http_output_url"] = url
+        self.extravars["global_tags"] = {k: str(v) for k, v in (tags or {}).items()}
+
+    def metrics_file(self, node: Node) -> str:
+        """Path of the CSV file Telegraf writes its metrics to on `node`."""
+        wd = self.inv["all"]["hosts"][node.host]["wd"]
+        return f"{wd}/metrics-{node.host}.csv"
+
+    def tick_stream(self, node: Node) -> TickStream:
+        """Follow the tick durations collected on `node` from the controller
+        while Telegraf runs. The node should have the execd tick input or the
+        Jolokia agent input."""
+        return TickStream(node.host, self.metrics_file(node))
+
+
+def probe_server(
+    node: Node, pid_file: str, duration: timedelta, interval_s: float = 10
+):
+    """Sample the CPU time and tick durations of a running Minecraft server
+    without Telegraf, blocking for `duration`. The samples are written to
+    `server-probe-<host>.csv` (see `server_probe.py`) and can be compared
+    across monitoring profiles, including no monitoring at all.
+
+    Args:
+        node (Node): The node running the server
+        pid_file (str): Path of the server's PID file on the node
+        duration (timedelta): How long to sample
+        interval_s (float): Seconds between samples
+    """
+    return RemoteAction(
+        "server_probe",
+        [node],
+        Path(__file__).parent / "server_probe.yml",
+        extravars={
+            "server_probe_script": str(Path(__file__).parent / "server_probe.py"),
+            "server_pid_file": pid_file,
+            "probe_duration": duration.total_seconds(),
+            "probe_interval": interval_s,
+        },
+    ).run()
@@ -0,0 +1,250 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+import csv
+import gzip
+import io
+import queue
+import threading
+
+# Tags Telegraf adds to every point to tell trials apart. They decide where a
+# point is stored and are not written to the rows themselves.
+TRIAL_TAGS = ("version", "farm_count", "trial")
+
+
+def _split(s: str, sep: str) -> list[str]:
+    """Split `s` on unescaped `sep` outside double quotes."""
+    parts = []
+    current = []
+    quoted = False
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if c == "\\" and i + 1 < len(s):
+            current.append(s[i : i + 2])
+            i += 2
+            continue
+        if c == '"':
+            quoted = not quoted
+        elif c == sep and not quoted:
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(c)
+        i += 1
+    parts.append("".join(current))
+    return parts
+
+
+def _unescape(s: str) -> str:
+    for c in (",", " ", "=", '"', "\\"):
+        s = s.replace("\\" + c, c)
+    return s
+
+
+def _field_value(v: str):
+    if v.startswith('"'):
+        return _unescape(v[1:-1])
+    if v in ("t", "T", "true", "True", "TRUE"):
+        return True
+    if v in ("f", "F", "false", "False", "FALSE"):
+        return False
+    if v[-1] in "iu":
+        return int(v[:-1])
+    return float(v)
+
+
+def parse_line(line: str) -> Optional[tuple[str, dict, dict, Optional[int]]]:
+    """Parse one line of InfluxDB line protocol into `(measurement, tags,
+    fields, timestamp_ns)`. Returns None for blank lines and comments.
+
+    Raises:
+        ValueError: If the line is malformed
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = _split(line, " ")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"malformed line: {line}")
+    key = _split(parts[0], ",")
+    measurement = _unescape(key[0])
+    tags = {}
+    for tag in key[1:]:
+        k, v = _split(tag, "=")
+        tags[_unescape(k)] = _unescape(v)
+    fields = {}
+    for field in _split(parts[1], ","):
+        k, v = _split(field, "=")
+        fields[_unescape(k)] = _field_value(v)
+    timestamp = int(parts[2]) if len(parts) == 3 else None
+    return measurement, tags, fields, timestamp
+
+
+def _read_chunked(rfile) -> bytes:
+    """Read a request body sent with `Transfer-Encoding: chunked`."""
+    chunks = []
+    while True:
+        size = int(rfile.readline().split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            break
+        chunks.append(rfile.read(size))
+        rfile.readline()
+    # Skip the trailer, up to the empty line that ends the request.
+    while rfile.readline().strip():
+        pass
+    return b"".join(chunks)
+
+
+class LineProtocolReceiver(object):
+    """A Telegraf `outputs.http` target on the controller.
+
+    Accepts InfluxDB line protocol on `POST /write` and appends the points to
+    per-measurement CSV files in the campaign directory, in the layout and row
+    format the analysis expects:
+    `<root>/version_<v>/farms_<n>/trial_<t>/<host>/<measurement>.csv` with
+    rows `timestamp,measurement,<tags>,<fields>`, tags and fields sorted by
+    name, as written by Telegraf's CSV output. Points are routed by their
+    `version`, `farm_count` and `trial` tags (see `Telegraf.add_output_http`).
+
+    Requests are parsed by the HTTP threads and written in batches by a
+    single writer thread. When more than `max_pending` points wait to be
+    written, new requests are refused with 503, so Telegraf keeps the points
+    in its buffer on the node and sends them again later.
+
+    Args:
+        root (Path): The campaign directory
+        port (int): Port to listen on
+        max_pending (int): Points to queue before refusing requests
+    """
+
+    def __init__(self, root: Path, port: int = 8186, max_pending: int = 200_000):
+        self.root = Path(root)
+        self.port = port
+        self.max_pending = max_pending
+        self.points = 0
+        self.refused = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: list[threading.Thread] = []
+
+    def _path(self, host: str, measurement: str, tags: dict) -> Path:
+        if all(t in tags for t in TRIAL_TAGS):
+            trial = (
+                f"version_{tags['version']}/farms_{tags['farm_count']}/"
+                f"trial_{tags['trial']}"
+            )
+        else:
+            trial = "untagged"
+        return self.root / trial / host / f"{measurement}.csv"
+
+    def submit(self, body: str) -> bool:
+        """Parse a batch of lines and queue it for writing. Returns False,
+        without queueing anything, if the queue is full.
+
+        Raises:
+            ValueError: If a line is malformed
+        """
+        points = [p for p in map(parse_line, body.splitlines()) if p is not None]
+        with self._lock:
+            if self._pending + len(points) > self.max_pending and self._pending > 0:
+                self.refused += 1
+                return False
+            self._pending += len(points)
+        self._queue.put(points)
+        return True
+
+    def _write(self, batches: list[list]):
+        files: dict[Path, list[list]] = {}
+        count = 0
+        for points in batches:
+            for measurement, tags, fields, timestamp in points:
+                host = tags.get("host", "unknown")
+                row_tags = [v for k, v in sorted(tags.items()) if k not in TRIAL_TAGS]
+                row_fields = [fields[k] for k in sorted(fields)]
+                seconds = timestamp // 1_000_000_000 if timestamp is not None else ""
+                row = [seconds, measurement, *row_tags, *row_fields]
+                row = [str(v).lower() if isinstance(v, bool) else v for v in row]
+                files.setdefault(self._path(host, measurement, tags), []).append(row)
+                count += 1
+        for path, rows in files.items():
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows(rows)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a") as f:
+                f.write(out.getvalue())
+        with self._lock:
+            self._pending -= count
+            self.points += count
+
+    def _writer(self):
+        while True:
+            batches = [self._queue.get()]
+            # Write everything that is waiting at once.
+            while not self._queue.empty():
+                batches.append(self._queue.get())
+            stop = None in batches
+            self._write([b for b in batches if b is not None])
+            if stop:
+                return
+
+    def start(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.startswith("/write"):
+                    self.send_error(404)
+                    return
+                # A batch must never be answered 204 without being stored, or
+                # Telegraf drops it.
+                try:
+                    if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+                        body = _read_chunked(self.rfile)
+                    elif "Content-Length" in self.headers:
+                        body = self.rfile.read(int(self.headers["Content-Length"]))
+                    else:
+                        self.send_error(411)
+                        return
+                    if self.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    accepted = receiver.submit(body.decode())
+                except (ValueError, OSError, EOFError) as e:
+                    self.send_error(400, str(e))
+                    return
+                if accepted:
+                    self.send_response(204)
+                    self.end_headers()
+                else:
+                    self.send_error(503, "receiver is busy")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("", self.port), Handler)
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._writer, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        """Stop accepting points and write the ones still queued."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        print(f"Received {self.points} points, refused {self.refused} requests")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Sample the Minecraft server's CPU time and tick durations with as little
+overhead as possible, independent of Telegraf, so monitoring profiles can be
+compared against each other and against no monitoring at all.
+
+Every INTERVAL seconds, appends `timestamp,metric,value` rows to OUT:
+- cpu_s: CPU seconds used by the server process so far
+- node_busy_s, node_total_s: busy and total CPU seconds of the node so far
+- tick_ms: one row per tick of the last 100 ticks reported by Jolokia
+
+Usage:
+    python3 server_probe.py --pid-file vanillamc.pid --duration 300 --out server-probe.csv
+"""
+
+from urllib import request
+import argparse
+import json
+import os
+import time
+
+REQUEST = json.dumps(
+    {"type": "read", "mbean": "net.minecraft.server:type=Server", "attribute": "tickTimes"}
+).encode()
+
+
+def process_cpu_s(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        # The command name may contain spaces; fields start after ")".
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def node_cpu_s():
+    with open("/proc/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + values[4]
+    tick = os.sysconf("SC_CLK_TCK")
+    return (sum(values) - idle) / tick, sum(values) / tick
+
+
+def tick_times_ms():
+    r = request.Request("http://localhost:8778/jolokia/", data=REQUEST)
+    with request.urlopen(r, timeout=5) as resp:
+        return [v / 1e6 for v in json.loads(resp.read())["value"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--pid-file", required=True)
+    parser.add_argument("--duration", type=float, required=True)
+    parser.add_argument("--interval", type=float, default=10)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    with open(args.pid_file) as f:
+        pid = int(f.read())
+    end = time.monotonic() + args.duration
+    exists = os.path.exists(args.out)
+    with open(args.out, "a") as out:
+        if not exists:
+            out.write("timestamp,metric,value\n")
+        while time.monotonic() < end:
+            now = time.time()
+            busy, total = node_cpu_s()
+            rows = [
+                ("cpu_s", process_cpu_s(pid)),
+                ("node_busy_s", busy),
+                ("node_total_s", total),
+            ]
+            try:
+                rows += [("tick_ms", t) for t in tick_times_ms()]
+            except OSError:
+                pass
+            out.writelines(f"{now:.3f},{metric},{value}\n" for metric, value in rows)
+            out.flush()
+            time.sleep(max(0, min(args.interval, end - time.monotonic())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from yardstick_benchmark.metrics import SteadyState, parse_tick_row, steady_state
+from yardstick_benchmark.model import Node
+from pathlib import Path
+from typing import Optional
+import csv
+import shlex
+import subprocess
+import threading
+import time
+
+SSH = ("ssh", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no")
+
+
+class TickStream(object):
+    """Follow the tick durations Telegraf writes on a node while a trial runs.
+
+    The controller tails the node's Telegraf CSV file over ssh and keeps the
+    parsed `(timestamp_s, tick_ms)` samples in memory. See
+    `Telegraf.tick_stream`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        path: str,
+        ssh: tuple = SSH,
+    ):
+        self.host = host
+        self.path = path
+        self.ssh = ssh
+        self._ticks: list[tuple[float, float]] = []
+        self._averages: list[tuple[float, float]] = []
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        # -F keeps following the file if Telegraf has not created it yet.
+        self._proc = subprocess.Popen(
+            [*self.ssh, self.host, "tail", "-n", "+1", "-F", self.path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self._thread = threading.Thread(target=self._follow, daemon=True)
+        self._thread.start()
+
+    def _follow(self):
+        for row in csv.reader(self._proc.stdout):
+            parsed = parse_tick_row(row)
+            if parsed is None:
+                continue
+            measurement, timestamp, value = parsed
+            with self._lock:
+                if measurement == "minecraft_tick_duration":
+                    self._ticks.append((timestamp, value))
+                else:
+                    self._averages.append((timestamp, value))
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.wait()
+        if self._thread is not None:
+            self._thread.join()
+
+    def samples(self) -> list[tuple[float, float]]:
+        """The samples received so far, per-tick durations if the node has
+        any and average tick times otherwise."""
+        with self._lock:
+            return list(self._ticks or self._averages)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def wait_for_steady_state(
+        self, min_s: float, max_s: float, poll_s: float = 10, **kwargs
+    ) -> Optional[SteadyState]:
+        """Block until the tick durations are steady, but at least `min_s` and
+        at most `max_s` seconds. Returns the last window found, which is not
+        steady if `max_s` ran out first, or None without any tick data.
+
+        Keyword arguments are passed to `yardstick_benchmark.metrics.steady_state`.
+        """
+        start = time.monotonic()
+        state = None
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= min_s:
+                state = steady_state(self.samples(), **kwargs)
+                if state is not None:
+                    print(
+                        f"{self.host}: p95 tick {state.p95_ms:.1f} ms "
+                        f"± {state.ci_half_width_ms:.1f} ms over {state.batches} "
+                        f"batches after {state.warmup_s:.0f} s warmup"
+                    )
+                if state is not None and state.steady:
+                    return state
+            if elapsed >= max_s:
+                return state
+            time.sleep(min(poll_s, max_s - elapsed))
+
+
+class MetricsStreamer(object):
+    """Copy metric files from the nodes to the controller while a trial runs.
+
+    Every `interval_s` the streamer lists the files matching `patterns` under
+    each node's working directory and appends the bytes written since the
+    last copy to the controller's copy under `dest`, in the same layout
+    `yardstick_benchmark.fetch` uses. The size of the local copy is the offset
+    to resume from, so a restarted streamer picks up where the last one
+    stopped. The final `fetch` still transfers the complete files and
+    replaces the streamed copies; streaming keeps the metrics of a trial that
+    fails before it is fetched.
+
+    Args:
+        nodes (list[Node]): The nodes to copy from
+        dest (Path): Directory the trial's data is fetched to
+        interval_s (float): Seconds between copies
+        patterns (tuple): File name patterns to copy. Defaults to the Telegraf
+            output, which includes the tick durations of the execd input.
+    """
+
+    def __init__(
+        self,
+        nodes: list[Node],
+        dest: Path,
+        interval_s: float = 10,
+        patterns: tuple = ("metrics-*.csv",),
+        ssh: tuple = SSH,
+    ):
+        self.nodes = nodes
+        self.dest = Path(dest)
+        self.interval_s = interval_s
+        self.patterns = patterns
+        self.ssh = ssh
+        self.bytes_copied = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ssh(self, host: str, command: str, **kwargs) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [*self.ssh, host, command], check=True, capture_output=True, **kwargs
+        )
+
+    def _list(self, node: Node) -> list[tuple[int, str]]:
+        names = " -o ".join(f"-name {shlex.quote(p)}" for p in self.patterns)
+        out = self._ssh(
+            node.host,
+            f"find {shlex.quote(str(node.wd))} -type f \\( {names} \\) "
+            "-printf '%s\\t%p\\n'",
+            text=True,
+        ).stdout
+        files = []
+        for line in out.splitlines():
+            size, path = line.split("\t", 1)
+            files.append((int(size), path))
+        return files
+
+    def poll(self) -> int:
+        """Copy what was appended since the last call. Returns the number of
+        bytes copied. Nodes that cannot be reached are skipped until the next
+        call."""
+        copied = 0
+        for node in self.nodes:
+            try:
+                files = self._list(node)
+            except subprocess.CalledProcessError:
+                continue
+            for size, path in files:
+                local = self.dest / Path(path).relative_to(node.wd.parent)
+                local.parent.mkdir(parents=True, exist_ok=True)
+                offset = local.stat().st_size if local.exists() else 0
+                if size < offset:
+                    # The file was truncated or replaced; start over.
+                    local.unlink()
+                    offset = 0
+                if size == offset:
+                    continue
+                try:
+                    data = self._ssh(
+                        node.host,
+                        f"tail -c +{offset + 1} {shlex.quote(path)} | head -c {size - offset}",
+                    ).stdout
+                except subprocess.CalledProcessError:
+                    continue
+                with local.open("ab") as f:
+                    f.write(data)
+                copied += len(data)
+        self.bytes_copied += copied
+        return copied
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.poll()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop streaming after a last copy. Does nothing if not streaming."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.poll()
+        print(f"Streamed {self.bytes_copied} bytes of metrics to {self.dest}")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
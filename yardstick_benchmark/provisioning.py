@@ -1,61 +1,95 @@
 import time
-from plumbum import local
 from yardstick_benchmark.model import Node
 from pathlib import Path
-import os
+import getpass
+import threading
 
 
 class Das(object):
-    def __init__(self):
+    def __init__(self, preserve=None, poll_interval_s: float = 1):
+        """Provision nodes on the DAS compute cluster through `preserve`.
+
+        Args:
+            preserve (optional): The plumbum command used to talk to the
+                reservation system. Defaults to the `preserve` executable on the
+                PATH. See `Das.simulated` to run against a local fake cluster.
+            poll_interval_s (float): Seconds between reservation status polls.
+        """
         self._reservation_map = dict()
+        # Trials of a `Campaign` provision and release from several threads.
+        self._lock = threading.Lock()
+        self._preserve = preserve
+        self.poll_interval_s = poll_interval_s
 
-    def _wait_for_ready(self, reservation_number: int) -> None:
-        preserve = local["preserve"]
-        ready = False
-        while not ready:
-            llist = preserve["-llist"]()
-            for line in llist.split("\n")[3:]:
-                parts = line.split()
-                r = int(parts[0])
-                if reservation_number == r:
-                    ready = parts[6] == "R"
-                    break
-            if not ready:
-                time.sleep(1)
+    @classmethod
+    def simulated(cls, poll_interval_s: float = 0.1) -> "Das":
+        """Create an instance backed by `yardstick_benchmark.fake_preserve`,
+        a local simulation of the reservation system. The simulated cluster is
+        configured through the `FAKE_PRESERVE_*` environment variables."""
+        import sys
+        from plumbum import local
 
-    def _get_machines(self, reservation_number: int) -> list[str]:
-        preserve = local["preserve"]
-        llist = preserve["-llist"]()
+        preserve = local[sys.executable]["-m", "yardstick_benchmark.fake_preserve"]
+        return cls(preserve=preserve, poll_interval_s=poll_interval_s)
+
+    @property
+    def preserve(self):
+        if self._preserve is None:
+            from plumbum import local
+
+            self._preserve = local["preserve"]
+        return self._preserve
+
+    def _reservations(self) -> dict[int, list[str]]:
+        llist = self.preserve["-llist"]()
+        res = dict()
         for line in llist.split("\n")[3:]:
             parts = line.split()
-            r = int(parts[0])
-            if reservation_number == r:
-                return parts[8:]
+            if not parts:
+                continue
+            res[int(parts[0])] = parts
+        return res
+
+    def _wait_for_ready(self, reservation_number: int) -> None:
+        while True:
+            reservations = self._reservations()
+            if reservation_number not in reservations:
+                # Cancelled, expired, or terminated by a node failure.
+                raise KeyError(f"reservation {reservation_number} does not exist")
+            if reservations[reservation_number][6] == "R":
+                return
+            time.sleep(self.poll_interval_s)
+
+    def _get_machines(self, reservation_number: int) -> list[str]:
+        reservations = self._reservations()
+        if reservation_number in reservations:
+            return reservations[reservation_number][8:]
         raise KeyError(f"reservation {reservation_number} does not exist")
 
     def provision(self, num=1, time_s=900) -> list[Node]:
-        preserve = local["preserve"]
-        reservation = int(preserve["-np", num, "-t", time_s]().split()[2][:-1])
+        reservation = int(self.preserve["-np", num, "-t", time_s]().split()[2][:-1])
         self._wait_for_ready(reservation)
         machines = self._get_machines(reservation)
         res = [
-            Node(host=host, wd=Path(f"/local/{os.getlogin()}/yardstick/{host}"))
+            Node(host=host, wd=Path(f"/local/{getpass.getuser()}/yardstick/{host}"))
             for host in machines
         ]
-        self._reservation_map[reservation] = set(res)
+        with self._lock:
+            self._reservation_map[reservation] = set(res)
         return res
 
     def _cancel_reservation(self, number: int) -> None:
-        preserve = local["preserve"]
-        preserve["-c", number]()
+        self.preserve["-c", number]()
 
     def release(self, machines: list[Node]) -> None:
         machines_to_release = set(machines)
         reservations_to_cancel = set()
-        for item in self._reservation_map.items():
-            item[1].difference_update(machines_to_release)
-            if len(item[1]) == 0:
-                reservations_to_cancel.add(item[0])
+        with self._lock:
+            for item in self._reservation_map.items():
+                item[1].difference_update(machines_to_release)
+                if len(item[1]) == 0:
+                    reservations_to_cancel.add(item[0])
+            for reservation in reservations_to_cancel:
+                del self._reservation_map[reservation]
         for reservation in reservations_to_cancel:
             self._cancel_reservation(reservation)
-            del self._reservation_map[reservation]
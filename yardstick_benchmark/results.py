@@ -0,0 +1,328 @@
+from yardstick_benchmark.manifest import read_manifest
+from yardstick_benchmark.metrics import percentile, tick_durations
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import mean
+from typing import Optional
+import csv
+import json
+import math
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    ingested REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trial_stats (
+    campaign TEXT NOT NULL,
+    version TEXT NOT NULL,
+    farm_count INTEGER NOT NULL,
+    trial INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL,
+    p50 REAL,
+    p95 REAL,
+    p99 REAL,
+    min REAL,
+    max REAL,
+    sketch TEXT NOT NULL,
+    PRIMARY KEY (campaign, version, farm_count, trial, metric)
+);
+CREATE INDEX IF NOT EXISTS trial_stats_by_metric
+    ON trial_stats (metric, version, farm_count, campaign);
+"""
+
+
+class Sketch(object):
+    """A mergeable histogram with logarithmically sized buckets, as in
+    DDSketch: quantiles are within `accuracy` (relative) of the exact ones,
+    and the sketches of several trials can be merged to get the quantiles of
+    all their samples together. Values of 0 or less are counted separately.
+    """
+
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets: dict[int, int] = defaultdict(int)
+        self.zeros = 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.buckets.values())
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value, self.gamma))] += 1
+
+    def merge(self, other: "Sketch"):
+        if other.accuracy != self.accuracy:
+            raise ValueError("cannot merge sketches of different accuracy")
+        self.zeros += other.zeros
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] += count
+
+    def quantile(self, q: float) -> float:
+        """The `q`th quantile (0 to 1) of the added values; NaN if empty."""
+        count = self.count
+        if count == 0:
+            return float("nan")
+        rank = q * (count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if rank < seen:
+                return 2 * self.gamma**bucket / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"accuracy": self.accuracy, "zeros": self.zeros, "buckets": self.buckets}
+        )
+
+    @classmethod
+    def from_json(cls, s: str) -> "Sketch":
+        d = json.loads(s)
+        sketch = cls(d["accuracy"])
+        sketch.zeros = d["zeros"]
+        for bucket, count in d["buckets"].items():
+            sketch.buckets[int(bucket)] = count
+        return sketch
+
+
+def _in_window(timestamp: float, window: Optional[tuple[float, float]]) -> bool:
+    return window is None or window[0] <= timestamp < window[1]
+
+
+def _server_cpu(dest: Path, window: Optional[tuple[float, float]]) -> list[float]:
+    """CPU utilization of the server process between procstat samples, in
+    percent of one core (see `Telegraf.add_input_procstat`)."""
+    last = {}
+    values = []
+    for path in sorted(dest.glob("**/metrics-*.csv")):
+        with path.open(newline="") as f:
+            for row in csv.reader(f):
+                # timestamp, procstat, host, process, role, cpu_time_system,
+                # cpu_time_user, ...
+                if len(row) < 7 or row[1] != "procstat" or row[4] != "server":
+                    continue
+                timestamp = float(row[0])
+                cpu = float(row[5]) + float(row[6])
+                prev = last.get(row[3])
+                last[row[3]] = (timestamp, cpu)
+                if prev is None or timestamp <= prev[0] or cpu < prev[1]:
+                    continue
+                if _in_window(timestamp, window):
+                    values.append(100 * (cpu - prev[1]) / (timestamp - prev[0]))
+    return values
+
+
+def _client_latencies(
+    dest: Path, window: Optional[tuple[float, float]]
+) -> dict[str, list[float]]:
+    """Client-observed latencies of the bots by metric (see `client-*.csv`)."""
+    values = defaultdict(list)
+    for path in sorted(dest.glob("**/client-*.csv")):
+        with path.open(newline="") as f:
+            for row in csv.DictReader(f):
+                if _in_window(float(row["timestamp_ms"]) / 1000, window):
+                    values[f"client_{row['metric']}_ms"].append(float(row["value_ms"]))
+    return values
+
+
+def trial_samples(dest: Path) -> dict[str, list[float]]:
+    """The samples of every summarised metric of the trial fetched to `dest`,
+    limited to its measurement window if it recorded one:
+
+    - `tick_ms`: tick durations (see `metrics.tick_durations`)
+    - `server_cpu_pct`: CPU utilization of the server process
+    - `client_<metric>_ms`: latencies observed by the bots
+    """
+    dest = Path(dest)
+    window = (read_manifest(dest) or {}).get("window")
+    window = (window["start"], window["end"]) if window else None
+    samples = {
+        "tick_ms": tick_durations(dest, window=window),
+        "server_cpu_pct": _server_cpu(dest, window),
+        **_client_latencies(dest, window),
+    }
+    return {metric: values for metric, values in samples.items() if values}
+
+
+@dataclass
+class Comparison(object):
+    """A metric's quantile in two campaigns for one (version, farm_count).
+    `regressed` is set if it grew by more than the threshold and every trial
+    of the candidate is above every trial of the baseline."""
+
+    version: str
+    farm_count: int
+    baseline: float
+    candidate: float
+    change: float
+    regressed: bool
+
+
+class ResultsDB(object):
+    """Per-trial summary statistics of many campaigns in one SQLite file.
+
+    Every ingested trial stores, per metric, its count, mean, p50, p95, p99,
+    min and max, and a `Sketch` of its samples, so quantiles over several
+    trials and campaigns can be computed without reading the raw CSV files.
+
+    Args:
+        path (Path): The database file; created if it does not exist
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def ingest(self, campaign_dir: Path, campaign: Optional[str] = None) -> int:
+        """Store the summaries of all completed trials of a campaign, replacing
+        earlier ingests of the same campaign. Returns the number of trials.
+
+        Args:
+            campaign_dir (Path): The campaign directory, containing
+                `version_<v>/farms_<n>/trial_<t>` trial directories
+            campaign (Optional[str]): Name of the campaign; defaults to the
+                directory name, the campaign's start time
+        """
+        campaign_dir = Path(campaign_dir).resolve()
+        campaign = campaign or campaign_dir.name
+        rows = []
+        trials = 0
+        for dest in sorted(campaign_dir.glob("version_*/farms_*/trial_*")):
+            manifest = read_manifest(dest)
+            # Campaigns from before trial manifests are ingested as they are.
+            if manifest is not None and manifest.get("status") != "done":
+                continue
+            version = dest.parent.parent.name.split("version_", 1)[1]
+            farm_count = int(dest.parent.name.split("farms_", 1)[1])
+            trial = int(dest.name.split("trial_", 1)[1])
+            for metric, values in trial_samples(dest).items():
+                sketch = Sketch()
+                for v in values:
+                    sketch.add(v)
+                rows.append((
+                    campaign,
+                    version,
+                    farm_count,
+                    trial,
+                    metric,
+                    len(values),
+                    mean(values),
+                    percentile(values, 50),
+                    percentile(values, 95),
+                    percentile(values, 99),
+                    min(values),
+                    max(values),
+                    sketch.to_json(),
+                ))
+            trials += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM trial_stats WHERE campaign = ?", (campaign,))
+            self.conn.executemany(
+                "INSERT INTO trial_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO campaigns VALUES (?, ?, ?)",
+                (campaign, str(campaign_dir), time.time()),
+            )
+        return trials
+
+    def campaigns(self) -> list[str]:
+        """Names of the ingested campaigns, oldest first."""
+        return [r[0] for r in self.conn.execute("SELECT campaign FROM campaigns ORDER BY campaign")]
+
+    def _sketches(self, metric: str, version: str, farm_count: int, campaign: Optional[str] = None):
+        query = (
+            "SELECT campaign, trial, sketch FROM trial_stats "
+            "WHERE metric = ? AND version = ? AND farm_count = ?"
+        )
+        params = [metric, version, farm_count]
+        if campaign is not None:
+            query += " AND campaign = ?"
+            params.append(campaign)
+        for campaign, trial, sketch in self.conn.execute(query, params):
+            yield campaign, trial, Sketch.from_json(sketch)
+
+    def trend(
+        self, metric: str, version: str, farm_count: int, q: float = 0.95
+    ) -> list[tuple[str, int, float]]:
+        """The `q`th quantile of `metric` over all trials of each campaign, as
+        `(campaign, trials, value)`, oldest campaign first."""
+        merged = {}
+        trials = defaultdict(int)
+        for campaign, _, sketch in self._sketches(metric, version, farm_count):
+            merged.setdefault(campaign, Sketch(sketch.accuracy)).merge(sketch)
+            trials[campaign] += 1
+        return [(c, trials[c], merged[c].quantile(q)) for c in sorted(merged)]
+
+    def compare(
+        self,
+        metric: str,
+        baseline: str,
+        candidate: str,
+        q: float = 0.95,
+        threshold: float = 0.1,
+    ) -> list[Comparison]:
+        """Compare the `q`th quantile of `metric` between two campaigns for
+        every (version, farm_count) both have, largest relative change
+        first.
+
+        Args:
+            metric (str): The metric, e.g. "tick_ms"
+            baseline (str): The campaign to compare against
+            candidate (str): The campaign to check for regressions
+            q (float): The quantile to compare
+            threshold (float): Relative increase that counts as a regression
+        """
+        configs = self.conn.execute(
+            "SELECT DISTINCT version, farm_count FROM trial_stats "
+            "WHERE metric = ? AND campaign = ? "
+            "INTERSECT SELECT DISTINCT version, farm_count FROM trial_stats "
+            "WHERE metric = ? AND campaign = ?",
+            (metric, baseline, metric, candidate),
+        ).fetchall()
+        comparisons = []
+        for version, farm_count in configs:
+            merged = {}
+            per_trial = {}
+            for campaign in (baseline, candidate):
+                sketches = [s for _, _, s in self._sketches(metric, version, farm_count, campaign)]
+                merged[campaign] = Sketch(sketches[0].accuracy)
+                for s in sketches:
+                    merged[campaign].merge(s)
+                per_trial[campaign] = [s.quantile(q) for s in sketches]
+            before = merged[baseline].quantile(q)
+            after = merged[candidate].quantile(q)
+            change = (after - before) / before if before else float("inf")
+            comparisons.append(Comparison(
+                version,
+                farm_count,
+                before,
+                after,
+                change,
+                change > threshold and min(per_trial[candidate]) > max(per_trial[baseline]),
+            ))
+        return sorted(comparisons, key=lambda c: c.change, reverse=True)
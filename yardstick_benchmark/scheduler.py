@@ -0,0 +1,173 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+import json
+import os
+import time
+import traceback
+
+
+@dataclass
+class Trial(object):
+    key: tuple
+    nodes: int
+    status: str = "pending"
+    attempts: int = 0
+    started: Optional[float] = None
+    duration_s: Optional[float] = None
+    error: Optional[str] = None
+    not_before: float = 0.0
+
+
+class Campaign(object):
+    """Run benchmark trials on a cluster with a fixed number of nodes.
+
+    Trials are queued with `add` and dispatched in order by `run` whenever
+    enough nodes are free; a trial that needs more nodes than are free does
+    not hold back smaller trials behind it. A trial that raises is retried up
+    to `max_attempts` times, waiting `backoff_s`, then twice that, and so on,
+    before its next attempt. One failed trial does not stop the campaign.
+
+    After every attempt the status, attempts and duration of all trials are
+    written to `status_file`, and a progress line with the throughput and the
+    estimated time remaining is printed.
+
+    Args:
+        run_trial (Callable[[tuple], object]): Runs the trial with the given
+            key, provisioning and releasing its own nodes.
+        nodes (int): Number of nodes the campaign may use at the same time.
+        max_attempts (int): Attempts per trial before it is marked failed.
+        backoff_s (float): Wait before the first retry of a trial.
+        status_file (Optional[Path]): JSON file to record trial status in.
+    """
+
+    def __init__(
+        self,
+        run_trial: Callable[[tuple], object],
+        nodes: int,
+        max_attempts: int = 3,
+        backoff_s: float = 60,
+        status_file: Optional[Path] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.run_trial = run_trial
+        self.nodes = nodes
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.status_file = status_file
+        self.trials: list[Trial] = []
+        self.start: Optional[float] = None
+
+    def add(self, key: tuple, nodes: int = 2) -> Trial:
+        """Queue a trial that needs `nodes` nodes."""
+        if nodes > self.nodes:
+            raise ValueError(
+                f"trial {key} needs {nodes} nodes, the campaign has {self.nodes}"
+            )
+        trial = Trial(key, nodes)
+        self.trials.append(trial)
+        return trial
+
+    def _attempt(self, trial: Trial):
+        start = time.monotonic()
+        try:
+            self.run_trial(trial.key)
+            trial.error = None
+            return True
+        except Exception:
+            trial.error = traceback.format_exc(limit=5)
+            return False
+        finally:
+            trial.duration_s = time.monotonic() - start
+
+    def _count(self, status: str) -> int:
+        return sum(1 for t in self.trials if t.status == status)
+
+    def eta(self) -> Optional[timedelta]:
+        """Estimated time until all trials have finished, based on the mean
+        duration of the trials that succeeded so far."""
+        durations = [t.duration_s for t in self.trials if t.status == "done"]
+        if not durations:
+            return None
+        left = self._count("pending") + self._count("running")
+        slots = max(1, self.nodes // max(t.nodes for t in self.trials))
+        return timedelta(seconds=round(sum(durations) / len(durations) * left / slots))
+
+    def report(self) -> str:
+        done = self._count("done")
+        elapsed = time.monotonic() - self.start if self.start is not None else 0
+        throughput = done / elapsed * 3600 if elapsed > 0 else 0
+        retries = sum(max(0, t.attempts - 1) for t in self.trials)
+        eta = self.eta()
+        return (
+            f"trials: {done}/{len(self.trials)} done, "
+            f"{self._count('running')} running, {self._count('pending')} queued, "
+            f"{self._count('failed')} failed, {retries} retries; "
+            f"{throughput:.1f} trials/h, ETA {'unknown' if eta is None else eta}"
+        )
+
+    def _write_status(self):
+        if self.status_file is None:
+            return
+        self.status_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.status_file.with_name(self.status_file.name + ".tmp")
+        # not_before is a monotonic clock reading, meaningless outside this run.
+        trials = [
+            {k: v for k, v in asdict(t).items() if k != "not_before"}
+            for t in self.trials
+        ]
+        tmp.write_text(json.dumps(trials, indent=2))
+        os.replace(tmp, self.status_file)
+
+    def run(self) -> list[Trial]:
+        """Run all queued trials and return them with their final status."""
+        self.start = time.monotonic()
+        free = self.nodes
+        pending = [t for t in self.trials if t.status == "pending"]
+        running = {}
+        workers = max(1, self.nodes // min((t.nodes for t in pending), default=1))
+        with ThreadPoolExecutor(workers) as pool:
+            while pending or running:
+                now = time.monotonic()
+                for trial in list(pending):
+                    if trial.nodes <= free and trial.not_before <= now:
+                        pending.remove(trial)
+                        free -= trial.nodes
+                        trial.status = "running"
+                        trial.attempts += 1
+                        trial.started = time.time()
+                        running[pool.submit(self._attempt, trial)] = trial
+
+                timeout = None
+                waiting = [t.not_before for t in pending if t.nodes <= free]
+                if waiting:
+                    timeout = max(0, min(waiting) - now)
+                if not running:
+                    time.sleep(timeout or 0)
+                    continue
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    trial = running.pop(future)
+                    free += trial.nodes
+                    if future.result():
+                        trial.status = "done"
+                    elif trial.attempts < self.max_attempts:
+                        trial.status = "pending"
+                        trial.not_before = (
+                            time.monotonic()
+                            + self.backoff_s * 2 ** (trial.attempts - 1)
+                        )
+                        pending.append(trial)
+                        print(
+                            f"Trial {trial.key} failed (attempt {trial.attempts}), "
+                            f"retrying:\n{trial.error}"
+                        )
+                    else:
+                        trial.status = "failed"
+                        print(f"Trial {trial.key} failed for good:\n{trial.error}")
+                    self._write_status()
+                    print(self.report())
+        return self.trials
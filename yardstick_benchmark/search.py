@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Callable, Optional
+import math
+
+
+@dataclass
+class SearchResult(object):
+    """The largest load that stayed under the threshold (None if even the
+    smallest load did not) and the p95 tick durations measured per load."""
+
+    knee: Optional[int]
+    probes: dict[int, list[float]] = field(default_factory=dict)
+
+    @property
+    def trials(self) -> int:
+        return sum(len(v) for v in self.probes.values())
+
+    def summary(self) -> dict:
+        return {
+            "knee": self.knee,
+            "trials": self.trials,
+            "probes": {str(load): values for load, values in self.probes.items()},
+        }
+
+
+class SaturationSearch(object):
+    """Find the largest load whose p95 tick duration stays under a threshold,
+    without running every load.
+
+    The loads are bisected with one trial per probe. A probe is only repeated
+    when its result lies within `margin_ms` of the threshold; clear passes and
+    clear violations are decided by a single trial. Once bisection has narrowed
+    down the knee, the loads on both sides of it are run `repetitions` times and
+    judged by the median, moving the knee if a repeated load disagrees with its
+    first trial.
+
+    A trial without tick data (NaN) counts as a violation, since that usually
+    means the server did not keep up or crashed.
+
+    Args:
+        run_trial (Callable[[int, int], float]): Runs trial number `trial` at
+            `load` and returns its p95 tick duration in ms. Trial numbers start
+            at 0 for every load.
+        loads (list[int]): Candidate loads, e.g. farm or player counts.
+        threshold_ms (float): A load passes if its p95 stays below this.
+        repetitions (int): Number of trials for the loads next to the knee and
+            for probes within `margin_ms` of the threshold.
+        margin_ms (float): Half-width of the band around the threshold in which
+            a single trial is not trusted.
+    """
+
+    def __init__(
+        self,
+        run_trial: Callable[[int, int], float],
+        loads: list[int],
+        threshold_ms: float = 50.0,
+        repetitions: int = 3,
+        margin_ms: float = 10.0,
+    ):
+        if not loads:
+            raise ValueError("no loads to search")
+        if repetitions < 1:
+            raise ValueError("repetitions must be at least 1")
+        self.run_trial = run_trial
+        self.loads = sorted(set(loads))
+        self.threshold_ms = threshold_ms
+        self.repetitions = repetitions
+        self.margin_ms = margin_ms
+        self.result = SearchResult(None)
+
+    def _measure(self, load: int, trials: int) -> list[float]:
+        values = self.result.probes.setdefault(load, [])
+        while len(values) < trials:
+            p95 = self.run_trial(load, len(values))
+            print(f"load {load} trial {len(values)}: p95 tick {p95:.1f} ms")
+            values.append(p95)
+        return values
+
+    def _passes(self, values: list[float]) -> bool:
+        values = [math.inf if math.isnan(v) else v for v in values]
+        return median(values) < self.threshold_ms
+
+    def _probe(self, load: int) -> bool:
+        """Decide on a load during bisection, repeating ambiguous results."""
+        values = self._measure(load, 1)
+        if abs(values[-1] - self.threshold_ms) <= self.margin_ms:
+            values = self._measure(load, self.repetitions)
+        return self._passes(values)
+
+    def _confirm(self, load: int) -> bool:
+        return self._passes(self._measure(load, self.repetitions))
+
+    def run(self) -> SearchResult:
+        # Invariant: loads[lo] passes (or lo == -1), loads[hi] fails (or
+        # hi == len(loads)).
+        lo, hi = -1, len(self.loads)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._probe(self.loads[mid]):
+                lo = mid
+            else:
+                hi = mid
+
+        # Spend the repetitions on the loads next to the knee. Once a load has
+        # all its repetitions its verdict no longer changes, so this ends.
+        while True:
+            if lo >= 0 and not self._confirm(self.loads[lo]):
+                lo, hi = lo - 1, lo
+            elif hi < len(self.loads) and self._confirm(self.loads[hi]):
+                lo, hi = hi, hi + 1
+            else:
+                break
+
+        self.result.knee = self.loads[lo] if lo >= 0 else None
+        return self.result